@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+import config
+
+
+# Model choice that analyzes every scene with the cheapest tier first
+CASCADE_MODEL = "cascade"
+
+# Fields a usable answer must fill (the client sets missing ones to "Unknown")
+KEY_FIELDS = ("story_event", "subtext", "protagonist_mood")
+UNKNOWN_VALUES = frozenset(["", "unknown", "unbekannt", "none", "keiner", "keine", "n/a", "-"])
+NO_TURNING_POINT = frozenset(["", "none", "keiner", "keine"])
+
+# Escalation reasons, recorded with the row
+ESCALATE_INVALID = "invalid_response"
+ESCALATE_UNKNOWN = "unknown_fields"
+ESCALATE_LONG = "long_scene"
+ESCALATE_TURNING_POINT = "turning_point"
+
+
+def cascade_tiers() -> List[str]:
+    """Models of the cascade, cheapest first"""
+    return config.CASCADE_MODELS
+
+
+def is_long_scene(scene_text: str) -> bool:
+    return len(scene_text) > config.CASCADE_LONG_SCENE_CHARS
+
+
+def escalation_reason(analysis: Optional[Dict]) -> Optional[str]:
+    """
+    Why an answer of a lower tier is not kept (None if it is good enough).
+
+    Turning points mark the key scenes of a script: any turning point the
+    tier reports is a reason, but as the tier decides that itself, these
+    escalations are capped by an EscalationBudget.
+    """
+    if analysis is None:
+        return ESCALATE_INVALID
+    for field in KEY_FIELDS:
+        value = analysis.get(field)
+        if not isinstance(value, str) or value.strip().lower() in UNKNOWN_VALUES:
+            return ESCALATE_UNKNOWN
+    turning_point = analysis.get("turning_point_type")
+    if isinstance(turning_point, str) and turning_point.strip().lower() not in NO_TURNING_POINT:
+        return ESCALATE_TURNING_POINT
+    return None
+
+
+class EscalationBudget:
+    """
+    Share of a job's scenes analyzed beyond the first tier.
+
+    Failed and incomplete answers are always escalated. Turning points
+    only while the share stays below CASCADE_ESCALATION_RATE (the rate
+    the cost estimate assumes), so a cheap model that reports turning
+    points everywhere doesn't send most of the script to the expensive
+    tier.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.scenes = 0
+        self.escalated = 0
+
+    def allows(self) -> bool:
+        """Whether the current scene may be escalated for a turning point"""
+        return self.escalated < self.rate * (self.scenes + 1)
+
+    def record(self, escalated: bool):
+        self.scenes += 1
+        if escalated:
+            self.escalated += 1
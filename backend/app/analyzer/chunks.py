@@ -0,0 +1,106 @@
+from typing import Dict, List
+
+
+# Scene text sent per call; longer scenes are analyzed in chunks
+MAX_SCENE_CHARS = 2000
+
+# Text repeated at the start of the next chunk, so a moment that falls on
+# a chunk border is seen whole by one of the calls
+CHUNK_OVERLAP_CHARS = 200
+
+NO_VALUES = frozenset(["", "none", "keiner", "keine", "unknown", "unbekannt"])
+
+# Fields taken from the chunk with the latest turning point
+TURNING_POINT_FIELDS = ("turning_point_type", "turning_point_moment")
+
+# Fields taken from the first chunk (scene setting) or the last (how the scene ends)
+FIRST_CHUNK_FIELDS = ("int_ext", "location", "time_of_day")
+LAST_CHUNK_FIELDS = ("protagonist_mood", "information_flow", "knowledge_gap", "redundancy")
+
+CHARACTER_FIELDS = ("on_stage", "off_stage")
+
+
+def split_scene(text: str, size: int = MAX_SCENE_CHARS, overlap: int = CHUNK_OVERLAP_CHARS) -> List[str]:
+    """
+    Split scene text into chunks of at most `size` characters that overlap
+    by about `overlap` characters. Chunks end at a line break (or a space)
+    where possible, so dialogue lines are not cut.
+    """
+    if len(text) <= size:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = max(text.rfind("\n", start + size // 2, end), text.rfind(" ", start + size // 2, end))
+            if cut > start:
+                end = cut
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        # Start the overlap at a word boundary
+        space = text.find(" ", start, end)
+        if space != -1:
+            start = space + 1
+
+    return [chunk for chunk in chunks if chunk]
+
+
+def _has_value(value) -> bool:
+    return isinstance(value, str) and value.strip().lower() not in NO_VALUES
+
+
+def merge_chunk_results(results: List[Dict]) -> Dict:
+    """
+    Combine the answers for the chunks of one scene (in scene order)
+
+    Characters are merged, the latest turning point wins, story events are
+    joined into one summary and other text fields keep their distinct values.
+    """
+    if len(results) == 1:
+        return results[0]
+
+    merged: Dict = {}
+    for field in FIRST_CHUNK_FIELDS:
+        values = [result[field] for result in results if _has_value(result.get(field))]
+        if values:
+            merged[field] = values[0]
+    for field in LAST_CHUNK_FIELDS:
+        values = [result[field] for result in results if _has_value(result.get(field))]
+        if values:
+            merged[field] = values[-1]
+
+    turning = [result for result in results if _has_value(result.get("turning_point_type"))]
+    source = turning[-1] if turning else results[-1]
+    for field in TURNING_POINT_FIELDS:
+        if field in source:
+            merged[field] = source[field]
+    if _has_value(source.get("subtext")):
+        merged["subtext"] = source["subtext"]
+
+    for field in CHARACTER_FIELDS:
+        names: List[str] = []
+        for result in results:
+            for name in result.get(field) or []:
+                if isinstance(name, str) and name.lower() not in (n.lower() for n in names):
+                    names.append(name)
+        merged[field] = names
+    on_stage = {name.lower() for name in merged["on_stage"]}
+    merged["off_stage"] = [name for name in merged["off_stage"] if name.lower() not in on_stage]
+
+    # Remaining fields: distinct text values in order, so "story_event"
+    # reads as a summary of the whole scene
+    for field in dict.fromkeys(key for result in results for key in result):
+        if field in merged:
+            continue
+        values = [result[field] for result in results if field in result]
+        texts = list(dict.fromkeys(value for value in values if _has_value(value)))
+        if texts:
+            merged[field] = (" " if field == "story_event" else "; ").join(texts)
+        else:
+            merged[field] = values[-1]
+
+    return merged
@@ -1,14 +1,77 @@
-import requests
 import os
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+from .chunks import MAX_SCENE_CHARS
+from .singleflight import SharedFlightError, SingleFlight, default_singleflight, request_fingerprint
+from .usage import UsageMeter
 import time
 
 
+class APIRequestError(Exception):
+    """HTTP request to OpenRouter failed (connection, status or response body)"""
+
+
+# Fields requested for every scene: (name, JSON value description)
+SCENE_FIELDS = {
+    "DE": [
+        ("location", '"Konkreter Schauplatz aus dem Text (z.B. \'Wohnzimmer\', \'Polizeirevier\', \'Park\')"'),
+        ("time_of_day", '"WICHTIG: Bestimme die Tageszeit aus JEGLICHEN Hinweisen im Text - explizit (z.B. \'Morgen\', \'Abends\', \'15 Uhr\') ODER implizit (z.B. Sonnenaufgang=Morgen, Dunkelheit=Nacht, Mittagspause=Mittag, Kinder in der Schule=Vormittag, Feierabend=Abend, Sterne/Mond=Nacht, helles Tageslicht=Tag). Nur wenn GAR KEIN Hinweis vorhanden: \'Unbekannt\'. Wähle aus: Morgen|Vormittag|Mittag|Nachmittag|Abend|Nacht|Tag|Dämmerung|Unbekannt"'),
+        ("int_ext", '"INT|EXT|UNBEKANNT (Innenraum oder Außenbereich)"'),
+        ("story_event", '"Eine prägnante Zusammenfassung in einem Satz - WAS passiert?"'),
+        ("subtext", '"Emotionale/unterschwellige Ebene in 5-10 Wörtern - was wird NICHT gesagt?"'),
+        ("turning_point_type", '"Action|Revelation|Decision|Realization|None"'),
+        ("turning_point_moment", '"Der genaue Moment/Satz wo der Wendepunkt passiert (z.B. \'Als sie die Tür öffnet und die Leiche sieht\') oder \'Keiner\'"'),
+        ("on_stage", '["Charakter1", "Charakter2"]'),
+        ("off_stage", '["Erwähnter aber nicht anwesender Charakter"]'),
+        ("protagonist_mood", '"Stimmung des Hauptcharakters (Wütend|Verzweifelt|Hoffnungsvoll|Erschöpft|Triumphierend|Verwirrt|Entschlossen|Neutral)"'),
+    ],
+    "EN": [
+        ("location", '"Specific location from context (e.g. \'Living room\', \'Police station\', \'Park\')"'),
+        ("time_of_day", '"IMPORTANT: Determine time of day from ANY clues in the text - explicit (e.g. \'Morning\', \'Evening\', \'3 PM\') OR implicit (e.g. sunrise=Morning, darkness=Night, lunch break=Noon, kids at school=Morning, rush hour=Evening, stars/moon=Night, bright daylight=Day). Only if NO clues exist: \'Unknown\'. Choose from: Morning|Noon|Afternoon|Evening|Night|Day|Dawn|Dusk|Unknown"'),
+        ("int_ext", '"INT|EXT|UNKNOWN (Interior or Exterior)"'),
+        ("story_event", '"A concise summary in one sentence - WHAT happens?"'),
+        ("subtext", '"Emotional/subtext layer in 5-10 words - what is NOT said?"'),
+        ("turning_point_type", '"Action|Revelation|Decision|Realization|None"'),
+        ("turning_point_moment", '"The exact moment/sentence where the turning point happens (e.g. \'When she opens the door and sees the body\') or \'None\'"'),
+        ("on_stage", '["Character1", "Character2"]'),
+        ("off_stage", '["Mentioned but not present character"]'),
+        ("protagonist_mood", '"Main character\'s mood (Angry|Desperate|Hopeful|Exhausted|Triumphant|Confused|Determined|Neutral)"'),
+    ],
+}
+
+# Additional fields for tatort and combined mode
+TATORT_FIELDS = {
+    "DE": [
+        ("evidence", '"Gefundene Beweismittel, Spuren oder wichtige Objekte (oder \'Keine\')"'),
+        ("information_flow", '"Wahrheit (sagt die Wahrheit)|Lüge (lügt aktiv)|Teilgeständnis (halb wahr)|Verschweigen (lässt Info weg)|Irreführung (lenkt ab)"'),
+        ("knowledge_gap", '"Zuschauer weiß mehr als Figur|Figur weiß mehr als Zuschauer|Beide wissen gleich viel"'),
+        ("redundancy", '"Neue Info (erste Erwähnung)|Wiederholung (exakt gleich)|Variation (neue Perspektive auf bekannte Info)"'),
+        ("suspect_status", '"Liste von Charakteren mit Status: \'Name (Verdächtig - Grund)\'|\'Name (Alibi - Details)\'|\'Name (Neutral)\' oder \'Keine Verdächtigen in dieser Szene\'"'),
+    ],
+    "EN": [
+        ("evidence", '"Found evidence, clues or important objects (or \'None\')"'),
+        ("information_flow", '"Truth (tells truth)|Lie (actively lies)|Partial confession (half true)|Concealment (withholds info)|Misdirection (deflects)"'),
+        ("knowledge_gap", '"Viewer knows more than character|Character knows more than viewer|Both know equally"'),
+        ("redundancy", '"New info (first mention)|Repetition (exactly same)|Variation (new perspective on known info)"'),
+        ("suspect_status", '"List of characters with status: \'Name (Suspect - reason)\'|\'Name (Alibi - details)\'|\'Name (Neutral)\' or \'No suspects in this scene\'"'),
+    ],
+}
+
+# on_stage when the speaking characters are known from the character cues
+ON_STAGE_EXTENSION = {
+    "DE": '["Nur anwesende Charaktere, die NICHT unter SPRECHENDE FIGUREN stehen (sonst [])"]',
+    "EN": '["Only present characters NOT listed under SPEAKING CHARACTERS (otherwise [])"]',
+}
+
+
 class OpenRouterClient:
     """Client for OpenRouter AI API"""
     
-    def __init__(self):
+    def __init__(self, usage: Optional[UsageMeter] = None, flights: Optional[SingleFlight] = None):
+        # Records the tokens and cost OpenRouter reports for every call
+        self.usage = usage
+        # Coalesces identical requests of concurrent jobs (shared per process)
+        self.flights = flights or default_singleflight()
         self.api_key = os.getenv("OPENROUTER_API_KEY")
         self.base_url = "https://openrouter.ai/api/v1"
         
@@ -32,7 +95,10 @@ class OpenRouterClient:
         model: str,
         scene_number: int = 1,
         total_scenes: int = 1,
-        retry_count: int = 3
+        retry_count: int = 3,
+        known_fields: Optional[Dict[str, str]] = None,
+        speakers: Optional[List[str]] = None,
+        part: Optional[Tuple[int, int]] = None
     ) -> Dict:
         """
         Analyze a single scene using AI
@@ -43,6 +109,12 @@ class OpenRouterClient:
             language: Output language (DE or EN)
             model: Model identifier
             retry_count: Number of retries on failure
+            known_fields: Fields the parser already resolved; they are not
+                requested from the model
+            speakers: Characters with a cue in the scene; the model only
+                adds the characters present without speaking
+            part: (chunk number, chunk count) when scene_text is one chunk
+                of a long scene
         
         Returns:
             Dict with analyzed scene data
@@ -52,19 +124,14 @@ class OpenRouterClient:
         # Calculate scene position percentage
         position_pct = int((scene_number / total_scenes) * 100) if total_scenes > 0 else 0
         
-        prompt = self._build_prompt(scene_text, mode, language, scene_number, total_scenes, position_pct)
+        prompt = self._build_prompt(
+            scene_text, mode, language, scene_number, total_scenes, position_pct, known_fields, speakers, part
+        )
         
         for attempt in range(retry_count):
             try:
-                response = requests.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                        "HTTP-Referer": "https://scene-analyzer.local",
-                        "X-Title": "Scene Analyzer"
-                    },
-                    json={
+                result = self._post(
+                    {
                         "model": model_id,
                         "messages": [
                             {
@@ -77,14 +144,12 @@ class OpenRouterClient:
                             }
                         ],
                         "temperature": 0.3,
-                        "max_tokens": 1000
+                        "max_tokens": 1000,
+                        "usage": {"include": True}
                     },
                     timeout=30
                 )
                 
-                response.raise_for_status()
-                result = response.json()
-                
                 # Extract content from response
                 content = result['choices'][0]['message']['content']
                 
@@ -93,7 +158,7 @@ class OpenRouterClient:
                 
                 return parsed_data
             
-            except requests.exceptions.RequestException as e:
+            except (APIRequestError, SharedFlightError) as e:
                 if attempt == retry_count - 1:
                     raise Exception(f"API request failed after {retry_count} attempts: {str(e)}")
                 time.sleep(2 ** attempt)  # Exponential backoff
@@ -103,71 +168,118 @@ class OpenRouterClient:
                     raise Exception(f"Failed to parse API response: {str(e)}")
                 time.sleep(1)
     
-    def _build_prompt(self, scene: str, mode: str, language: str, scene_number: int = 1, total_scenes: int = 1, position_pct: int = 0) -> str:
-        """Build analysis prompt based on mode and language"""
+    def _post(self, payload: Dict, timeout: int) -> Dict:
+        """
+        POST a chat completion and return the response JSON. Identical
+        requests in flight at the same time share one call.
+        """
+        # Imported on the first call rather than at startup
+        import requests
+        
+        def call() -> Dict:
+            try:
+                response = requests.post(
+                    f"{self.base_url}/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json",
+                        "HTTP-Referer": "https://scene-analyzer.local",
+                        "X-Title": "Scene Analyzer"
+                    },
+                    json=payload,
+                    timeout=timeout
+                )
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.RequestException as e:
+                raise APIRequestError(str(e)) from e
+        
+        result, shared = self.flights.do(request_fingerprint(payload), call)
+        self._record_usage(payload["model"], result, shared)
+        return result
+    
+    def _record_usage(self, model_id: str, result: Dict, shared: bool = False):
+        if self.usage is not None:
+            if shared:
+                # Paid for by the request this one was coalesced with
+                self.usage.record_shared(model_id)
+            else:
+                self.usage.record(model_id, result.get("usage"))
+    
+    def _build_prompt(
+        self,
+        scene: str,
+        mode: str,
+        language: str,
+        scene_number: int = 1,
+        total_scenes: int = 1,
+        position_pct: int = 0,
+        known_fields: Optional[Dict[str, str]] = None,
+        speakers: Optional[List[str]] = None,
+        part: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """
+        Build analysis prompt based on mode and language
+        
+        Fields in `known_fields` (already resolved by the parser) are left
+        out of the requested JSON and only given as context. With
+        `speakers`, on_stage only asks for the characters not in that list.
+        Scene text over MAX_SCENE_CHARS is cut off; long scenes are sent
+        in chunks (`part`) instead.
+        """
+        known_fields = known_fields or {}
+        lang = language if language == "DE" else "EN"
+        
+        fields = SCENE_FIELDS[lang]
+        if mode in ["tatort", "combined"]:
+            fields = fields + TATORT_FIELDS[lang]
+        
+        # Story mode fields are handled separately via post-analysis
+        # This avoids inconsistent scene-by-scene story structure analysis
+        
+        schema = ",\n".join(
+            f'  "{name}": {ON_STAGE_EXTENSION[lang] if name == "on_stage" and speakers else spec}'
+            for name, spec in fields if name not in known_fields
+        )
         
         if language == "DE":
+            context = []
+            if known_fields:
+                context.append(f"BEKANNT AUS DEM SZENENKOPF: {', '.join(known_fields.values())}")
+            if speakers:
+                context.append(f"SPRECHENDE FIGUREN: {', '.join(speakers)}")
+            if part:
+                context.append(f"AUSSCHNITT {part[0]} VON {part[1]} DER SZENE (nur diesen Teil analysieren)")
+            known = "\n" + "\n".join(context) + "\n" if context else ""
             base_prompt = f"""Analysiere diese Szene und gib die Informationen als JSON zurück.
-
+{known}
 SZENE:
-{scene[:2000]}  
+{scene[:MAX_SCENE_CHARS]}  
 
 AUSGABE (als reines JSON, ohne Markdown):
 {{
-  "location": "Konkreter Schauplatz aus dem Text (z.B. 'Wohnzimmer', 'Polizeirevier', 'Park')",
-  "time_of_day": "WICHTIG: Bestimme die Tageszeit aus JEGLICHEN Hinweisen im Text - explizit (z.B. 'Morgen', 'Abends', '15 Uhr') ODER implizit (z.B. Sonnenaufgang=Morgen, Dunkelheit=Nacht, Mittagspause=Mittag, Kinder in der Schule=Vormittag, Feierabend=Abend, Sterne/Mond=Nacht, helles Tageslicht=Tag). Nur wenn GAR KEIN Hinweis vorhanden: 'Unbekannt'. Wähle aus: Morgen|Vormittag|Mittag|Nachmittag|Abend|Nacht|Dämmerung|Unbekannt",
-  "int_ext": "INT|EXT|UNBEKANNT (Innenraum oder Außenbereich)",
-  "story_event": "Eine prägnante Zusammenfassung in einem Satz - WAS passiert?",
-  "subtext": "Emotionale/unterschwellige Ebene in 5-10 Wörtern - was wird NICHT gesagt?",
-  "turning_point_type": "Action|Revelation|Decision|Realization|None",
-  "turning_point_moment": "Der genaue Moment/Satz wo der Wendepunkt passiert (z.B. 'Als sie die Tür öffnet und die Leiche sieht') oder 'Keiner'",
-  "on_stage": ["Charakter1", "Charakter2"],
-  "off_stage": ["Erwähnter aber nicht anwesender Charakter"],
-  "protagonist_mood": "Stimmung des Hauptcharakters (Wütend|Verzweifelt|Hoffnungsvoll|Erschöpft|Triumphierend|Verwirrt|Entschlossen|Neutral)"
+{schema}
 }}"""
         else:  # EN
+            context = []
+            if known_fields:
+                context.append(f"KNOWN FROM THE SCENE HEADING: {', '.join(known_fields.values())}")
+            if speakers:
+                context.append(f"SPEAKING CHARACTERS: {', '.join(speakers)}")
+            if part:
+                context.append(f"PART {part[0]} OF {part[1]} OF THE SCENE (analyze this part only)")
+            known = "\n" + "\n".join(context) + "\n" if context else ""
             base_prompt = f"""Analyze this scene and return the information as JSON.
-
+{known}
 SCENE:
-{scene[:2000]}
+{scene[:MAX_SCENE_CHARS]}
 
 OUTPUT (as pure JSON, no markdown):
 {{
-  "location": "Specific location from context (e.g. 'Living room', 'Police station', 'Park')",
-  "time_of_day": "IMPORTANT: Determine time of day from ANY clues in the text - explicit (e.g. 'Morning', 'Evening', '3 PM') OR implicit (e.g. sunrise=Morning, darkness=Night, lunch break=Noon, kids at school=Morning, rush hour=Evening, stars/moon=Night, bright daylight=Day). Only if NO clues exist: 'Unknown'. Choose from: Morning|Noon|Afternoon|Evening|Night|Dawn|Dusk|Unknown",
-  "int_ext": "INT|EXT|UNKNOWN (Interior or Exterior)",
-  "story_event": "A concise summary in one sentence - WHAT happens?",
-  "subtext": "Emotional/subtext layer in 5-10 words - what is NOT said?",
-  "turning_point_type": "Action|Revelation|Decision|Realization|None",
-  "turning_point_moment": "The exact moment/sentence where the turning point happens (e.g. 'When she opens the door and sees the body') or 'None'",
-  "on_stage": ["Character1", "Character2"],
-  "off_stage": ["Mentioned but not present character"],
-  "protagonist_mood": "Main character's mood (Angry|Desperate|Hopeful|Exhausted|Triumphant|Confused|Determined|Neutral)"
+{schema}
 }}"""
         
-        # Add mode-specific fields
-        if mode in ["tatort", "combined"]:
-            if language == "DE":
-                base_prompt += """,
-  "evidence": "Gefundene Beweismittel, Spuren oder wichtige Objekte (oder 'Keine')",
-  "information_flow": "Wahrheit (sagt die Wahrheit)|Lüge (lügt aktiv)|Teilgeständnis (halb wahr)|Verschweigen (lässt Info weg)|Irreführung (lenkt ab)",
-  "knowledge_gap": "Zuschauer weiß mehr als Figur|Figur weiß mehr als Zuschauer|Beide wissen gleich viel",
-  "redundancy": "Neue Info (erste Erwähnung)|Wiederholung (exakt gleich)|Variation (neue Perspektive auf bekannte Info)",
-  "suspect_status": "Liste von Charakteren mit Status: 'Name (Verdächtig - Grund)'|'Name (Alibi - Details)'|'Name (Neutral)' oder 'Keine Verdächtigen in dieser Szene'"
-"""
-            else:
-                base_prompt += """,
-  "evidence": "Found evidence, clues or important objects (or 'None')",
-  "information_flow": "Truth (tells truth)|Lie (actively lies)|Partial confession (half true)|Concealment (withholds info)|Misdirection (deflects)",
-  "knowledge_gap": "Viewer knows more than character|Character knows more than viewer|Both know equally",
-  "redundancy": "New info (first mention)|Repetition (exactly same)|Variation (new perspective on known info)",
-  "suspect_status": "List of characters with status: 'Name (Suspect - reason)'|'Name (Alibi - details)'|'Name (Neutral)' or 'No suspects in this scene'"
-"""
-        
-        # Story mode fields are handled separately via post-analysis
-        # This avoids inconsistent scene-by-scene story structure analysis
-        
-        base_prompt += "\n}\n\nWichtig: Antworte NUR mit dem JSON-Objekt, ohne zusätzlichen Text oder Markdown-Formatierung."
+        base_prompt += "\n\nWichtig: Antworte NUR mit dem JSON-Objekt, ohne zusätzlichen Text oder Markdown-Formatierung."
         
         return base_prompt
     
@@ -242,15 +354,8 @@ OUTPUT (as pure JSON, no markdown):
         model_id = self.models.get(model, self.models["gpt-4o-mini"])
         
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://scene-analyzer.local",
-                    "X-Title": "Scene Analyzer"
-                },
-                json={
+            result = self._post(
+                {
                     "model": model_id,
                     "messages": [
                         {
@@ -264,19 +369,17 @@ OUTPUT (as pure JSON, no markdown):
                     ],
                     "temperature": temperature,
                     "max_tokens": max_tokens,
-                    "response_format": {"type": "json_object"}  # Force JSON output if supported
+                    "response_format": {"type": "json_object"},  # Force JSON output if supported
+                    "usage": {"include": True}
                 },
                 timeout=60
             )
             
-            response.raise_for_status()
-            result = response.json()
-            
             # Extract content from response
             content = result['choices'][0]['message']['content']
             return content
             
-        except requests.exceptions.RequestException as e:
+        except (APIRequestError, SharedFlightError) as e:
             raise Exception(f"API request failed: {str(e)}")
         except (KeyError, json.JSONDecodeError) as e:
             raise Exception(f"Failed to parse API response: {str(e)}")
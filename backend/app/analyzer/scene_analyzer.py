@@ -1,6 +1,30 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, AsyncIterable
 import asyncio
 from .openrouter_client import OpenRouterClient
+from .chunks import split_scene, merge_chunk_results
+from .usage import BudgetExceeded
+from .cascade import (
+    CASCADE_MODEL, ESCALATE_LONG, ESCALATE_TURNING_POINT, EscalationBudget,
+    cascade_tiers, escalation_reason, is_long_scene
+)
+from models.records import compact_result
+from parsers.fields import normalize_int_ext, time_of_day_label
+from parsers.characters import CharacterRoster
+from jobs.store import JobStore
+import config
+
+# Token estimates per scene analysis
+SCENE_INPUT_TOKENS = 500
+SCENE_OUTPUT_TOKENS = 200
+
+# Price per model (USD per 1M input tokens, per 1M output tokens)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "claude-3-haiku": (0.25, 1.25),
+    "gemini-flash": (0.075, 0.30),
+    "llama-70b": (0.18, 0.18)
+}
 
 # Aronson Analysis Questions
 ARONSON_QUESTIONS_DE = [
@@ -33,86 +57,315 @@ ARONSON_QUESTIONS_EN = [
 class SceneAnalyzer:
     """Analyzes scenes using AI with token optimization"""
     
-    def __init__(self, client: OpenRouterClient, mode: str, language: str, model: str):
+    def __init__(
+        self,
+        client: OpenRouterClient,
+        mode: str,
+        language: str,
+        model: str,
+        characters: Optional[List[Dict]] = None,
+        max_cost: Optional[float] = None
+    ):
         self.client = client
         self.mode = mode
         self.language = language
         self.model = model
+        # Whole-script analyses (story structure, Aronson) are single calls;
+        # in the cascade they use the strongest model
+        self.script_model = cascade_tiers()[-1] if model == CASCADE_MODEL else model
+        self.escalations = EscalationBudget(config.CASCADE_ESCALATION_RATE)
+        # Character roster of the script (from the parser), used to spell
+        # the names returned by the AI consistently
+        self.roster = CharacterRoster.from_list(characters or [])
+        # Cost (USD, as reported by OpenRouter) at which the job is paused
+        self.max_cost = max_cost
+        # Scenes of the current run whose analysis failed (not checkpointed)
+        self.failed_scenes: List[Dict] = []
     
     async def analyze_all_scenes(
         self, 
         scenes: List[Dict], 
-        job_storage: Dict,
-        job_id: str
+        job_store: JobStore,
+        job_id: str,
+        done: Optional[Dict[int, Dict]] = None
     ) -> List[Dict]:
         """
         Analyze all scenes with progress updates
         
+        Each result is checkpointed in the job store as soon as it is done.
+        
         Args:
             scenes: List of scene dictionaries
-            job_storage: Reference to job storage for progress updates
+            job_store: Job store for progress updates and checkpoints
             job_id: Job identifier
+            done: Checkpointed results of an interrupted run (skipped)
         
         Returns:
             List of analyzed scene data
         """
         total = len(scenes)
         results = []
-        
-        # Always analyze ALL scenes
-        scenes_to_analyze = list(enumerate(scenes))
+        done = done or {}
         
         # Update job status
-        job_storage[job_id]["status"] = "analyzing"
-        job_storage[job_id]["total_scenes"] = len(scenes_to_analyze)
+        self.failed_scenes = []
+        job_store.update(job_id, status="analyzing", total_scenes=total, failed_scenes=[])
         
         # Analyze ALL scenes
-        for idx, (scene_num, scene) in enumerate(scenes_to_analyze):
-            try:
-                # Update progress
-                job_storage[job_id]["current_scene"] = idx + 1
-                job_storage[job_id]["progress"] = int((idx + 1) / len(scenes_to_analyze) * 100)
-                
-                # Call AI with position context
-                analysis = await asyncio.to_thread(
-                    self.client.analyze_scene,
-                    scene["text"],
-                    self.mode,
-                    self.language,
-                    self.model,
-                    scene_num + 1,  # scene_number (1-indexed)
-                    total  # total_scenes
-                )
-                
-                # Merge with scene metadata
-                # AI values override regex-detected values
-                result = {
-                    "number": scene_num + 1,
-                    "int_ext": analysis.get("int_ext", scene.get("int_ext", "UNKNOWN")),
-                    "location": analysis.get("location", scene.get("location", "UNKNOWN")),
-                    "time_of_day": analysis.get("time_of_day", scene.get("time_of_day", "UNKNOWN")),
-                    **analysis
-                }
-                
-                results.append(result)
-                
-            except Exception as e:
-                # Add error entry for this scene
-                results.append({
-                    "number": scene_num + 1,
-                    "int_ext": scene.get("int_ext", "UNKNOWN"),
-                    "location": scene.get("location", "UNKNOWN"),
-                    "time_of_day": scene.get("time_of_day", "UNKNOWN"),
-                    "story_event": f"Error: {str(e)}",
-                    "subtext": "Analysis failed",
-                    "turning_point": "None",
-                    "on_stage": [],
-                    "off_stage": [],
-                    "protagonist_mood": "Unknown"
-                })
+        for scene_num, scene in enumerate(scenes):
+            # Update progress
+            job_store.set_progress(job_id, scene_num + 1, total, int((scene_num + 1) / total * 100))
+            
+            if scene_num in done:
+                results.append(done[scene_num])
+            else:
+                results.append(await self._analyze_and_checkpoint(scene, scene_num, total, job_store, job_id))
+                self._track_usage(job_store, job_id)
         
         return results
     
+    async def analyze_scene_stream(
+        self,
+        scene_stream: AsyncIterable[Dict],
+        job_store: JobStore,
+        job_id: str,
+        done: Optional[Dict[int, Dict]] = None
+    ) -> List[Dict]:
+        """
+        Analyze scenes while the document is still being parsed
+        
+        Args:
+            scene_stream: SceneFeed yielding scenes as they are extracted
+            job_store: Job store for progress updates and checkpoints
+            job_id: Job identifier
+            done: Checkpointed results of an interrupted run (skipped)
+        
+        Returns:
+            List of analyzed scene data
+        """
+        results = []
+        done = done or {}
+        self.failed_scenes = []
+        job_store.update(job_id, status="analyzing", failed_scenes=[])
+        
+        async for scene in scene_stream:
+            scene_num = len(results)
+            # Totals are only final once the stream has ended
+            known = scene_stream.total or len(scene_stream.scenes)
+            progress = int((scene_num + 1) / known * 100)
+            job_store.set_progress(
+                job_id, scene_num + 1, known,
+                progress if scene_stream.done else min(progress, 99)
+            )
+            
+            if scene_num in done:
+                results.append(done[scene_num])
+            else:
+                results.append(await self._analyze_and_checkpoint(scene, scene_num, known, job_store, job_id))
+                self._track_usage(job_store, job_id)
+        
+        job_store.update(job_id, total_scenes=len(results))
+        return results
+    
+    def _track_usage(self, job_store: JobStore, job_id: str):
+        """Store the usage so far and stop once the budget is used up"""
+        if self.client.usage is None:
+            return
+        job_store.update(job_id, usage=self.client.usage.summary())
+        self.check_budget()
+    
+    def check_budget(self):
+        """Raise BudgetExceeded if the recorded cost has reached max_cost"""
+        usage = self.client.usage
+        if self.max_cost is not None and usage is not None and usage.cost >= self.max_cost:
+            raise BudgetExceeded(usage.cost, self.max_cost)
+    
+    async def _analyze_and_checkpoint(
+        self,
+        scene: Dict,
+        scene_num: int,
+        total: int,
+        job_store: JobStore,
+        job_id: str
+    ) -> Dict:
+        """
+        Analyze a scene and checkpoint the result
+
+        Failed scenes are not checkpointed (they are retried on resume); they
+        are listed in the job's failed_scenes so event clients can show them.
+        """
+        try:
+            result = await self._analyze_scene(scene, scene_num, total)
+        except Exception as e:
+            self.failed_scenes.append({
+                "number": scene_num + 1,
+                "location": scene.get("location", "UNKNOWN"),
+                "error": str(e)
+            })
+            job_store.update(job_id, failed_scenes=list(self.failed_scenes))
+            return self._failed_scene_result(scene, scene_num, e)
+        
+        job_store.save_scene_result(job_id, scene_num, result)
+        return result
+    
+    async def _analyze_scene(self, scene: Dict, scene_num: int, total: int) -> Dict:
+        """Analyze a single scene and merge the AI output with the scene metadata"""
+        known = self._resolved_fields(scene)
+        speakers = scene.get("speakers") or []
+        
+        # Call AI with position context
+        if self.model == CASCADE_MODEL:
+            analysis = await self._analyze_cascade(scene, scene_num, total, known, speakers)
+        else:
+            analysis = await self._analyze_text(scene["text"], self.model, scene_num, total, known, speakers)
+        
+        # Merge with scene metadata
+        # AI values override regex-detected values, except for the fields
+        # the parser resolved with high confidence (not asked from the AI)
+        result = {
+            "number": scene_num + 1,
+            "int_ext": analysis.get("int_ext", scene.get("int_ext", "UNKNOWN")),
+            "location": analysis.get("location", scene.get("location", "UNKNOWN")),
+            "time_of_day": analysis.get("time_of_day", scene.get("time_of_day", "UNKNOWN")),
+            **analysis,
+            **known
+        }
+        
+        # Speakers come from the character cues; the AI only adds the
+        # characters present without a line
+        result["on_stage"] = self.roster.resolve(speakers + result["on_stage"])
+        result["off_stage"] = [
+            name for name in self.roster.resolve(result["off_stage"]) if name not in result["on_stage"]
+        ]
+        
+        return compact_result(result)
+    
+    async def _analyze_text(
+        self,
+        text: str,
+        model: str,
+        scene_num: int,
+        total: int,
+        known: Dict[str, str],
+        speakers: List[str]
+    ) -> Dict:
+        """
+        Analyze scene text with one model
+        
+        Long scenes are split into overlapping chunks that are analyzed
+        concurrently and merged, so no part of the scene is cut off and
+        the latency stays close to that of a single call. If any chunk
+        fails the scene fails, so it is not checkpointed with part of its
+        text missing and a resume analyzes it again.
+        """
+        chunks = split_scene(text)
+        analyses = await asyncio.gather(*(
+            asyncio.to_thread(
+                self.client.analyze_scene,
+                chunk,
+                self.mode,
+                self.language,
+                model,
+                scene_num + 1,  # scene_number (1-indexed)
+                total,  # total_scenes
+                known_fields=known,
+                speakers=speakers,
+                part=(i + 1, len(chunks)) if len(chunks) > 1 else None
+            )
+            for i, chunk in enumerate(chunks)
+        ), return_exceptions=True)
+        
+        # All chunks are awaited before raising, so no call is left running
+        for analysis in analyses:
+            if isinstance(analysis, BaseException):
+                raise analysis
+        return merge_chunk_results(analyses)
+    
+    async def _analyze_cascade(
+        self,
+        scene: Dict,
+        scene_num: int,
+        total: int,
+        known: Dict[str, str],
+        speakers: List[str]
+    ) -> Dict:
+        """
+        Analyze a scene with the cheapest model that gives a good answer.
+        
+        Each tier's answer is checked; failed or weak answers go to the
+        next tier, and so do scenes with a turning point while the
+        escalation budget allows. Long scenes skip to the last tier.
+        The row records the tier that produced it (`model_tier`) and why
+        it was escalated (`escalated_for`).
+        """
+        tiers = cascade_tiers()
+        reason = None
+        if is_long_scene(scene["text"]):
+            tiers = tiers[-1:]
+            reason = ESCALATE_LONG
+        escalated = reason is not None
+        
+        best = None
+        for tier, model in enumerate(tiers):
+            try:
+                analysis = await self._analyze_text(scene["text"], model, scene_num, total, known, speakers)
+            except Exception:
+                # The last tier's error is the scene's error if nothing worked
+                if best is None and tier == len(tiers) - 1:
+                    raise
+                analysis = None
+            
+            if analysis is not None:
+                best = {**analysis, "model_tier": model, "escalated_for": reason}
+            
+            if tier < len(tiers) - 1:
+                reason = escalation_reason(analysis)
+                if reason == ESCALATE_TURNING_POINT and not self.escalations.allows():
+                    reason = None
+                if reason is None:
+                    break
+                escalated = True
+        
+        self.escalations.record(escalated)
+        return best
+    
+    def _resolved_fields(self, scene: Dict) -> Dict[str, str]:
+        """
+        Heading fields the parser is confident about, normalized to the
+        values the AI would return (treatment scenes have no confidence)
+        """
+        confidence = scene.get("confidence") or {}
+        threshold = config.PARSER_CONFIDENCE_THRESHOLD
+        resolved = {}
+        
+        if confidence.get("int_ext", 0) >= threshold:
+            int_ext = normalize_int_ext(scene.get("int_ext"))
+            if int_ext:
+                resolved["int_ext"] = int_ext
+        if confidence.get("location", 0) >= threshold and scene.get("location"):
+            resolved["location"] = scene["location"]
+        if confidence.get("time_of_day", 0) >= threshold:
+            time_of_day = time_of_day_label(scene.get("time_of_day"), self.language)
+            if time_of_day:
+                resolved["time_of_day"] = time_of_day
+        
+        return resolved
+    
+    def _failed_scene_result(self, scene: Dict, scene_num: int, error: Exception) -> Dict:
+        """Error entry for a scene whose analysis failed"""
+        return {
+            "number": scene_num + 1,
+            "int_ext": scene.get("int_ext", "UNKNOWN"),
+            "location": scene.get("location", "UNKNOWN"),
+            "time_of_day": scene.get("time_of_day", "UNKNOWN"),
+            "story_event": f"Error: {str(error)}",
+            "subtext": "Analysis failed",
+            "turning_point": "None",
+            "on_stage": [],
+            "off_stage": [],
+            "protagonist_mood": "Unknown"
+        }
+    
     async def analyze_story_structure(
         self,
         analysis_results: List[Dict]
@@ -181,7 +434,7 @@ Analyze in {prompt_language}. Return ONLY the JSON.
             response = await asyncio.to_thread(
                 self.client.call_api,
                 prompt,
-                self.model,
+                self.script_model,
                 max_tokens=4000,
                 temperature=0.2
             )
@@ -282,7 +535,7 @@ Questions:
             response = await asyncio.to_thread(
                 self.client.call_api,
                 prompt,
-                self.model,
+                self.script_model,
                 max_tokens=2000
             )
             
@@ -352,24 +605,24 @@ Questions:
         - Input: ~500 tokens per scene
         - Output: ~200 tokens per scene
         - gpt-4o-mini: ~$0.15 per 1M input, ~$0.60 per 1M output
+        
+        In the cascade every scene is priced at the first tier, plus the
+        expected share of escalated scenes at each further tier.
         """
-        # Analyze ALL scenes
-        actual_scenes = scene_count
-        
-        # Token estimates
-        input_tokens = actual_scenes * 500
-        output_tokens = actual_scenes * 200
-        
-        # Cost per model (USD)
-        costs = {
-            "gpt-4o-mini": (input_tokens * 0.15 / 1_000_000) + (output_tokens * 0.60 / 1_000_000),
-            "gpt-4o": (input_tokens * 2.50 / 1_000_000) + (output_tokens * 10.00 / 1_000_000),
-            "claude-3-haiku": (input_tokens * 0.25 / 1_000_000) + (output_tokens * 1.25 / 1_000_000),
-            "gemini-flash": (input_tokens * 0.075 / 1_000_000) + (output_tokens * 0.30 / 1_000_000),
-            "llama-70b": (input_tokens * 0.18 / 1_000_000) + (output_tokens * 0.18 / 1_000_000)
-        }
+        if self.model == CASCADE_MODEL:
+            rate = config.CASCADE_ESCALATION_RATE
+            cost_usd = sum(
+                self._scene_cost_usd(model) * scene_count * rate ** tier
+                for tier, model in enumerate(cascade_tiers())
+            )
+        else:
+            cost_usd = self._scene_cost_usd(self.model) * scene_count
         
-        cost_usd = costs.get(self.model, costs["gpt-4o-mini"])
         cost_eur = cost_usd * 1.08  # Rough USD to EUR conversion
         
         return round(cost_eur, 3)
+    
+    def _scene_cost_usd(self, model: str) -> float:
+        """Estimated cost of analyzing one scene with a model (USD)"""
+        input_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES["gpt-4o-mini"])
+        return (SCENE_INPUT_TOKENS * input_price + SCENE_OUTPUT_TOKENS * output_price) / 1_000_000
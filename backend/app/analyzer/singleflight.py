@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Callable, Dict, Optional, Tuple
+import config
+
+
+# Payload fields that decide the answer (headers and the usage flag don't)
+FINGERPRINT_FIELDS = ("model", "messages", "temperature", "max_tokens", "response_format")
+
+
+class SharedFlightError(Exception):
+    """Error of an identical request made by another worker process"""
+
+
+def request_fingerprint(payload: Dict) -> str:
+    """Key of a chat completion request: hash of the fields that decide the answer"""
+    fields = {field: payload[field] for field in FINGERPRINT_FIELDS if field in payload}
+    canonical = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """One in-flight request and the threads waiting for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical API requests that are in flight at the same time.
+
+    The first caller of a key makes the request; callers arriving while it
+    runs wait and share its response, or its error. Nothing is kept once
+    the request has finished, so this is not a cache.
+
+    With `path` set (the SQLite job store), worker processes coordinate
+    through a `flights` table: one process claims the key, the others poll
+    for the response it stores. A claim older than `timeout` seconds is
+    taken over, so a crashed worker doesn't block its waiters.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        timeout: float = 120,
+        poll_interval: float = 0.2,
+        keep_seconds: float = 300
+    ):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # Finished rows are kept a while for waiters still polling
+        self.keep_seconds = keep_seconds
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        # Requests made, and requests answered by one in flight in this
+        # process or in another worker
+        self._counters = {"calls": 0, "coalesced": 0, "shared_coalesced": 0}
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with closing(self._connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS flights (
+                        key TEXT PRIMARY KEY,
+                        owner TEXT NOT NULL,
+                        started_at REAL NOT NULL,
+                        finished_at REAL,
+                        response TEXT,
+                        error TEXT
+                    )"""
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def do(self, key: str, fn: Callable[[], Dict]) -> Tuple[Dict, bool]:
+        """
+        Run `fn` once for all concurrent callers of `key`.
+
+        Returns (response, shared); `shared` is True when the response came
+        from another caller's request. The leader's exception is raised in
+        every waiting thread.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            if self.path:
+                call.result, shared = self._do_shared(key, fn)
+            else:
+                with self._lock:
+                    self._counters["calls"] += 1
+                call.result, shared = fn(), False
+            return call.result, shared
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _do_shared(self, key: str, fn: Callable[[], Dict]) -> Tuple[Dict, bool]:
+        """Lead the request for all workers, or wait for the worker leading it"""
+        owner = uuid.uuid4().hex
+        while True:
+            if self._claim(key, owner):
+                with self._lock:
+                    self._counters["calls"] += 1
+                return self._lead(key, owner, fn), False
+
+            with self._lock:
+                self._counters["shared_coalesced"] += 1
+            outcome = self._wait(key)
+            if outcome is not None:
+                response, error = outcome
+                if error is not None:
+                    raise SharedFlightError(error)
+                return response, True
+            # The leading worker stopped without an answer: claim the key
+
+    def _claim(self, key: str, owner: str) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                """INSERT INTO flights (key, owner, started_at) VALUES (?, ?, ?)
+                   ON CONFLICT(key) DO UPDATE SET
+                       owner = excluded.owner, started_at = excluded.started_at,
+                       finished_at = NULL, response = NULL, error = NULL
+                   WHERE flights.finished_at IS NOT NULL OR flights.started_at < ?""",
+                (key, owner, now, now - self.timeout)
+            )
+            return cursor.rowcount == 1
+
+    def _lead(self, key: str, owner: str, fn: Callable[[], Dict]) -> Dict:
+        response = error = None
+        try:
+            response = fn()
+            return response
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            now = time.time()
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    """UPDATE flights SET finished_at = ?, response = ?, error = ?
+                       WHERE key = ? AND owner = ?""",
+                    (now, json.dumps(response) if response is not None else None,
+                     error if response is None else None, key, owner)
+                )
+                conn.execute(
+                    "DELETE FROM flights WHERE finished_at < ?",
+                    (now - self.keep_seconds,)
+                )
+
+    def _wait(self, key: str) -> Optional[Tuple[Optional[Dict], Optional[str]]]:
+        """
+        Poll until the request for `key` finishes: (response, error), or
+        None when its claim went stale
+        """
+        while True:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT started_at, finished_at, response, error FROM flights WHERE key = ?",
+                    (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            started_at, finished_at, response, error = row
+            if finished_at is not None:
+                if response is None and error is None:
+                    return None
+                return (json.loads(response) if response is not None else None), error
+            if started_at < time.time() - self.timeout:
+                return None
+            time.sleep(self.poll_interval)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), **self._counters}
+
+
+_default: Optional[SingleFlight] = None
+_default_lock = threading.Lock()
+
+
+def default_singleflight() -> SingleFlight:
+    """
+    Process-wide SingleFlight; shared across workers when the job store is
+    the SQLite file they all use
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            path = config.JOB_STORE_PATH if config.JOB_STORE == "sqlite" else None
+            _default = SingleFlight(path, timeout=config.SINGLEFLIGHT_TIMEOUT)
+        return _default
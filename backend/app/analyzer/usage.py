@@ -0,0 +1,83 @@
+import threading
+from typing import Dict, Optional
+
+
+# Counters recorded per API call; "shared_calls" are answered by an
+# identical request in flight (no tokens or cost of their own)
+USAGE_FIELDS = ("calls", "shared_calls", "prompt_tokens", "completion_tokens", "cached_tokens", "cost")
+
+
+class BudgetExceeded(Exception):
+    """Raised when a job's recorded cost has reached its max_cost"""
+
+    def __init__(self, cost: float, max_cost: float):
+        super().__init__(f"Budget reached: cost ${cost:.4f} of max ${max_cost:.4f}")
+        self.cost = cost
+        self.max_cost = max_cost
+
+
+def _empty() -> Dict:
+    return {field: 0 for field in USAGE_FIELDS}
+
+
+class UsageMeter:
+    """
+    Token usage and cost reported by OpenRouter, per job and per model.
+
+    `cost` is the provider-reported cost (USD credits). The client records
+    every call; chunks of a scene are analyzed in threads, so updates are
+    locked.
+    """
+
+    def __init__(self):
+        self.total = _empty()
+        self.by_model: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_summary(cls, summary: Optional[Dict]) -> "UsageMeter":
+        """Continue counting from a stored summary (resumed or paused jobs)"""
+        meter = cls()
+        if summary:
+            meter.total.update({field: summary.get(field, 0) for field in USAGE_FIELDS})
+            for model, usage in (summary.get("by_model") or {}).items():
+                meter.by_model[model] = {field: usage.get(field, 0) for field in USAGE_FIELDS}
+        return meter
+
+    def record(self, model: str, usage: Optional[Dict]):
+        """Add the `usage` block of one chat completion response"""
+        usage = usage or {}
+        details = usage.get("prompt_tokens_details") or {}
+        call = {
+            "calls": 1,
+            "prompt_tokens": usage.get("prompt_tokens") or 0,
+            "completion_tokens": usage.get("completion_tokens") or 0,
+            "cached_tokens": details.get("cached_tokens") or 0,
+            "cost": float(usage.get("cost") or 0),
+        }
+        with self._lock:
+            per_model = self.by_model.setdefault(model, _empty())
+            for field, value in call.items():
+                self.total[field] += value
+                per_model[field] += value
+
+    def record_shared(self, model: str):
+        """Count a call answered by an identical request made for another caller"""
+        with self._lock:
+            self.total["shared_calls"] += 1
+            self.by_model.setdefault(model, _empty())["shared_calls"] += 1
+
+    @property
+    def cost(self) -> float:
+        return self.total["cost"]
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                **self.total,
+                "cost": round(self.total["cost"], 6),
+                "by_model": {
+                    model: {**usage, "cost": round(usage["cost"], 6)}
+                    for model, usage in self.by_model.items()
+                }
+            }
@@ -0,0 +1,93 @@
+"""Runtime configuration read from environment variables"""
+import os
+
+
+# Directory for local state shared by all workers (caches, job data)
+DATA_DIR = os.getenv("DATA_DIR", "/tmp/scene-analyzer")
+
+# Parse result cache (content hash -> extracted text, scenes, language)
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", os.path.join(DATA_DIR, "parse_cache.sqlite3"))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# Job storage: "sqlite" (shared by all workers, survives restarts) or "memory"
+JOB_STORE = os.getenv("JOB_STORE", "sqlite")
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+
+# Job lifetime per status in hours; "default" covers parsing and running jobs
+JOB_TTL_HOURS = {
+    "uploaded": float(os.getenv("JOB_TTL_UPLOADED_HOURS", "24")),
+    "completed": float(os.getenv("JOB_TTL_COMPLETED_HOURS", "168")),
+    "error": float(os.getenv("JOB_TTL_ERROR_HOURS", "24")),
+    "default": float(os.getenv("JOB_TTL_ACTIVE_HOURS", "48")),
+}
+# Batches live as long as their episodes
+JOB_TTL_HOURS["batch_uploaded"] = JOB_TTL_HOURS["uploaded"]
+JOB_TTL_HOURS["batch_completed"] = JOB_TTL_HOURS["completed"]
+# Jobs paused at their max_cost keep their partial results like completed jobs
+JOB_TTL_HOURS["paused"] = JOB_TTL_HOURS["completed"]
+
+# Memory store: payload budget before cold jobs are spilled to disk
+JOB_MEMORY_BUDGET_BYTES = int(os.getenv("JOB_MEMORY_BUDGET_MB", "512")) * 1024 * 1024
+JOB_SPILL_DIR = os.getenv("JOB_SPILL_DIR", os.path.join(DATA_DIR, "spill"))
+
+# Seconds between sweeps for expired jobs
+JOB_SWEEP_INTERVAL = int(os.getenv("JOB_SWEEP_INTERVAL", "300"))
+
+# Running jobs refresh their heartbeat every JOB_HEARTBEAT_INTERVAL seconds;
+# jobs without one for JOB_STALE_SECONDS are resumed by another worker
+JOB_HEARTBEAT_INTERVAL = int(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "120"))
+
+# Seconds a streaming upload parsed by another worker may go without
+# publishing a scene before its parsing counts as interrupted
+PARSE_TIMEOUT = int(os.getenv("PARSE_TIMEOUT", "600"))
+
+# Where analysis jobs run: "background" (FastAPI background tasks in the web
+# process) or "queue" (enqueued for `python worker.py` processes)
+ANALYSIS_EXECUTOR = os.getenv("ANALYSIS_EXECUTOR", "background")
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(DATA_DIR, "queue.sqlite3"))
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "2"))
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Seconds between job store polls for the event streams of a job (one
+# poller per job and process); doubled up to EVENTS_MAX_POLL_INTERVAL
+# while the job does not change
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "0.5"))
+EVENTS_MAX_POLL_INTERVAL = float(os.getenv("EVENTS_MAX_POLL_INTERVAL", "5"))
+
+# Generated export files (Excel workbooks), kept as long as completed jobs
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", os.path.join(DATA_DIR, "artifacts"))
+
+# Batch uploads: files per batch, parser processes per worker, and episodes
+# analyzed at the same time per worker (shared by all running batches)
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "100"))
+# Total size of the scripts of one batch upload, after unpacking ZIP archives
+BATCH_MAX_TOTAL_BYTES = int(os.getenv("BATCH_MAX_TOTAL_MB", "500")) * 1024 * 1024
+BATCH_PARSE_PROCESSES = int(os.getenv("BATCH_PARSE_PROCESSES", str(min(4, os.cpu_count() or 1))))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "3"))
+
+# Full-text and facet index over completed results, shared by all workers
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(DATA_DIR, "search.sqlite3"))
+
+# Heading fields the parser resolved with at least this confidence are not
+# requested from the model (1.1 disables the routing)
+PARSER_CONFIDENCE_THRESHOLD = float(os.getenv("PARSER_CONFIDENCE_THRESHOLD", "0.9"))
+
+# Model cascade (model "cascade"): scenes go to the first model and are
+# analyzed again by the next one when the answer is not good enough
+# (an empty list falls back to the default tiers)
+DEFAULT_CASCADE_MODELS = ["gpt-4o-mini", "gpt-4o"]
+CASCADE_MODELS = [
+    m.strip() for m in os.getenv("CASCADE_MODELS", ",".join(DEFAULT_CASCADE_MODELS)).split(",") if m.strip()
+] or DEFAULT_CASCADE_MODELS
+# Scenes longer than this go to the strongest model directly
+CASCADE_LONG_SCENE_CHARS = int(os.getenv("CASCADE_LONG_SCENE_CHARS", "3000"))
+# Share of scenes expected to be escalated, for cost estimates; scenes are
+# escalated for a turning point only while the share stays below it
+CASCADE_ESCALATION_RATE = float(os.getenv("CASCADE_ESCALATION_RATE", "0.3"))
+
+# Identical API requests in flight at the same time share one call (across
+# workers with the SQLite job store); a leading call silent this many
+# seconds is taken over by a waiting one
+SINGLEFLIGHT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_TIMEOUT", "120"))
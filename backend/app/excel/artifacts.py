@@ -0,0 +1,129 @@
+import hashlib
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Tuple
+from jobs.store import JobStore
+from .exports import write_parquet
+from .generator import ExcelGenerator
+
+
+# Bump whenever the workbook layout changes so cached files are rebuilt
+EXCEL_VERSION = "4"
+
+
+class ArtifactCache:
+    """
+    Generated export files on disk, keyed by job and result version.
+
+    Files are written to a temporary name and renamed into place, so
+    concurrent builds (several workers, repeated clicks) never serve a
+    partially written file.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, job_id: str, version: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{job_id}-{version}.{extension}")
+
+    def get_or_build(self, job_id: str, version: str, extension: str, build: Callable[[str], None]) -> str:
+        """Return the cached file, building it with `build(path)` if missing"""
+        path = self.path(job_id, version, extension)
+        if os.path.exists(path):
+            return path
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            build(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return path
+
+    def sweep(self, max_age: float) -> int:
+        """Delete files older than max_age seconds (their jobs have expired)"""
+        cutoff = time.time() - max_age
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def result_version(job: Dict) -> str:
+    """Version of a job's results: changes whenever the job completes or pauses again"""
+    return f"{int((job.get('completed_at') or job.get('paused_at', 0)) * 1000)}-{EXCEL_VERSION}"
+
+
+def excel_artifact(job_store: JobStore, artifacts: ArtifactCache, job_id: str, job: Dict) -> Tuple[str, str]:
+    """Return (path, etag) of the job's workbook, generating it on first use"""
+    version = result_version(job)
+
+    def build(path: str):
+        generator = ExcelGenerator(language=job["output_language"], mode=job["mode"])
+        generator.generate_to_file(
+            analysis_data=job_store.get_results(job_id) or [],
+            filename=job["filename"],
+            output=path,
+            aronson_data=job_store.get_aronson(job_id),
+            usage=job.get("usage")
+        )
+
+    path = artifacts.get_or_build(job_id, version, "xlsx", build)
+    return path, export_etag(job_id, job, "xlsx")
+
+
+def parquet_artifact(job_store: JobStore, artifacts: ArtifactCache, job_id: str, job: Dict) -> Tuple[str, str]:
+    """Return (path, etag) of the job's Parquet export, generating it on first use"""
+    version = result_version(job)
+
+    def build(path: str):
+        generator = ExcelGenerator(language=job["output_language"], mode=job["mode"])
+        write_parquet(generator.columns(), generator.rows(job_store.get_results(job_id) or []), path)
+
+    path = artifacts.get_or_build(job_id, version, "parquet", build)
+    return path, export_etag(job_id, job, "parquet")
+
+
+def batch_artifact(job_store: JobStore, artifacts: ArtifactCache, batch_id: str, batch: Dict) -> Tuple[str, str]:
+    """Return (path, etag) of a batch's combined workbook, generating it on first use"""
+    jobs = [(job_id, job_store.get(job_id)) for job_id in batch["episodes"]]
+    jobs = [(job_id, job) for job_id, job in jobs if job is not None]
+    # Changes whenever any episode is analyzed again
+    versions = ",".join(f"{job_id}:{result_version(job)}" for job_id, job in jobs)
+    version = f"{hashlib.sha1(versions.encode()).hexdigest()[:16]}-{EXCEL_VERSION}"
+
+    def build(path: str):
+        # Imported here: the runner builds workbooks through this module
+        from jobs.runner import partial_results
+        
+        def results(job_id: str, job: Dict):
+            if job["status"] == "completed":
+                return job_store.get_results(job_id)
+            if job["status"] == "paused":
+                return partial_results(job_store, job_id, job)
+            return None
+        
+        generator = ExcelGenerator(language=batch["output_language"], mode=batch["mode"])
+        # Results are loaded one episode at a time while the sheets are written
+        episodes = ((job, results(job_id, job)) for job_id, job in jobs)
+        generator.generate_batch_to_file(episodes, path)
+
+    path = artifacts.get_or_build(batch_id, version, "xlsx", build)
+    return path, f'"{batch_id}-{version}"'
+
+
+def export_etag(job_id: str, job: Dict, output_format: str) -> str:
+    version = result_version(job)
+    if output_format == "xlsx":
+        return f'"{job_id}-{version}"'
+    return f'"{job_id}-{version}-{output_format}"'
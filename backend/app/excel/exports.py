@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator, List, Sequence
+from jobs.store import JobStore
+from .generator import ExcelGenerator
+
+
+# Export format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Rows encoded per chunk sent to the client (or per Parquet row group)
+CHUNK_ROWS = 1000
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Encode rows as CSV, a chunk of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Encode rows as JSON Lines objects keyed by column"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        if len(lines) == CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_chunks(output_format: str, columns: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Streamable text chunks for the csv and jsonl formats"""
+    if output_format == "csv":
+        return csv_chunks(columns, rows)
+    if output_format == "jsonl":
+        return jsonl_chunks(columns, rows)
+    raise ValueError(f"Format cannot be streamed: {output_format}")
+
+
+def write_parquet(columns: Sequence[str], rows: Iterable[Sequence], path: str) -> int:
+    """
+    Write rows to a Parquet file, one row group per CHUNK_ROWS rows.
+
+    Needs the optional pyarrow package. All columns are written as
+    strings (like the CSV), so the schema does not depend on the data.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export is not available: install pyarrow")
+
+    schema = pa.schema([(name, pa.string()) for name in columns])
+    written = 0
+
+    def to_batch(chunk: List[Sequence]):
+        arrays = [
+            pa.array([None if row[i] in (None, "") else str(row[i]) for row in chunk], type=pa.string())
+            for i in range(len(columns))
+        ]
+        return pa.record_batch(arrays, schema=schema)
+
+    with pq.ParquetWriter(path, schema) as writer:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == CHUNK_ROWS:
+                writer.write_batch(to_batch(chunk))
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            writer.write_batch(to_batch(chunk))
+            written += len(chunk)
+
+    return written
+
+
+def corpus_columns(generator: ExcelGenerator) -> List[str]:
+    file_header = "Datei" if generator.language == "DE" else "File"
+    return ["Job", file_header] + generator.columns()
+
+
+def corpus_rows(job_store: JobStore, generator: ExcelGenerator) -> Iterator[List]:
+    """
+    Rows of every completed job analyzed in the generator's mode, prefixed
+    with the job id and filename. Jobs are loaded one at a time.
+    """
+    for job_id in job_store.job_ids("completed"):
+        job = job_store.get(job_id)
+        if job is None or job["mode"] != generator.mode:
+            continue
+        for row in generator.rows(job_store.get_results(job_id) or []):
+            yield [job_id, job["filename"]] + row
@@ -1,10 +1,85 @@
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, List, Dict, Optional, Tuple, Union
 import io
+import os
+import re
 from datetime import datetime
 
+# openpyxl is imported when the first workbook is written, not at startup;
+# column definitions and the flat exports don't need it
+if TYPE_CHECKING:
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import NamedStyle
+
+
+def _named_styles() -> List["NamedStyle"]:
+    """Shared cell styles, registered once per workbook instead of per cell"""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+    
+    def _thin_border() -> Border:
+        side = Side(style='thin')
+        return Border(left=side, right=side, top=side, bottom=side)
+    
+    HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    ALTERNATE_FILL = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+    
+    return [
+        NamedStyle(
+            name="title",
+            font=Font(size=14, bold=True),
+            alignment=Alignment(horizontal="center", vertical="center")
+        ),
+        NamedStyle(
+            name="title_banner",
+            font=Font(size=14, bold=True, color="FFFFFF"),
+            fill=HEADER_FILL,
+            alignment=Alignment(horizontal="center", vertical="center")
+        ),
+        NamedStyle(
+            name="header",
+            font=Font(bold=True, color="FFFFFF"),
+            fill=HEADER_FILL,
+            alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+            border=_thin_border()
+        ),
+        NamedStyle(
+            name="data",
+            alignment=Alignment(vertical="top", wrap_text=True),
+            border=_thin_border()
+        ),
+        NamedStyle(
+            name="data_alt",
+            fill=ALTERNATE_FILL,
+            alignment=Alignment(vertical="top", wrap_text=True),
+            border=_thin_border()
+        ),
+        NamedStyle(
+            name="question",
+            font=Font(bold=True),
+            alignment=Alignment(vertical="top", wrap_text=True),
+            border=_thin_border()
+        ),
+        NamedStyle(
+            name="question_alt",
+            font=Font(bold=True),
+            fill=ALTERNATE_FILL,
+            alignment=Alignment(vertical="top", wrap_text=True),
+            border=_thin_border()
+        ),
+        NamedStyle(
+            name="number",
+            alignment=Alignment(horizontal="center", vertical="top"),
+            border=_thin_border()
+        ),
+        NamedStyle(
+            name="number_alt",
+            fill=ALTERNATE_FILL,
+            alignment=Alignment(horizontal="center", vertical="top"),
+            border=_thin_border()
+        ),
+        NamedStyle(name="label", font=Font(bold=True)),
+        NamedStyle(name="metadata_title", font=Font(size=12, bold=True)),
+    ]
+
 
 class ExcelGenerator:
     """Generates formatted Excel files from analysis results"""
@@ -12,81 +87,190 @@ class ExcelGenerator:
     def __init__(self, language: str, mode: str):
         self.language = language
         self.mode = mode
-        self.wb = Workbook()
+        self.wb = None
         self.aronson_data = None
+        self._cell_class = None
         
-    def generate(self, analysis_data: List[Dict], filename: str, aronson_data: Optional[List[Dict]] = None) -> bytes:
+    def generate(self, analysis_data: Iterable[Dict], filename: str, aronson_data: Optional[List[Dict]] = None) -> bytes:
         """
         Generate Excel file with formatted analysis results
         
         Args:
-            analysis_data: List of analyzed scene dictionaries
+            analysis_data: Analyzed scene dictionaries
             filename: Original filename for title
         
         Returns:
             Excel file as bytes
         """
-        ws = self.wb.active
-        ws.title = "Scene Analysis"
+        buffer = io.BytesIO()
+        self.generate_to_file(analysis_data, filename, buffer, aronson_data)
+        return buffer.getvalue()
+    
+    def generate_to_file(
+        self,
+        analysis_data: Iterable[Dict],
+        filename: str,
+        output: Union[str, BinaryIO],
+        aronson_data: Optional[List[Dict]] = None,
+        usage: Optional[Dict] = None
+    ) -> int:
+        """
+        Write the workbook to a file path or binary file object
+        
+        Uses a write-only workbook: rows are written one at a time from
+        `analysis_data` (any iterable) and not kept in memory, so large
+        exports stay memory-flat.
+        
+        Returns:
+            Number of scene rows written
+        """
+        self._new_workbook()
+        row_count = self._write_scene_sheet("Scene Analysis", f"Scene Analysis: {filename}", analysis_data)
+        
+        # Add Aronson sheet if story mode and data available
+        if "story" in self.mode and aronson_data:
+            self._add_aronson_sheet(aronson_data)
+        
+        # Add metadata sheet if story mode or the API usage is known
+        if "story" in self.mode or usage:
+            self._add_metadata_sheet(row_count, filename, usage)
+        
+        self.wb.save(output)
+        return row_count
+    
+    def generate_batch_to_file(
+        self,
+        episodes: Iterable[Tuple[Dict, Optional[Iterable[Dict]]]],
+        output: Union[str, BinaryIO]
+    ) -> int:
+        """
+        Write one workbook for a batch: a summary sheet plus one sheet per episode
+        
+        Args:
+            episodes: (job, results) per episode in batch order; results is
+                None for episodes whose analysis failed
+            output: File path or binary file object
+        
+        Returns:
+            Number of scene rows written over all episodes
+        """
+        self._new_workbook()
+        summary = self.wb.create_sheet("Summary" if self.language == "EN" else "Übersicht")
+        used_titles = {summary.title.lower()}
+        summary_rows = []
+        
+        for job, results in episodes:
+            if results is None:
+                summary_rows.append([None, job["filename"], job.get("status", "error"), 0, 0, 0])
+                continue
+            
+            title = self._sheet_title(job["filename"], used_titles)
+            stats = {"turning_points": 0, "characters": set()}
+            
+            def counted(scenes: Iterable[Dict]) -> Iterator[Dict]:
+                for scene in scenes:
+                    if scene.get("turning_point_type") not in (None, "", "None"):
+                        stats["turning_points"] += 1
+                    if isinstance(scene.get("on_stage"), list):
+                        stats["characters"].update(scene["on_stage"])
+                    yield scene
+            
+            row_count = self._write_scene_sheet(title, f"Scene Analysis: {job['filename']}", counted(results))
+            summary_rows.append([
+                title, job["filename"], job.get("status", "completed"),
+                row_count, stats["turning_points"], len(stats["characters"])
+            ])
+        
+        self._write_summary_sheet(summary, summary_rows)
+        self.wb.save(output)
+        return sum(row[3] for row in summary_rows)
+    
+    def _new_workbook(self):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        
+        self.wb = Workbook(write_only=True)
+        self._cell_class = WriteOnlyCell
+        for style in _named_styles():
+            self.wb.add_named_style(style)
+    
+    def _write_scene_sheet(self, title: str, heading: str, analysis_data: Iterable[Dict]) -> int:
+        """Write a scene analysis sheet, returns the number of scene rows"""
+        ws = self.wb.create_sheet(title)
+        headers = self._get_headers()
+        
+        # Column widths and panes must be set before the first row
+        self._adjust_column_widths(ws, headers)
+        ws.freeze_panes = "A3"
         
         # Add title row
-        ws.merge_cells('A1:K1')
-        title_cell = ws['A1']
-        title_cell.value = f"Scene Analysis: {filename}"
-        title_cell.font = Font(size=14, bold=True)
-        title_cell.alignment = Alignment(horizontal="center", vertical="center")
         ws.row_dimensions[1].height = 25
+        ws.append([self._cell(ws, heading, "title")])
         
         # Headers
-        headers = self._get_headers()
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=2, column=col, value=header)
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
+        ws.append([self._cell(ws, header, "header") for header in headers])
         
-        # Data rows
+        # Data rows (alternate row colors)
+        row_count = 0
         for row_idx, scene in enumerate(analysis_data, 3):
-            data = self._extract_data(scene)
-            for col_idx, value in enumerate(data, 1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.alignment = Alignment(vertical="top", wrap_text=True)
-                cell.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-                
-                # Alternate row colors
-                if row_idx % 2 == 0:
-                    cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-        
-        # Auto-adjust column widths
-        self._adjust_column_widths(ws, headers)
+            style = "data_alt" if row_idx % 2 == 0 else "data"
+            ws.append([self._cell(ws, value, style) for value in self._extract_data(scene)])
+            row_count += 1
         
-        # Freeze header rows
-        ws.freeze_panes = "A3"
+        return row_count
+    
+    def _write_summary_sheet(self, ws, rows: List[List]):
+        """Per-episode overview of a batch workbook"""
+        if self.language == "DE":
+            headers = ["Folge", "Datei", "Status", "Szenen", "Wendepunkte", "Figuren"]
+        else:
+            headers = ["Episode", "File", "Status", "Scenes", "Turning Points", "Characters"]
         
-        # Add Aronson sheet if story mode and data available
-        if "story" in self.mode and aronson_data:
-            self._add_aronson_sheet(aronson_data)
+        from openpyxl.utils import get_column_letter
+        for col_idx, width in enumerate([30, 35, 12, 10, 16, 12], 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+        ws.freeze_panes = "A2"
         
-        # Add metadata sheet if story mode
-        if "story" in self.mode:
-            self._add_metadata_sheet(analysis_data, filename)
+        ws.append([self._cell(ws, header, "header") for header in headers])
+        for row_idx, row in enumerate(rows, 2):
+            suffix = "_alt" if row_idx % 2 == 1 else ""
+            ws.append(
+                [self._cell(ws, value, "data" + suffix) for value in row[:3]]
+                + [self._cell(ws, value, "number" + suffix) for value in row[3:]]
+            )
         
-        # Save to bytes
-        buffer = io.BytesIO()
-        self.wb.save(buffer)
-        buffer.seek(0)
-        return buffer.getvalue()
+        total = "Gesamt" if self.language == "DE" else "Total"
+        ws.append(
+            [self._cell(ws, total, "label"), None, None]
+            + [self._cell(ws, sum(row[col] for row in rows), "label") for col in (3, 4)]
+        )
+    
+    def _sheet_title(self, filename: str, used: set) -> str:
+        """Unique, valid sheet name (max 31 characters, no []:*?/\\) for a file"""
+        base = os.path.splitext(filename)[0]
+        base = re.sub(r"[\[\]:*?/\\]", "_", base).strip("' ") or "Episode"
+        title = base[:31]
+        counter = 2
+        while title.lower() in used:
+            suffix = f" ({counter})"
+            title = base[:31 - len(suffix)] + suffix
+            counter += 1
+        used.add(title.lower())
+        return title
+    
+    def _cell(self, ws, value, style: str) -> "WriteOnlyCell":
+        cell = self._cell_class(ws, value=value)
+        cell.style = style
+        return cell
+    
+    def columns(self) -> List[str]:
+        """Column headers shared by the workbook and the flat exports"""
+        return self._get_headers()
+    
+    def rows(self, analysis_data: Iterable[Dict]) -> Iterator[List]:
+        """Scene results as rows in the same order as `columns()`"""
+        for scene in analysis_data:
+            yield self._extract_data(scene)
     
     def _get_headers(self) -> List[str]:
         """Get column headers based on language and mode"""
@@ -191,109 +375,85 @@ class ExcelGenerator:
                 offset+3: 20    # Expected
             })
         
+        from openpyxl.utils import get_column_letter
         for col_idx, width in column_widths.items():
             if col_idx < len(headers):
                 ws.column_dimensions[get_column_letter(col_idx + 1)].width = width
     
     def _add_aronson_sheet(self, aronson_data: List[Dict]):
         """Add Aronson analysis sheet for story mode"""
-        ws = self.wb.create_sheet("Aronson Analysis", 1)  # Insert as second sheet
+        ws = self.wb.create_sheet("Aronson Analysis")
+        
+        # Column widths
+        ws.column_dimensions['A'].width = 5
+        ws.column_dimensions['B'].width = 60
+        ws.column_dimensions['C'].width = 80
+        
+        # Freeze header
+        ws.freeze_panes = "A3"
         
         # Title
-        ws.merge_cells('A1:C1')
-        title_cell = ws['A1']
-        title_text = "Aronson Single Path Analyse" if self.language == "DE" else "Aronson Single Path Analysis"
-        title_cell.value = title_text
-        title_cell.font = Font(size=14, bold=True)
-        title_cell.alignment = Alignment(horizontal="center", vertical="center")
         ws.row_dimensions[1].height = 30
-        title_cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        title_cell.font = Font(size=14, bold=True, color="FFFFFF")
+        title_text = "Aronson Single Path Analyse" if self.language == "DE" else "Aronson Single Path Analysis"
+        ws.append([self._cell(ws, title_text, "title_banner")])
         
         # Headers
         question_header = "Frage" if self.language == "DE" else "Question"
         answer_header = "Antwort" if self.language == "DE" else "Answer"
+        ws.append([self._cell(ws, value, "header") for value in ("#", question_header, answer_header)])
         
-        ws['A2'] = "#"
-        ws['B2'] = question_header
-        ws['C2'] = answer_header
-        
-        for col in ['A', 'B', 'C']:
-            cell = ws[f'{col}2']
-            cell.font = Font(bold=True, color="FFFFFF")
-            cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-        
-        # Data rows
+        # Data rows (alternate row colors)
         for idx, item in enumerate(aronson_data, 1):
-            row_num = idx + 2
-            
-            # Number
-            num_cell = ws[f'A{row_num}']
-            num_cell.value = idx
-            num_cell.alignment = Alignment(horizontal="center", vertical="top")
-            
-            # Question
-            question_cell = ws[f'B{row_num}']
-            question_cell.value = item.get("question", "")
-            question_cell.alignment = Alignment(vertical="top", wrap_text=True)
-            question_cell.font = Font(bold=True)
-            
-            # Answer
-            answer_cell = ws[f'C{row_num}']
-            answer_cell.value = item.get("answer", "")
-            answer_cell.alignment = Alignment(vertical="top", wrap_text=True)
-            
-            # Borders for all cells
-            for col in ['A', 'B', 'C']:
-                cell = ws[f'{col}{row_num}']
-                cell.border = Border(
-                    left=Side(style='thin'),
-                    right=Side(style='thin'),
-                    top=Side(style='thin'),
-                    bottom=Side(style='thin')
-                )
-                
-                # Alternate row colors
-                if row_num % 2 == 1:
-                    cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-        
-        # Column widths
-        ws.column_dimensions['A'].width = 5
-        ws.column_dimensions['B'].width = 60
-        ws.column_dimensions['C'].width = 80
-        
-        # Freeze header
-        ws.freeze_panes = "A3"
+            suffix = "_alt" if (idx + 2) % 2 == 1 else ""
+            ws.append([
+                self._cell(ws, idx, "number" + suffix),
+                self._cell(ws, item.get("question", ""), "question" + suffix),
+                self._cell(ws, item.get("answer", ""), "data" + suffix)
+            ])
     
-    def _add_metadata_sheet(self, analysis_data: List[Dict], filename: str):
-        """Add metadata sheet for story mode"""
+    def _add_metadata_sheet(self, total_scenes: int, filename: str, usage: Optional[Dict] = None):
+        """Add metadata sheet (analysis info and the tokens/cost per model)"""
         ws = self.wb.create_sheet("Metadata")
         
+        # Auto-width
+        ws.column_dimensions['A'].width = 20
+        ws.column_dimensions['B'].width = 40
+        for column in "CDEF":
+            ws.column_dimensions[column].width = 18
+        
         # Title
-        ws['A1'] = "Analysis Metadata"
-        ws['A1'].font = Font(size=12, bold=True)
+        ws.append([self._cell(ws, "Analysis Metadata", "metadata_title")])
+        ws.append([])
         
         # Info
         info = [
             ("Filename", filename),
             ("Date", datetime.now().strftime("%Y-%m-%d %H:%M")),
-            ("Total Scenes", len(analysis_data)),
+            ("Total Scenes", total_scenes),
             ("Mode", self.mode),
             ("Language", self.language)
         ]
         
-        for idx, (label, value) in enumerate(info, 3):
-            ws[f'A{idx}'] = label
-            ws[f'A{idx}'].font = Font(bold=True)
-            ws[f'B{idx}'] = value
+        for label, value in info:
+            ws.append([self._cell(ws, label, "label"), value])
         
-        # Auto-width
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 40
+        if not usage:
+            return
+        
+        ws.append([])
+        ws.append([self._cell(ws, "API Usage", "metadata_title")])
+        ws.append([
+            self._cell(ws, header, "header")
+            for header in ("Model", "Calls", "Shared Calls", "Prompt Tokens", "Cached Tokens", "Completion Tokens", "Cost (USD)")
+        ])
+        rows = list((usage.get("by_model") or {}).items()) + [("Total", usage)]
+        for model, counts in rows:
+            ws.append([
+                self._cell(ws, model, "label"),
+                counts.get("calls", 0),
+                counts.get("shared_calls", 0),
+                counts.get("prompt_tokens", 0),
+                counts.get("cached_tokens", 0),
+                counts.get("completion_tokens", 0),
+                round(counts.get("cost", 0), 6)
+            ])
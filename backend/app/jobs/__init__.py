@@ -0,0 +1,15 @@
+from .store import JobStore, MemoryJobStore, SQLiteJobStore
+import config
+
+
+def create_job_store() -> JobStore:
+    """Create the job store selected by the JOB_STORE setting"""
+    ttls = {status: hours * 3600 for status, hours in config.JOB_TTL_HOURS.items()}
+    if config.JOB_STORE == "memory":
+        return MemoryJobStore(ttls, config.JOB_MEMORY_BUDGET_BYTES, config.JOB_SPILL_DIR)
+    if config.JOB_STORE == "sqlite":
+        return SQLiteJobStore(config.JOB_STORE_PATH, ttls)
+    raise ValueError(f"Unsupported job store: {config.JOB_STORE}")
+
+
+__all__ = ['JobStore', 'MemoryJobStore', 'SQLiteJobStore', 'create_job_store']
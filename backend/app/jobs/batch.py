@@ -0,0 +1,79 @@
+import re
+from typing import Dict, List, Tuple
+from .store import JobStore
+
+
+# Batches are stored as job records with their own statuses, so the runner
+# and the single-file endpoints never pick them up
+BATCH_KIND = "batch"
+BATCH_UPLOADED = "batch_uploaded"
+BATCH_ANALYZING = "batch_analyzing"
+BATCH_COMPLETED = "batch_completed"
+
+# Episode statuses after which an episode does not change anymore (a
+# paused episode only continues when it is analyzed again)
+EPISODE_FINAL_STATUSES = ("completed", "error", "paused")
+
+
+def is_batch(job: Dict) -> bool:
+    return job.get("kind") == BATCH_KIND
+
+
+def episode_sort_key(filename: str) -> Tuple:
+    """Natural order, so "Folge 2" comes before "Folge 10" """
+    return tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part.lower())
+        for part in re.split(r"(\d+)", filename) if part
+    )
+
+
+def episode_status(job_id: str, job: Dict) -> Dict:
+    if job is None:
+        return {"job_id": job_id, "filename": None, "status": "error", "progress": 0, "error": "Job expired"}
+    return {
+        "job_id": job_id,
+        "filename": job["filename"],
+        "status": job["status"],
+        "progress": job.get("progress", 0),
+        "current_scene": job.get("current_scene"),
+        "total_scenes": job.get("total_scenes"),
+        "error": job.get("error")
+    }
+
+
+def batch_status(job_store: JobStore, batch_id: str, batch: Dict) -> Dict:
+    """
+    Per-file and aggregate progress of a batch.
+
+    The aggregate progress is weighted by scene count. Once every episode
+    has finished (completed, failed or paused at its budget) the batch is
+    marked completed (on read, so it works the
+    same with background tasks and queue workers).
+    """
+    episodes: List[Dict] = [
+        episode_status(job_id, job_store.get(job_id)) for job_id in batch["episodes"]
+    ]
+
+    total_scenes = sum(episode.get("total_scenes") or 0 for episode in episodes)
+    weighted = sum((episode.get("total_scenes") or 0) * episode["progress"] for episode in episodes)
+    completed = sum(episode["status"] == "completed" for episode in episodes)
+    failed = sum(episode["status"] == "error" for episode in episodes)
+    paused = sum(episode["status"] == "paused" for episode in episodes)
+
+    status = batch["status"]
+    if status == BATCH_ANALYZING and all(episode["status"] in EPISODE_FINAL_STATUSES for episode in episodes):
+        job_store.transition(batch_id, (BATCH_ANALYZING,), BATCH_COMPLETED)
+        status = BATCH_COMPLETED
+
+    return {
+        "batch_id": batch_id,
+        "status": status[len("batch_"):],
+        "progress": int(weighted / total_scenes) if total_scenes else 0,
+        "total_files": len(episodes),
+        "completed_files": completed,
+        "failed_files": failed,
+        "paused_files": paused,
+        "total_scenes": total_scenes,
+        "episodes": episodes,
+        "rejected": batch.get("rejected", [])
+    }
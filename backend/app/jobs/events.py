@@ -0,0 +1,180 @@
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from .runner import STAGE_SCENES
+from .store import JobStore
+import config
+
+
+# Statuses after which a job does not change anymore
+FINAL_STATUSES = ("completed", "paused", "error")
+
+# Comment line sent when nothing happened, so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+
+def format_event(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Encode one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def status_payload(job_id: str, job: Dict) -> Dict:
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "progress": job.get("progress", 0),
+        "current_scene": job.get("current_scene"),
+        "total_scenes": job.get("total_scenes"),
+        "error": job.get("error"),
+        "usage": job.get("usage"),
+        "failed_scenes": [scene["number"] for scene in job.get("failed_scenes") or []]
+    }
+
+
+def new_scene_results(job_store: JobStore, job_id: str, job: Dict, cursor: int) -> List[Tuple[int, Dict]]:
+    """Scene results with index >= cursor, from checkpoints or the stored results"""
+    if STAGE_SCENES in (job.get("completed_stages") or []):
+        # Checkpoints are dropped once all scene results are stored
+        if cursor >= (job.get("total_scenes") or 0):
+            return []
+        results = job_store.get_results(job_id) or []
+        return list(enumerate(results))[cursor:]
+    return sorted(job_store.get_scene_results(job_id, cursor).items())
+
+
+class JobWatch:
+    """
+    Polls one job for all of its event streams in this process.
+
+    Each poll reads the job once (and its new scene results only when the
+    job changed), so open connections don't each take a thread every
+    interval. The interval doubles up to EVENTS_MAX_POLL_INTERVAL while
+    the job stays the same. Every job update bumps `version` and wakes
+    the streams waiting on `changed`.
+    """
+
+    def __init__(self, job_store: JobStore, job_id: str):
+        self.job_store = job_store
+        self.job_id = job_id
+        self.job: Optional[Dict] = None
+        # Scene results seen so far, by index
+        self.scenes: Dict[int, Dict] = {}
+        self.cursor = 0
+        self.version = 0
+        # Error that stopped the polling, raised in every stream
+        self.error: Optional[Exception] = None
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        try:
+            await self._poll()
+        except Exception as e:
+            self.error = e
+            self._publish(self.job)
+
+    async def _poll(self):
+        interval = config.EVENTS_POLL_INTERVAL
+        while True:
+            job = await asyncio.to_thread(self.job_store.get, self.job_id)
+            if self.version == 0 or job != self.job:
+                if job is not None:
+                    new = await asyncio.to_thread(new_scene_results, self.job_store, self.job_id, job, self.cursor)
+                    for index, result in new:
+                        self.scenes[index] = result
+                        self.cursor = index + 1
+                self._publish(job)
+                if job is None or job["status"] in FINAL_STATUSES:
+                    return
+                interval = config.EVENTS_POLL_INTERVAL
+            else:
+                interval = min(interval * 2, config.EVENTS_MAX_POLL_INTERVAL)
+            await asyncio.sleep(interval)
+
+    def _publish(self, job: Optional[Dict]):
+        self.job = job
+        self.version += 1
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+# Watches of the jobs with open event streams, by job id
+_watches: Dict[str, JobWatch] = {}
+
+
+def _subscribe(job_store: JobStore, job_id: str) -> JobWatch:
+    watch = _watches.get(job_id)
+    if watch is None:
+        watch = _watches[job_id] = JobWatch(job_store, job_id)
+        watch.task = asyncio.create_task(watch.run())
+    watch.subscribers += 1
+    return watch
+
+
+def _unsubscribe(watch: JobWatch):
+    watch.subscribers -= 1
+    if watch.subscribers == 0:
+        watch.task.cancel()
+        del _watches[watch.job_id]
+
+
+async def job_events(job_store: JobStore, job_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Stream status changes and scene results of a job as server-sent events.
+
+    "scene" events carry the scene number as event id, so a reconnecting
+    client (Last-Event-ID) only receives the scenes it has not seen yet.
+    Scenes whose analysis failed are not checkpointed; each is sent once
+    per connection as a "scene_error" event (number, location, error).
+    The stream ends after the final "status" event of a completed or
+    failed job. The job is polled by a JobWatch shared with the other
+    streams of the job.
+    """
+    cursor = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    last_status = None
+    failed_sent = set()
+    seen_version = 0
+    watch = _subscribe(job_store, job_id)
+
+    try:
+        while True:
+            if watch.version == seen_version:
+                changed = watch.changed
+                try:
+                    await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                continue
+            seen_version = watch.version
+            if watch.error is not None:
+                raise watch.error
+
+            job = watch.job
+            if job is None:
+                yield format_event("status", {"job_id": job_id, "status": "error", "error": "Job not found"})
+                return
+
+            for index in sorted(index for index in watch.scenes if index >= cursor):
+                yield format_event("scene", watch.scenes[index], event_id=index + 1)
+                cursor = index + 1
+
+            for failed in job.get("failed_scenes") or []:
+                if failed["number"] not in failed_sent:
+                    yield format_event("scene_error", failed)
+                    failed_sent.add(failed["number"])
+
+            status = status_payload(job_id, job)
+            if status != last_status:
+                yield format_event("status", status)
+                last_status = status
+
+            if job["status"] in FINAL_STATUSES:
+                return
+    finally:
+        _unsubscribe(watch)
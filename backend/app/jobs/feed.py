@@ -0,0 +1,60 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List, Optional
+from .store import JobStore
+import config
+
+
+class StoredSceneFeed:
+    """
+    Scenes of a streaming upload parsed by another process, read from the
+    job store as they are published.
+
+    Counterpart of SceneFeed for queue workers and other uvicorn workers:
+    new scenes are polled until the upload is marked parsed, the remaining
+    ones then come from the final scene table. A parser that publishes
+    nothing for PARSE_TIMEOUT seconds is treated as interrupted.
+    """
+
+    def __init__(self, job_store: JobStore, job_id: str, interval: float = 0.5):
+        self.job_store = job_store
+        self.job_id = job_id
+        self.interval = interval
+        self.scenes: List[Dict] = []
+        self.done = False
+
+    @property
+    def total(self) -> Optional[int]:
+        """Final scene count, known once parsing has finished"""
+        return len(self.scenes) if self.done else None
+
+    async def __aiter__(self) -> AsyncIterator[Dict]:
+        deadline = time.time() + config.PARSE_TIMEOUT
+        while True:
+            job = await asyncio.to_thread(self.job_store.get, self.job_id)
+            if job is None:
+                raise Exception("Job expired while parsing")
+
+            if job.get("parsed"):
+                # Final table: speakers resolved with the whole roster
+                table = await asyncio.to_thread(self.job_store.get_scenes, self.job_id)
+                scenes = [scene.to_dict() for scene in table[len(self.scenes):]]
+                self.done = True
+            elif job["status"] == "error":
+                raise Exception(job.get("error") or "Parsing failed")
+            else:
+                scenes = await asyncio.to_thread(self.job_store.get_parsed_scenes, self.job_id, len(self.scenes))
+
+            for scene in scenes:
+                self.scenes.append(scene)
+                yield scene
+            if self.done:
+                return
+
+            if scenes:
+                deadline = time.time() + config.PARSE_TIMEOUT
+            elif time.time() > deadline:
+                # The worker parsing the upload is gone; its content is lost
+                raise Exception("Parsing was interrupted. Please upload the file again.")
+            else:
+                await asyncio.sleep(self.interval)
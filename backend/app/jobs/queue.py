@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Optional, Tuple
+
+
+class JobQueue:
+    """
+    FIFO queue of analysis jobs in a SQLite file shared by the API and the
+    worker processes.
+
+    A worker claims a job with a lease and renews it while the job runs.
+    If the worker dies, the lease expires and another worker claims the job
+    again (the runner resumes it from its checkpoints).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS job_queue (
+                    job_id TEXT PRIMARY KEY,
+                    enqueued_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_enqueued ON job_queue(enqueued_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so claim() can take the write lock with BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def enqueue(self, job_id: str):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO job_queue (job_id, enqueued_at) VALUES (?, ?)",
+                (job_id, time.time())
+            )
+
+    def claim(self, owner: str, lease_seconds: float) -> Optional[Tuple[str, int]]:
+        """Lease the oldest available job; returns (job_id, attempt) or None"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            # The write lock is taken before reading, so two workers can
+            # never lease the same job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    """SELECT job_id, attempts FROM job_queue
+                       WHERE lease_expires IS NULL OR lease_expires < ?
+                       ORDER BY enqueued_at LIMIT 1""",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        """UPDATE job_queue SET lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                           WHERE job_id = ?""",
+                        (owner, now + lease_seconds, row[0])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return (row[0], row[1] + 1) if row is not None else None
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend a lease; False if the lease was lost to another worker"""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE job_queue SET lease_expires = ? WHERE job_id = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, job_id, owner)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: str, owner: str):
+        """Remove a finished job from the queue"""
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM job_queue WHERE job_id = ? AND lease_owner = ?", (job_id, owner))
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            pending, leased = conn.execute(
+                """SELECT
+                       COALESCE(SUM(lease_expires IS NULL OR lease_expires < ?), 0),
+                       COALESCE(SUM(lease_expires >= ?), 0)
+                   FROM job_queue""",
+                (now, now)
+            ).fetchone()
+        return {"pending": pending, "leased": leased}
@@ -0,0 +1,186 @@
+import asyncio
+import time
+from typing import Dict, List, Set
+from analyzer import OpenRouterClient, SceneAnalyzer
+from analyzer.usage import BudgetExceeded, UsageMeter
+from excel.artifacts import ArtifactCache, excel_artifact
+from parsers.stream import SceneFeed
+from search import SearchIndex
+from .feed import StoredSceneFeed
+from .store import JobStore
+import config
+
+
+# Statuses of jobs that a worker is (or should be) working on
+RUNNING_STATUSES = ("queued", "processing", "analyzing", "analyzing_story_structure", "analyzing_aronson")
+
+# Post-analysis stages, checkpointed in the job's "completed_stages"
+STAGE_SCENES = "scenes"
+STAGE_STORY_STRUCTURE = "story_structure"
+STAGE_ARONSON = "aronson"
+
+
+def partial_results(job_store: JobStore, job_id: str, job: Dict) -> List[Dict]:
+    """Scene results of a paused job (checkpoints until all scenes are done)"""
+    if STAGE_SCENES in (job.get("completed_stages") or []):
+        return job_store.get_results(job_id) or []
+    return [result for _, result in sorted(job_store.get_scene_results(job_id).items())]
+
+
+class JobRunner:
+    """
+    Runs analysis jobs with durable checkpoints.
+
+    Every scene result is saved as soon as it is done and every stage is
+    recorded when it completes, so a job interrupted by a crash or
+    redeploy is resumed where it stopped instead of starting over.
+    """
+
+    def __init__(
+        self,
+        job_store: JobStore,
+        scene_feeds: Dict[str, SceneFeed],
+        artifacts: ArtifactCache,
+        search_index: SearchIndex
+    ):
+        self.job_store = job_store
+        self.scene_feeds = scene_feeds
+        self.artifacts = artifacts
+        self.search_index = search_index
+        # Keep references to resumed jobs so they are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+        # Episodes of all running batches share these slots
+        self._batch_slots = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+
+    async def process(self, job_id: str):
+        """Background task to process scene analysis"""
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self._process(job_id)
+        except BudgetExceeded as e:
+            # Scene checkpoints are kept: the partial results can be read
+            # and a new /analyze request resumes where the job stopped
+            self.job_store.update(job_id, status="paused", error=str(e), paused_at=time.time())
+        except Exception as e:
+            self.job_store.update(job_id, status="error", error=str(e), progress=0)
+        finally:
+            heartbeat.cancel()
+
+    async def process_batch(self, job_ids: List[str]):
+        """Analyze the episodes of a batch, at most BATCH_CONCURRENCY at a time"""
+        async def run(job_id: str):
+            async with self._batch_slots:
+                await self.process(job_id)
+
+        await asyncio.gather(*(run(job_id) for job_id in job_ids))
+
+    async def _process(self, job_id: str):
+        job_store = self.job_store
+        job_store.update(job_id, status="processing")
+
+        job = job_store.get(job_id)
+
+        # Streaming uploads are analyzed as their scenes are parsed, from the
+        # parser in this process or from the scenes another worker publishes
+        feed = self.scene_feeds.get(job_id)
+        if feed is None and not job.get("parsed", True):
+            feed = StoredSceneFeed(job_store, job_id)
+
+        stages: List[str] = list(job.get("completed_stages") or [])
+
+        # Initialize analyzer (usage continues from an interrupted or paused run)
+        usage = UsageMeter.from_summary(job.get("usage"))
+        client = OpenRouterClient(usage)
+        analyzer = SceneAnalyzer(
+            client,
+            job["mode"],
+            job["output_language"],
+            job["model"],
+            job.get("characters"),
+            max_cost=job.get("max_cost")
+        )
+
+        if STAGE_SCENES in stages:
+            results = job_store.get_results(job_id)
+        else:
+            # Scenes finished before an interruption are not analyzed again;
+            # a job resumed without raising its budget stops before the next one
+            done = job_store.get_scene_results(job_id)
+            analyzer.check_budget()
+
+            # Analyze scenes (streaming uploads are analyzed as scenes are parsed)
+            if feed is not None:
+                results = await analyzer.analyze_scene_stream(feed, job_store, job_id, done)
+            else:
+                results = await analyzer.analyze_all_scenes(
+                    job_store.get_scenes(job_id),
+                    job_store,
+                    job_id,
+                    done
+                )
+
+            # Store results
+            job_store.set_results(job_id, results)
+            self._complete_stage(job_id, stages, STAGE_SCENES)
+            job_store.clear_scene_results(job_id)
+
+        # Run story structure analysis if story mode
+        if "story" in job["mode"]:
+            if STAGE_STORY_STRUCTURE not in stages:
+                analyzer.check_budget()
+                job_store.update(job_id, status="analyzing_story_structure")
+                results = await analyzer.analyze_story_structure(results)
+                job_store.set_results(job_id, results)
+                job_store.update(job_id, usage=usage.summary())
+                self._complete_stage(job_id, stages, STAGE_STORY_STRUCTURE)
+
+            # Run Aronson analysis
+            if STAGE_ARONSON not in stages:
+                analyzer.check_budget()
+                job_store.update(job_id, status="analyzing_aronson")
+                aronson_results = await analyzer.analyze_aronson_questions(
+                    job_store.get_scenes(job_id),
+                    results
+                )
+                job_store.set_aronson(job_id, aronson_results)
+                self._complete_stage(job_id, stages, STAGE_ARONSON)
+
+        job_store.update(
+            job_id, status="completed", progress=100, error=None, usage=usage.summary(), completed_at=time.time()
+        )
+
+        job = job_store.get(job_id)
+
+        # Make the results searchable right away
+        try:
+            await asyncio.to_thread(self.search_index.index_job, job_id, job, results)
+        except Exception:
+            # Picked up by the next index sync instead
+            pass
+
+        # Build the Excel download now instead of on the first click
+        try:
+            await asyncio.to_thread(excel_artifact, job_store, self.artifacts, job_id, job)
+        except Exception:
+            # Built lazily on download instead
+            pass
+
+    def _complete_stage(self, job_id: str, stages: List[str], stage: str):
+        stages.append(stage)
+        self.job_store.update(job_id, completed_stages=stages)
+
+    async def _heartbeat(self, job_id: str):
+        """Keep the job marked alive during long AI calls"""
+        while True:
+            await asyncio.sleep(config.JOB_HEARTBEAT_INTERVAL)
+            await asyncio.to_thread(self.job_store.heartbeat, job_id)
+
+    def resume_interrupted(self) -> List[str]:
+        """Claim running jobs whose worker stopped sending heartbeats and resume them"""
+        stale_before = time.time() - config.JOB_STALE_SECONDS
+        claimed = self.job_store.claim_stale(RUNNING_STATUSES, stale_before)
+        for job_id in claimed:
+            task = asyncio.create_task(self.process(job_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return claimed
@@ -0,0 +1,674 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional
+from models.records import SceneTable
+
+
+# Large per-job payloads, stored apart from the job metadata
+SCENES = "scenes"
+RESULTS = "results"
+ARONSON = "aronson_results"
+
+# Metadata fields with their own columns (cheap progress/status updates)
+PROGRESS_FIELDS = ("status", "progress", "current_scene", "total_scenes")
+
+# TTL key for statuses without their own entry
+DEFAULT_TTL = "default"
+
+
+def encode_payload(value: Any) -> bytes:
+    """Serialize a payload to zlib-compressed JSON"""
+    if isinstance(value, SceneTable):
+        value = value.to_dicts()
+    return zlib.compress(json.dumps(value).encode("utf-8"))
+
+
+def decode_payload(key: str, payload: bytes) -> Any:
+    value = json.loads(zlib.decompress(payload))
+    return SceneTable.from_dicts(value) if key == SCENES else value
+
+
+def ttl_for(ttls: Dict[str, float], status: str) -> float:
+    return ttls.get(status, ttls.get(DEFAULT_TTL, float("inf")))
+
+
+class JobStore(ABC):
+    """
+    Storage for analysis jobs.
+
+    Job metadata (status, progress, parameters) is a flat dict; scenes and
+    results are stored separately and only loaded by the endpoints that
+    need them.
+    """
+
+    @abstractmethod
+    def create(self, job_id: str, job: Dict, scenes: Optional[SceneTable] = None):
+        """Register a new job"""
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return the job metadata, or None if the job does not exist"""
+        pass
+
+    @abstractmethod
+    def update(self, job_id: str, **fields):
+        """Set metadata fields"""
+        pass
+
+    @abstractmethod
+    def transition(self, job_id: str, from_statuses: Iterable[str], to_status: str, **fields) -> bool:
+        """
+        Atomically move a job to `to_status` if its status is one of
+        `from_statuses`. Returns False (and changes nothing) otherwise.
+        """
+        pass
+
+    @abstractmethod
+    def set_progress(self, job_id: str, current_scene: int, total_scenes: int, progress: int):
+        """Record analysis progress"""
+        pass
+
+    @abstractmethod
+    def get_data(self, job_id: str, key: str) -> Any:
+        """Return a stored payload (SCENES, RESULTS, ARONSON) or None"""
+        pass
+
+    @abstractmethod
+    def set_data(self, job_id: str, key: str, value: Any):
+        """Store a payload (SCENES, RESULTS, ARONSON)"""
+        pass
+
+    @abstractmethod
+    def save_scene_result(self, job_id: str, index: int, result: Dict):
+        """Checkpoint the result of one scene (0-based index) as soon as it is done"""
+        pass
+
+    @abstractmethod
+    def get_scene_results(self, job_id: str, start: int = 0) -> Dict[int, Dict]:
+        """Return checkpointed scene results by index (indices >= start)"""
+        pass
+
+    @abstractmethod
+    def clear_scene_results(self, job_id: str):
+        """Drop scene checkpoints once the full results are stored"""
+        pass
+
+    @abstractmethod
+    def add_parsed_scenes(self, job_id: str, start: int, scenes: List[Dict]):
+        """
+        Publish scenes of a streaming upload while it is still being parsed
+        (0-based index of the first one), so a worker in another process
+        can analyze them before parsing has finished
+        """
+        pass
+
+    @abstractmethod
+    def get_parsed_scenes(self, job_id: str, start: int = 0) -> List[Dict]:
+        """Scenes published so far, in order, from index `start`"""
+        pass
+
+    @abstractmethod
+    def clear_parsed_scenes(self, job_id: str):
+        """Drop the published scenes once the final scene table is stored"""
+        pass
+
+    @abstractmethod
+    def heartbeat(self, job_id: str):
+        """Mark a running job as alive"""
+        pass
+
+    @abstractmethod
+    def claim_stale(self, statuses: Iterable[str], stale_before: float) -> List[str]:
+        """
+        Claim jobs in `statuses` without any update since `stale_before`
+        (their worker died). Each job is claimed by exactly one caller; the
+        claim counts as a heartbeat.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, job_id: str):
+        """Remove a job and its payloads"""
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored jobs"""
+        pass
+
+    @abstractmethod
+    def job_ids(self, status: str) -> List[str]:
+        """Ids of all jobs with the given status, oldest first"""
+        pass
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Delete jobs whose status TTL has expired, return how many were deleted"""
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Storage and eviction statistics (for /health)"""
+        pass
+
+    def get_scenes(self, job_id: str) -> SceneTable:
+        return self.get_data(job_id, SCENES) or SceneTable()
+
+    def set_scenes(self, job_id: str, scenes: SceneTable):
+        self.set_data(job_id, SCENES, scenes)
+
+    def get_results(self, job_id: str) -> Optional[List[Dict]]:
+        return self.get_data(job_id, RESULTS)
+
+    def set_results(self, job_id: str, results: List[Dict]):
+        self.set_data(job_id, RESULTS, results)
+
+    def get_aronson(self, job_id: str) -> Optional[Dict]:
+        return self.get_data(job_id, ARONSON)
+
+    def set_aronson(self, job_id: str, aronson_results: Dict):
+        self.set_data(job_id, ARONSON, aronson_results)
+
+
+class MemoryJobStore(JobStore):
+    """
+    Jobs kept in process memory (single worker, lost on restart).
+
+    Payloads are held within a memory budget: once it is exceeded, the
+    least recently used jobs have their payloads written to compressed
+    files in spill_dir and are loaded back transparently on access.
+    """
+
+    def __init__(self, ttls: Dict[str, float], memory_budget: int, spill_dir: str):
+        self.ttls = ttls
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._jobs: Dict[str, Dict] = {}
+        self._updated: Dict[str, float] = {}
+        # Resident payloads in LRU order (coldest first) and their estimated sizes
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, Dict[str, int]] = {}
+        # Scene checkpoints only exist while a job runs, so they are never spilled
+        self._checkpoints: Dict[str, Dict[int, Dict]] = {}
+        # Scenes of streaming uploads, only kept while they are parsed
+        self._parsed: Dict[str, List[Dict]] = {}
+        self._spilled = set()
+        self._memory_bytes = 0
+        self._counters = {"expired": 0, "spilled": 0, "reloaded": 0}
+        self._lock = threading.RLock()
+
+        # Spilled payloads belong to jobs of a previous process
+        os.makedirs(spill_dir, exist_ok=True)
+        for name in os.listdir(spill_dir):
+            if name.endswith(".json.z"):
+                os.remove(os.path.join(spill_dir, name))
+
+    def create(self, job_id: str, job: Dict, scenes: Optional[SceneTable] = None):
+        with self._lock:
+            self._jobs[job_id] = dict(job)
+            self._updated[job_id] = time.time()
+            self._data[job_id] = {}
+            self._sizes[job_id] = {}
+            if scenes is not None:
+                self._store(job_id, SCENES, scenes)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                self._updated[job_id] = time.time()
+
+    def transition(self, job_id: str, from_statuses: Iterable[str], to_status: str, **fields) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.get("status") not in from_statuses:
+                return False
+            job.update(fields, status=to_status)
+            self._updated[job_id] = time.time()
+            return True
+
+    def set_progress(self, job_id: str, current_scene: int, total_scenes: int, progress: int):
+        self.update(job_id, current_scene=current_scene, total_scenes=total_scenes, progress=progress)
+
+    def get_data(self, job_id: str, key: str) -> Any:
+        with self._lock:
+            if not self._load(job_id):
+                return None
+            return self._data[job_id].get(key)
+
+    def set_data(self, job_id: str, key: str, value: Any):
+        with self._lock:
+            if self._load(job_id):
+                self._store(job_id, key, value)
+
+    def _store(self, job_id: str, key: str, value: Any):
+        size = self._estimate_size(value)
+        self._memory_bytes += size - self._sizes[job_id].get(key, 0)
+        self._sizes[job_id][key] = size
+        self._data[job_id][key] = value
+        self._data.move_to_end(job_id)
+        self._enforce_budget()
+
+    def _estimate_size(self, value: Any) -> int:
+        if value is None:
+            return 0
+        if isinstance(value, SceneTable):
+            # Text buffer plus the slotted records
+            return len(value.buffer) + 120 * len(value)
+        return len(json.dumps(value))
+
+    def _load(self, job_id: str) -> bool:
+        """Make a job's payloads resident (reloading spilled ones), mark it recently used"""
+        if job_id in self._data:
+            self._data.move_to_end(job_id)
+            return True
+        if job_id not in self._spilled:
+            return False
+
+        path = self._spill_path(job_id)
+        with open(path, "rb") as f:
+            stored = json.loads(zlib.decompress(f.read()))
+        os.remove(path)
+        self._spilled.discard(job_id)
+        self._counters["reloaded"] += 1
+
+        self._data[job_id] = {}
+        self._sizes[job_id] = {}
+        for key, payload in stored.items():
+            value = SceneTable.from_dicts(payload) if key == SCENES else payload
+            self._data[job_id][key] = value
+            self._sizes[job_id][key] = self._estimate_size(value)
+            self._memory_bytes += self._sizes[job_id][key]
+        self._enforce_budget()
+        return True
+
+    def _enforce_budget(self):
+        """Spill least recently used jobs until resident payloads fit the budget"""
+        # The most recently used job always stays resident
+        while self._memory_bytes > self.memory_budget and len(self._data) > 1:
+            job_id = next(iter(self._data))
+            self._spill(job_id)
+
+    def _spill(self, job_id: str):
+        data = self._data.pop(job_id)
+        stored = {
+            key: value.to_dicts() if isinstance(value, SceneTable) else value
+            for key, value in data.items()
+        }
+        with open(self._spill_path(job_id), "wb") as f:
+            f.write(zlib.compress(json.dumps(stored).encode("utf-8")))
+
+        self._memory_bytes -= sum(self._sizes.pop(job_id).values())
+        self._spilled.add(job_id)
+        self._counters["spilled"] += 1
+
+    def _spill_path(self, job_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{job_id}.json.z")
+
+    def save_scene_result(self, job_id: str, index: int, result: Dict):
+        with self._lock:
+            if job_id in self._jobs:
+                self._checkpoints.setdefault(job_id, {})[index] = result
+                self._updated[job_id] = time.time()
+
+    def get_scene_results(self, job_id: str, start: int = 0) -> Dict[int, Dict]:
+        with self._lock:
+            checkpoints = self._checkpoints.get(job_id, {})
+            return {index: result for index, result in checkpoints.items() if index >= start}
+
+    def clear_scene_results(self, job_id: str):
+        with self._lock:
+            self._checkpoints.pop(job_id, None)
+
+    def add_parsed_scenes(self, job_id: str, start: int, scenes: List[Dict]):
+        with self._lock:
+            if job_id in self._jobs:
+                parsed = self._parsed.setdefault(job_id, [])
+                parsed[start:start + len(scenes)] = scenes
+
+    def get_parsed_scenes(self, job_id: str, start: int = 0) -> List[Dict]:
+        with self._lock:
+            return list(self._parsed.get(job_id, [])[start:])
+
+    def clear_parsed_scenes(self, job_id: str):
+        with self._lock:
+            self._parsed.pop(job_id, None)
+
+    def heartbeat(self, job_id: str):
+        with self._lock:
+            if job_id in self._jobs:
+                self._updated[job_id] = time.time()
+
+    def claim_stale(self, statuses: Iterable[str], stale_before: float) -> List[str]:
+        statuses = set(statuses)
+        with self._lock:
+            claimed = [
+                job_id for job_id, job in self._jobs.items()
+                if job.get("status") in statuses and self._updated[job_id] < stale_before
+            ]
+            for job_id in claimed:
+                self._updated[job_id] = time.time()
+            return claimed
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._updated.pop(job_id, None)
+            self._checkpoints.pop(job_id, None)
+            self._parsed.pop(job_id, None)
+            if job_id in self._data:
+                self._data.pop(job_id)
+                self._memory_bytes -= sum(self._sizes.pop(job_id).values())
+            if job_id in self._spilled:
+                self._spilled.discard(job_id)
+                os.remove(self._spill_path(job_id))
+
+    def count(self) -> int:
+        return len(self._jobs)
+
+    def job_ids(self, status: str) -> List[str]:
+        with self._lock:
+            return [job_id for job_id, job in self._jobs.items() if job.get("status") == status]
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if now - self._updated[job_id] > ttl_for(self.ttls, job.get("status"))
+            ]
+            for job_id in expired:
+                self.delete(job_id)
+            self._counters["expired"] += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "resident_jobs": len(self._data),
+                "spilled_jobs": len(self._spilled),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget_bytes": self.memory_budget,
+                **self._counters
+            }
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Jobs in a SQLite file shared by all worker processes.
+
+    WAL mode lets readers (status polling) proceed while a worker writes.
+    Status and progress have their own columns so progress updates and
+    status transitions are single UPDATE statements; other metadata is a
+    JSON object patched in place. Payloads are zlib-compressed JSON.
+    """
+
+    def __init__(self, path: str, ttls: Dict[str, float]):
+        self.path = path
+        self.ttls = ttls
+        self._expired = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    current_scene INTEGER,
+                    total_scenes INTEGER,
+                    meta TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS job_data (
+                    job_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (job_id, key)
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS scene_results (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (job_id, idx)
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS parsed_scenes (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (job_id, idx)
+                )"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _split(self, fields: Dict):
+        """Separate column fields from JSON metadata fields"""
+        columns = {key: fields[key] for key in PROGRESS_FIELDS if key in fields}
+        meta = {key: value for key, value in fields.items() if key not in PROGRESS_FIELDS}
+        return columns, meta
+
+    def create(self, job_id: str, job: Dict, scenes: Optional[SceneTable] = None):
+        columns, meta = self._split(job)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """INSERT INTO jobs (id, status, progress, current_scene, total_scenes, meta, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (job_id, columns.get("status", "uploaded"), columns.get("progress", 0),
+                 columns.get("current_scene"), columns.get("total_scenes"),
+                 json.dumps(meta), now, now)
+            )
+            if scenes is not None:
+                self._write_data(conn, job_id, SCENES, scenes)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT status, progress, current_scene, total_scenes, meta FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job = json.loads(row[4])
+        job.update(zip(PROGRESS_FIELDS, row[:4]))
+        return job
+
+    def _update_sql(self, fields: Dict):
+        """Build the SET clause and parameters for a metadata update"""
+        columns, meta = self._split(fields)
+        assignments = [f"{key} = ?" for key in columns]
+        params = list(columns.values())
+        if meta:
+            # json_patch merges the new fields into the stored object in one
+            # statement, so concurrent updates of different fields don't race
+            assignments.append("meta = json_patch(meta, ?)")
+            params.append(json.dumps(meta))
+        assignments.append("updated_at = ?")
+        params.append(time.time())
+        return ", ".join(assignments), params
+
+    def update(self, job_id: str, **fields):
+        assignments, params = self._update_sql(fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*params, job_id))
+
+    def transition(self, job_id: str, from_statuses: Iterable[str], to_status: str, **fields) -> bool:
+        from_statuses = list(from_statuses)
+        assignments, params = self._update_sql({**fields, "status": to_status})
+        placeholders = ", ".join("?" for _ in from_statuses)
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status IN ({placeholders})",
+                (*params, job_id, *from_statuses)
+            )
+            return cursor.rowcount == 1
+
+    def set_progress(self, job_id: str, current_scene: int, total_scenes: int, progress: int):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET current_scene = ?, total_scenes = ?, progress = ?, updated_at = ? WHERE id = ?",
+                (current_scene, total_scenes, progress, time.time(), job_id)
+            )
+
+    def get_data(self, job_id: str, key: str) -> Any:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT payload FROM job_data WHERE job_id = ? AND key = ?", (job_id, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return decode_payload(key, row[0])
+
+    def set_data(self, job_id: str, key: str, value: Any):
+        with closing(self._connect()) as conn, conn:
+            self._write_data(conn, job_id, key, value)
+
+    def _write_data(self, conn: sqlite3.Connection, job_id: str, key: str, value: Any):
+        conn.execute(
+            "INSERT OR REPLACE INTO job_data (job_id, key, payload) VALUES (?, ?, ?)",
+            (job_id, key, encode_payload(value))
+        )
+
+    def save_scene_result(self, job_id: str, index: int, result: Dict):
+        # The checkpoint doubles as a heartbeat
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scene_results (job_id, idx, payload) VALUES (?, ?, ?)",
+                (job_id, index, encode_payload(result))
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def get_scene_results(self, job_id: str, start: int = 0) -> Dict[int, Dict]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT idx, payload FROM scene_results WHERE job_id = ? AND idx >= ?", (job_id, start)
+            ).fetchall()
+        return {index: decode_payload(RESULTS, payload) for index, payload in rows}
+
+    def clear_scene_results(self, job_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM scene_results WHERE job_id = ?", (job_id,))
+
+    def add_parsed_scenes(self, job_id: str, start: int, scenes: List[Dict]):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO parsed_scenes (job_id, idx, payload) VALUES (?, ?, ?)",
+                [(job_id, start + offset, encode_payload(scene)) for offset, scene in enumerate(scenes)]
+            )
+
+    def get_parsed_scenes(self, job_id: str, start: int = 0) -> List[Dict]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT payload FROM parsed_scenes WHERE job_id = ? AND idx >= ? ORDER BY idx",
+                (job_id, start)
+            ).fetchall()
+        return [decode_payload(RESULTS, payload) for (payload,) in rows]
+
+    def clear_parsed_scenes(self, job_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM parsed_scenes WHERE job_id = ?", (job_id,))
+
+    def heartbeat(self, job_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def claim_stale(self, statuses: Iterable[str], stale_before: float) -> List[str]:
+        statuses = list(statuses)
+        placeholders = ", ".join("?" for _ in statuses)
+        condition = f"status IN ({placeholders}) AND updated_at < ?"
+        claimed = []
+        with closing(self._connect()) as conn, conn:
+            candidates = conn.execute(
+                f"SELECT id FROM jobs WHERE {condition}", (*statuses, stale_before)
+            ).fetchall()
+            for (job_id,) in candidates:
+                # Conditional update: only one worker wins each job
+                cursor = conn.execute(
+                    f"UPDATE jobs SET updated_at = ? WHERE id = ? AND {condition}",
+                    (time.time(), job_id, *statuses, stale_before)
+                )
+                if cursor.rowcount == 1:
+                    claimed.append(job_id)
+        return claimed
+
+    def delete(self, job_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM scene_results WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM parsed_scenes WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM job_data WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def job_ids(self, status: str) -> List[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (status,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def sweep(self) -> int:
+        now = time.time()
+        statuses = [status for status in self.ttls if status != DEFAULT_TTL]
+        expired = 0
+        with closing(self._connect()) as conn, conn:
+            for status in statuses:
+                cursor = conn.execute(
+                    "DELETE FROM jobs WHERE status = ? AND updated_at < ?",
+                    (status, now - self.ttls[status])
+                )
+                expired += cursor.rowcount
+            if DEFAULT_TTL in self.ttls:
+                placeholders = ", ".join("?" for _ in statuses)
+                cursor = conn.execute(
+                    f"DELETE FROM jobs WHERE status NOT IN ({placeholders}) AND updated_at < ?",
+                    (*statuses, now - self.ttls[DEFAULT_TTL])
+                )
+                expired += cursor.rowcount
+            if expired:
+                conn.execute("DELETE FROM job_data WHERE job_id NOT IN (SELECT id FROM jobs)")
+                conn.execute("DELETE FROM scene_results WHERE job_id NOT IN (SELECT id FROM jobs)")
+                conn.execute("DELETE FROM parsed_scenes WHERE job_id NOT IN (SELECT id FROM jobs)")
+        self._expired += expired
+        return expired
+
+    def stats(self) -> Dict:
+        with closing(self._connect()) as conn:
+            jobs = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "jobs": jobs,
+            "database_bytes": page_count * page_size,
+            # Jobs expired by this worker's sweeper
+            "expired": self._expired
+        }
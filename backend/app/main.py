@@ -1,15 +1,39 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from models.schemas import FileUploadResponse, AnalysisRequest, AnalysisStatus
-from parsers import get_parser
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from models.schemas import (
+    FileUploadResponse, AnalysisRequest, AnalysisStatus,
+    BatchUploadResponse, BatchAnalysisRequest, RejectedFile
+)
+from models.records import SceneTable
+from models.pages import MAX_PAGE_SIZE, parse_fields, project, page_bounds
+from parsers import get_parser, parse_document, profile_fields, PROFILE_FIELDS, ParseCache, PARSER_VERSION, SUPPORTED_EXTENSIONS
+from parsers.archive import ArchiveLimitError, extract_archive
+from parsers.stream import SceneFeed
 from analyzer import OpenRouterClient, SceneAnalyzer
+from analyzer.singleflight import default_singleflight
 from excel import ExcelGenerator
+from excel.artifacts import ArtifactCache, excel_artifact, parquet_artifact, batch_artifact, export_etag
+from excel.exports import EXPORT_FORMATS, export_chunks, write_parquet, corpus_columns, corpus_rows
+from jobs import create_job_store
+from jobs.batch import BATCH_KIND, BATCH_UPLOADED, BATCH_ANALYZING, is_batch, episode_sort_key, batch_status
+from jobs.events import job_events
+from jobs.queue import JobQueue
+from jobs.runner import JobRunner, partial_results
+from search import SearchIndex, sync_index
 import uuid
 import os
 import asyncio
-from typing import Dict
+import functools
+import multiprocessing
+import json
+import tempfile
+from typing import Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from urllib.parse import quote
+import config
 
 app = FastAPI(
     title="Scene Analyzer API",
@@ -32,12 +56,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory job storage
-analysis_jobs: Dict[str, dict] = {}
+# Job storage (shared by all workers unless JOB_STORE=memory)
+job_store = create_job_store()
+
+# Periodic removal of expired jobs and resume of orphaned ones (started on startup)
+sweeper_task: Optional[asyncio.Task] = None
+
+# Scene feeds of uploads that are still being parsed (streaming uploads)
+scene_feeds: Dict[str, SceneFeed] = {}
+
+# Generated Excel workbooks, shared by all workers
+artifacts = ArtifactCache(config.ARTIFACT_DIR)
+
+# Full-text and facet search over completed results, shared by all workers
+search_index = SearchIndex(config.SEARCH_INDEX_PATH)
+
+# Runs analysis jobs with per-scene checkpoints (background executor)
+runner = JobRunner(job_store, scene_feeds, artifacts, search_index)
+
+# Jobs for the worker processes (queue executor)
+job_queue = JobQueue(config.JOB_QUEUE_PATH) if config.ANALYSIS_EXECUTOR == "queue" else None
+
+# Parse results shared by all workers, keyed by upload content hash
+parse_cache = ParseCache(config.PARSE_CACHE_PATH, config.PARSE_CACHE_MAX_BYTES, PARSER_VERSION)
+
+# Parser processes for batch uploads (started on first use)
+parse_pool: Optional[ProcessPoolExecutor] = None
 
 # Constants
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
-ALLOWED_EXTENSIONS = [".pdf", ".docx", ".txt"]
+ALLOWED_EXTENSIONS = SUPPORTED_EXTENSIONS
+
+
+@app.on_event("startup")
+async def start_job_maintenance():
+    global sweeper_task
+    # Jobs interrupted by a restart or redeploy continue from their checkpoints
+    # (queued jobs are resumed by the workers once their lease expires)
+    if job_queue is None:
+        runner.resume_interrupted()
+    sweeper_task = asyncio.create_task(sweep_jobs())
+
+
+async def sweep_jobs():
+    """
+    Delete expired jobs, keep the search index in sync and resume orphaned
+    jobs every JOB_SWEEP_INTERVAL seconds
+    """
+    while True:
+        await asyncio.sleep(config.JOB_SWEEP_INTERVAL)
+        try:
+            await asyncio.to_thread(job_store.sweep)
+            await asyncio.to_thread(artifacts.sweep, config.JOB_TTL_HOURS["completed"] * 3600)
+            await asyncio.to_thread(sync_index, search_index, job_store)
+            if job_queue is None:
+                runner.resume_interrupted()
+        except Exception:
+            # A failed sweep is retried on the next interval
+            pass
 
 
 @app.get("/")
@@ -57,51 +133,58 @@ async def health():
         "status": "healthy",
         "api": "operational",
         "database": "not_required",
-        "storage": "in_memory",
-        "active_jobs": len(analysis_jobs)
+        "storage": config.JOB_STORE,
+        "active_jobs": job_store.count(),
+        "job_store": job_store.stats(),
+        "executor": config.ANALYSIS_EXECUTOR,
+        "queue": job_queue.stats() if job_queue else None,
+        "search_index": search_index.stats(),
+        "singleflight": default_singleflight().stats()
     }
 
 
 @app.post("/api/v1/upload", response_model=FileUploadResponse)
-async def upload_file(file: UploadFile = File(...)):
-    """Upload and validate a screenplay/treatment file"""
+async def upload_file(file: UploadFile = File(...), stream: bool = False):
+    """
+    Upload and validate a screenplay/treatment file
+    
+    With `stream=true` the file is parsed in the background: the job stays in
+    status "parsing" and analysis may be started before parsing has finished.
+    """
     
     # Get file extension
     file_ext = os.path.splitext(file.filename)[1].lower()
     
     # Validate file type
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type: {file_ext}. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
+    error = validate_file_type(file_ext)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
     # Read file content
     content = await file.read()
     file_size = len(content)
     
     # Validate file size
-    if file_size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large: {file_size / 1024 / 1024:.1f}MB. Maximum: 50MB"
-        )
-    
-    if file_size == 0:
-        raise HTTPException(
-            status_code=400,
-            detail="File is empty"
-        )
+    error = validate_file_size(file_size)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
     
     # Generate unique file ID
     file_id = str(uuid.uuid4())
     
-    # Parse and extract scenes immediately
+    # Parse and extract scenes immediately (identical uploads come from the cache)
     try:
-        parser_class = get_parser(file_ext)
-        parser = parser_class(content)
-        scenes = parser.extract_scenes()
-        detected_language = parser.detect_language()
+        cache_key = parse_cache.key(content, file_ext)
+        parsed = await asyncio.to_thread(parse_cache.get, cache_key)
+        if parsed is None and stream:
+            return await start_scene_feed(file_id, file.filename, file_ext, content, cache_key)
+        if parsed is None:
+            parsed = await asyncio.to_thread(parse_document, content, file_ext)
+            if parsed["scenes"]:
+                await asyncio.to_thread(parse_cache.put, cache_key, parsed)
+        
+        scenes = parsed["scenes"]
+        profile = {key: parsed[key] for key in PROFILE_FIELDS}
         
         if not scenes:
             raise HTTPException(
@@ -109,6 +192,8 @@ async def upload_file(file: UploadFile = File(...)):
                 detail="No scenes could be extracted from the file. Please check the format."
             )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -117,61 +202,254 @@ async def upload_file(file: UploadFile = File(...)):
             detail=f"Error parsing file: {str(e)}"
         )
     
-    # Store in memory
-    analysis_jobs[file_id] = {
-        "filename": file.filename,
+    # Store job
+    return create_uploaded_job(
+        file_id, file.filename, file_ext, file_size, scenes, profile, characters=parsed["characters"]
+    )
+
+
+def validate_file_type(file_ext: str) -> Optional[str]:
+    if file_ext not in ALLOWED_EXTENSIONS:
+        return f"Invalid file type: {file_ext}. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+    return None
+
+
+def validate_file_size(file_size: int) -> Optional[str]:
+    if file_size > MAX_FILE_SIZE:
+        return f"File too large: {file_size / 1024 / 1024:.1f}MB. Maximum: 50MB"
+    if file_size == 0:
+        return "File is empty"
+    return None
+
+
+def create_uploaded_job(
+    file_id: str,
+    filename: str,
+    file_ext: str,
+    file_size: int,
+    scenes: List[Dict],
+    profile: Dict,
+    **fields
+) -> FileUploadResponse:
+    """Store a parsed upload as a job ready for analysis"""
+    job_store.create(file_id, {
+        "filename": filename,
         "file_type": file_ext,
         "size": file_size,
         "status": "uploaded",
-        "scenes": scenes,
         "total_scenes": len(scenes),
-        "detected_language": detected_language,
+        **profile,
+        **fields,
+        "parsed": True,
         "progress": 0
-    }
+    }, scenes=SceneTable.from_dicts(scenes))
     
     return FileUploadResponse(
         file_id=file_id,
-        filename=file.filename,
+        filename=filename,
         size=file_size,
         file_type=file_ext,
-        status="uploaded"
+        status="uploaded",
+        **profile
+    )
+
+
+async def start_scene_feed(file_id: str, filename: str, file_ext: str, content: bytes, cache_key: str) -> FileUploadResponse:
+    """Start parsing in the background and register the job as "parsing" """
+    parser = get_parser(file_ext)(content)
+    # Sampling is cheap, so format and language are known before parsing starts
+    profile = profile_fields(await asyncio.to_thread(parser.detect_profile))
+    feed = SceneFeed(parser)
+    scene_feeds[file_id] = feed
+    
+    job_store.create(file_id, {
+        "filename": filename,
+        "file_type": file_ext,
+        "size": len(content),
+        "status": "parsing",
+        "total_scenes": 0,
+        **profile,
+        "parsed": False,
+        "progress": 0
+    })
+    
+    feed.add_done_callback(functools.partial(finish_scene_feed, file_id, cache_key))
+    feed.start()
+    asyncio.create_task(publish_scene_feed(file_id, feed))
+    
+    return FileUploadResponse(
+        file_id=file_id,
+        filename=filename,
+        size=len(content),
+        file_type=file_ext,
+        status="parsing",
+        **profile
     )
 
 
+async def publish_scene_feed(job_id: str, feed: SceneFeed):
+    """
+    Copy the scenes of a streaming upload to the job store as they are
+    parsed, so a queue worker or another uvicorn worker can analyze them
+    before parsing has finished (see StoredSceneFeed)
+    """
+    published = 0
+    try:
+        async for _ in feed:
+            if len(feed.scenes) > published:
+                scenes = feed.scenes[published:]
+                await asyncio.to_thread(job_store.add_parsed_scenes, job_id, published, scenes)
+                published += len(scenes)
+    except Exception:
+        # Parse errors are recorded by finish_scene_feed
+        pass
+    # The final scene table has been stored by now
+    await asyncio.to_thread(job_store.clear_parsed_scenes, job_id)
+
+
+def finish_scene_feed(job_id: str, cache_key: str, feed: SceneFeed):
+    """Store the final scenes of a streaming upload once parsing has finished"""
+    scene_feeds.pop(job_id, None)
+    
+    if feed.error or not feed.scenes:
+        job_store.update(
+            job_id,
+            status="error",
+            error=str(feed.error) if feed.error else "No scenes could be extracted from the file. Please check the format."
+        )
+        return
+    
+    # Speakers of scenes published early may have aliases seen later
+    feed.parser.resolve_speakers(feed.scenes)
+    characters = feed.parser.roster.to_list()
+    
+    job_store.set_scenes(job_id, SceneTable.from_dicts(feed.scenes))
+    job_store.update(
+        job_id,
+        total_scenes=len(feed.scenes),
+        detected_language=feed.detected_language,
+        characters=characters,
+        parsed=True
+    )
+    job_store.transition(job_id, ("parsing",), "uploaded")
+    
+    # Analysis started while parsing: its estimate was pending
+    job = job_store.get(job_id)
+    if job.get("model"):
+        job_store.update(
+            job_id,
+            estimated_cost=estimate_analysis_cost(job["mode"], job["output_language"], job["model"], len(feed.scenes))
+        )
+    
+    parsed = {
+        "text": feed.text,
+        "scenes": feed.scenes,
+        "characters": characters,
+        **profile_fields(feed.parser.detect_profile())
+    }
+    asyncio.create_task(asyncio.to_thread(parse_cache.put, cache_key, parsed))
+
+
 @app.get("/api/v1/status/{job_id}", response_model=AnalysisStatus)
 async def get_status(job_id: str):
     """Get analysis status for a job"""
     
-    if job_id not in analysis_jobs:
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = analysis_jobs[job_id]
-    
     return AnalysisStatus(
         job_id=job_id,
         status=job["status"],
         progress=job.get("progress", 0),
         current_scene=job.get("current_scene"),
         total_scenes=job.get("total_scenes"),
-        error=job.get("error")
+        error=job.get("error"),
+        usage=job.get("usage"),
+        max_cost=job.get("max_cost")
     )
 
 
-@app.get("/api/v1/scenes/{job_id}")
-async def get_scenes(job_id: str):
-    """Get extracted scenes for inspection (debug endpoint)"""
+@app.get("/api/v1/events/{job_id}")
+async def stream_events(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """
+    Server-sent events for a job: "status" on every status/progress change
+    and "scene" for each analyzed scene as soon as it is done.
     
-    if job_id not in analysis_jobs:
+    Scene events carry the scene number as id; reconnecting clients resume
+    after the last scene they received (Last-Event-ID).
+    """
+    
+    if await asyncio.to_thread(job_store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return StreamingResponse(
+        job_events(job_store, job_id, last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable response buffering in nginx
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def ndjson_response(rows: Iterable[Dict]) -> StreamingResponse:
+    """Stream rows as newline-delimited JSON, one row at a time"""
+    return StreamingResponse(
+        (json.dumps(row) + "\n" for row in rows),
+        media_type="application/x-ndjson"
+    )
+
+
+@app.get("/api/v1/scenes/{job_id}")
+async def get_scenes(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$")
+):
+    """
+    Get extracted scenes for inspection (debug endpoint)
+    
+    Supports paging (`offset`/`limit`, follow `next_offset`), a field
+    projection (`fields=number,location`) and `format=ndjson` to stream
+    one scene per line.
+    """
+    
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = analysis_jobs[job_id]
+    # Scenes of a streaming upload are available while parsing continues
+    # (published to the store for workers that are not parsing it)
+    feed = scene_feeds.get(job_id)
+    if feed:
+        scenes = list(feed.scenes)
+    elif not job.get("parsed", True):
+        scenes = job_store.get_parsed_scenes(job_id)
+    else:
+        scenes = job_store.get_scenes(job_id)
+    
+    start, end, next_offset = page_bounds(len(scenes), offset, limit)
+    field_list = parse_fields(fields)
+    rows = (project(scene, field_list) for scene in scenes[start:end])
+    
+    if output_format == "ndjson":
+        return ndjson_response(rows)
     
     return {
         "job_id": job_id,
         "filename": job["filename"],
-        "total_scenes": job["total_scenes"],
-        "detected_language": job.get("detected_language", "unknown"),
-        "scenes": job.get("scenes", [])
+        "total_scenes": len(scenes),
+        "detected_language": job.get("detected_language") or "unknown",
+        "detected_format": job.get("detected_format"),
+        "format_confidence": job.get("format_confidence"),
+        "language_confidence": job.get("language_confidence"),
+        "offset": start,
+        "next_offset": next_offset,
+        "scenes": list(rows)
     }
 
 
@@ -179,156 +457,531 @@ async def get_scenes(job_id: str):
 async def start_analysis(request: AnalysisRequest, background_tasks: BackgroundTasks):
     """Start AI analysis of uploaded file"""
     
-    if request.file_id not in analysis_jobs:
+    job = job_store.get(request.file_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="File not found")
     
-    job = analysis_jobs[request.file_id]
+    if is_batch(job):
+        raise HTTPException(status_code=400, detail="Use /api/v1/batch/analyze to analyze a batch")
     
-    if job["status"] != "uploaded":
-        raise HTTPException(status_code=400, detail=f"Job already {job['status']}")
-    
-    # Update job with analysis parameters
-    job.update({
-        "output_language": request.output_language,
-        "model": request.model,
-        "mode": request.mode,
-        "protagonist_count": request.protagonist_count,
-        "status": "queued"
-    })
+    # A job paused at its max_cost resumes with its finished scenes, so the
+    # results must stay comparable
+    if job["status"] == "paused" and (job["mode"], job["output_language"]) != (request.mode, request.output_language):
+        raise HTTPException(status_code=400, detail="A paused job can only be resumed with the same mode and language")
+    spent = (job.get("usage") or {}).get("cost", 0)
+    if job["status"] == "paused" and request.max_cost is not None and request.max_cost <= spent:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The job has already cost ${spent:.4f}; resume it with a higher max_cost"
+        )
     
-    # Estimate cost
-    try:
-        client = OpenRouterClient()
-        analyzer = SceneAnalyzer(client, request.mode, request.output_language, request.model)
-        estimated_cost = analyzer.estimate_cost(job["total_scenes"])
-        job["estimated_cost"] = estimated_cost
-    except Exception as e:
-        job["estimated_cost"] = 0.0
+    # Streaming uploads can be analyzed while they are still being parsed.
+    # The transition is atomic, so a job can only be started once even if
+    # two requests reach different workers.
+    started = job_store.transition(
+        request.file_id,
+        ("uploaded", "parsing", "paused"),
+        "queued",
+        output_language=request.output_language,
+        model=request.model,
+        mode=request.mode,
+        protagonist_count=request.protagonist_count,
+        max_cost=request.max_cost,
+        error=None
+    )
+    if not started:
+        job = job_store.get(request.file_id)
+        raise HTTPException(status_code=400, detail=f"Job already {job['status']}")
     
-    # Start analysis in background
-    background_tasks.add_task(process_analysis, request.file_id)
+    # Estimate cost. The scene count of an upload still being parsed is not
+    # known yet: its estimate is pending (null) and stored once parsing ends
+    job = job_store.get(request.file_id)
+    if job.get("parsed", True):
+        total_scenes = job["total_scenes"]
+        estimated_cost = estimate_analysis_cost(request.mode, request.output_language, request.model, total_scenes)
+        job_store.update(request.file_id, estimated_cost=estimated_cost)
+    else:
+        total_scenes = None
+        estimated_cost = None
+    
+    # Start analysis in background, or hand it to the worker processes
+    if job_queue is not None:
+        await asyncio.to_thread(job_queue.enqueue, request.file_id)
+    else:
+        background_tasks.add_task(runner.process, request.file_id)
     
     return {
         "job_id": request.file_id,
         "status": "queued",
-        "total_scenes": job["total_scenes"],
-        "estimated_cost": job.get("estimated_cost", 0.0)
+        "total_scenes": total_scenes,
+        "estimated_cost": estimated_cost
     }
 
 
-async def process_analysis(job_id: str):
-    """Background task to process scene analysis"""
+def estimate_analysis_cost(mode: str, output_language: str, model: str, scene_count: int) -> float:
     try:
-        job = analysis_jobs[job_id]
-        job["status"] = "processing"
-        
-        # Initialize analyzer
         client = OpenRouterClient()
-        analyzer = SceneAnalyzer(
-            client,
-            job["mode"],
-            job["output_language"],
-            job["model"]
-        )
-        
-        # Analyze scenes
-        results = await analyzer.analyze_all_scenes(
-            job["scenes"],
-            analysis_jobs,
-            job_id
-        )
-        
-        # Store results
-        job["results"] = results
-        
-        # Run story structure analysis if story mode
-        if "story" in job["mode"]:
-            job["status"] = "analyzing_story_structure"
-            results = await analyzer.analyze_story_structure(results)
-            job["results"] = results
-            
-            # Run Aronson analysis
-            job["status"] = "analyzing_aronson"
-            aronson_results = await analyzer.analyze_aronson_questions(
-                job["scenes"],
-                results
-            )
-            job["aronson_results"] = aronson_results
-        
-        job["status"] = "completed"
-        job["progress"] = 100
-        
-    except Exception as e:
-        job["status"] = "error"
-        job["error"] = str(e)
-        job["progress"] = 0
+        analyzer = SceneAnalyzer(client, mode, output_language, model)
+        return analyzer.estimate_cost(scene_count)
+    except Exception:
+        return 0.0
 
 
 @app.get("/api/v1/results/{job_id}")
-async def get_results(job_id: str):
-    """Get analysis results"""
-    
-    if job_id not in analysis_jobs:
+async def get_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    output_format: str = Query("json", alias="format", pattern="^(json|ndjson)$")
+):
+    """
+    Get analysis results
+    
+    Supports paging (`offset`/`limit`, follow `next_offset`), a field
+    projection (`fields=number,story_event`) and `format=ndjson` to stream
+    one result per line. Jobs paused at their max_cost return the scenes
+    analyzed so far (`partial`).
+    """
+    
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = analysis_jobs[job_id]
-    
-    if job["status"] != "completed":
+    if job["status"] == "paused":
+        results = partial_results(job_store, job_id, job)
+    elif job["status"] == "completed":
+        results = job_store.get_results(job_id)
+    else:
         raise HTTPException(
             status_code=400,
             detail=f"Analysis not completed. Current status: {job['status']}"
         )
     
+    start, end, next_offset = page_bounds(len(results), offset, limit)
+    field_list = parse_fields(fields)
+    rows = (project(result, field_list) for result in results[start:end])
+    
+    if output_format == "ndjson":
+        return ndjson_response(rows)
+    
     return {
         "job_id": job_id,
         "filename": job["filename"],
         "mode": job["mode"],
         "language": job["output_language"],
         "model": job["model"],
-        "total_scenes": len(job["results"]),
-        "results": job["results"]
+        "total_scenes": len(results),
+        "partial": job["status"] == "paused",
+        "usage": job.get("usage"),
+        "characters": job.get("characters", []),
+        "offset": start,
+        "next_offset": next_offset,
+        "results": list(rows)
     }
 
 
-@app.get("/api/v1/download/{job_id}")
-async def download_excel(job_id: str):
-    """Download analysis as Excel file"""
+@app.get("/api/v1/search")
+async def search_scenes(
+    q: Optional[str] = None,
+    int_ext: List[str] = Query([]),
+    time_of_day: List[str] = Query([]),
+    turning_point_type: List[str] = Query([]),
+    on_stage: List[str] = Query([]),
+    act: List[str] = Query([]),
+    mode: List[str] = Query([]),
+    job_id: List[str] = Query([]),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    facets: bool = True
+):
+    """
+    Search the scenes of all completed analyses
+    
+    `q` searches story event and subtext. Facets can be repeated
+    (`time_of_day=Night&time_of_day=Nacht`) and match case-insensitively;
+    every `on_stage` name must be on stage. The response includes counts
+    per facet value over all matches (skip them with `facets=false` when
+    paging).
+    """
+    
+    filters = {
+        "int_ext": int_ext,
+        "time_of_day": time_of_day,
+        "turning_point_type": turning_point_type,
+        "on_stage": on_stage,
+        "act": act,
+        "mode": mode,
+        "job_id": job_id
+    }
+    total, results, facet_counts = await asyncio.to_thread(search_index.search, q, filters, offset, limit, facets)
+    start, end, next_offset = page_bounds(total, offset, limit)
     
-    if job_id not in analysis_jobs:
+    return {
+        "total": total,
+        "offset": start,
+        "next_offset": next_offset,
+        "results": results,
+        "facets": facet_counts
+    }
+
+
+def attachment_headers(filename: str) -> Dict[str, str]:
+    """Content-Disposition for streamed downloads (FileResponse sets its own)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match check (RFC 9110, 13.1.2): "*" or any listed entity tag,
+    compared weakly (a W/ prefix is ignored)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+
+@app.get("/api/v1/download/{job_id}")
+async def download_excel(
+    job_id: str,
+    output_format: str = Query("xlsx", alias="format", pattern="^(xlsx|csv|jsonl|parquet)$"),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    Download analysis as Excel file, or as `format=csv|jsonl|parquet`
+    
+    The workbook (and Parquet file) is generated once (when the job
+    completes, or on the first download) and served from the artifact
+    cache afterwards; CSV and JSON Lines are streamed row by row. All
+    formats use the same columns and support conditional requests via
+    ETag / If-None-Match.
+    """
+    
+    job = job_store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = analysis_jobs[job_id]
-    
     if job["status"] != "completed":
         raise HTTPException(
             status_code=400,
             detail=f"Analysis not completed. Current status: {job['status']}"
         )
     
-    # Generate Excel
-    generator = ExcelGenerator(
-        language=job["output_language"],
-        mode=job["mode"]
-    )
-    
-    # Get Aronson data if available
-    aronson_data = job.get("aronson_results", None)
-    
-    excel_data = generator.generate(
-        analysis_data=job["results"],
-        filename=job["filename"],
-        aronson_data=aronson_data
-    )
+    media_type, extension = EXPORT_FORMATS[output_format]
     
     # Create filename
     base_name = os.path.splitext(job["filename"])[0]
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    download_filename = f"{base_name}_analysis_{timestamp}.xlsx"
+    download_filename = f"{base_name}_analysis_{timestamp}.{extension}"
     
-    return Response(
-        content=excel_data,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f'attachment; filename="{download_filename}"'
-        }
+    if output_format in ("csv", "jsonl"):
+        etag = export_etag(job_id, job, output_format)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        generator = ExcelGenerator(language=job["output_language"], mode=job["mode"])
+        rows = generator.rows(job_store.get_results(job_id) or [])
+        return StreamingResponse(
+            export_chunks(output_format, generator.columns(), rows),
+            media_type=media_type,
+            headers={**attachment_headers(download_filename), "ETag": etag, "Cache-Control": "private, no-cache"}
+        )
+    
+    # Generated in a thread so large files don't block the event loop
+    build = excel_artifact if output_format == "xlsx" else parquet_artifact
+    try:
+        path, etag = await asyncio.to_thread(build, job_store, artifacts, job_id, job)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=download_filename,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
+
+
+@app.get("/api/v1/export")
+async def export_corpus(
+    mode: str = Query(..., pattern="^(standard|tatort|story|combined)$"),
+    language: str = Query("EN", pattern="^(DE|EN)$"),
+    output_format: str = Query("csv", alias="format", pattern="^(csv|jsonl|parquet)$")
+):
+    """
+    Export the results of all completed jobs of one analysis mode
+    
+    Every row is prefixed with its job id and filename; `language` only
+    selects the column headers. CSV and JSON Lines are streamed one job
+    at a time.
+    """
+    
+    generator = ExcelGenerator(language=language, mode=mode)
+    columns = corpus_columns(generator)
+    media_type, extension = EXPORT_FORMATS[output_format]
+    download_filename = f"scene_analysis_{mode}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    
+    if output_format in ("csv", "jsonl"):
+        return StreamingResponse(
+            export_chunks(output_format, columns, corpus_rows(job_store, generator)),
+            media_type=media_type,
+            headers=attachment_headers(download_filename)
+        )
+    
+    # The file is removed once sent, or right away if writing it fails or
+    # the request is cancelled (files of dropped connections are swept
+    # with the artifacts)
+    fd, path = tempfile.mkstemp(dir=config.ARTIFACT_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        await asyncio.to_thread(write_parquet, columns, corpus_rows(job_store, generator), path)
+    except ValueError as e:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail=str(e))
+    except BaseException:
+        os.remove(path)
+        raise
+    
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=download_filename,
+        background=BackgroundTask(os.remove, path)
+    )
+
+
+@app.post("/api/v1/batch/upload", response_model=BatchUploadResponse)
+async def upload_batch(files: List[UploadFile] = File(...)):
+    """
+    Upload several scripts at once, as separate files and/or ZIP archives
+    
+    All files are parsed in parallel, each becoming a job of the batch.
+    Files that cannot be used are listed under `rejected` instead of
+    failing the whole upload.
+    """
+    
+    uploads: List[Tuple[str, bytes]] = []
+    rejected: List[Tuple[str, str]] = []
+    # Scripts of all files and archives count against one byte budget
+    total_size = 0
+    
+    for file in files:
+        file_ext = os.path.splitext(file.filename)[1].lower()
+        content = await file.read()
+        
+        if file_ext == ".zip":
+            try:
+                members, skipped = extract_archive(
+                    content,
+                    ALLOWED_EXTENSIONS,
+                    MAX_FILE_SIZE,
+                    config.BATCH_MAX_FILES - len(uploads),
+                    config.BATCH_MAX_TOTAL_BYTES - total_size
+                )
+            except ArchiveLimitError as e:
+                raise HTTPException(status_code=400, detail=f"{file.filename}: {e}")
+            except ValueError as e:
+                rejected.append((file.filename, str(e)))
+                continue
+            uploads.extend(members)
+            rejected.extend(skipped)
+            total_size += sum(len(member) for _, member in members)
+            continue
+        
+        error = validate_file_type(file_ext) or validate_file_size(len(content))
+        if error:
+            rejected.append((file.filename, error))
+            continue
+        
+        uploads.append((file.filename, content))
+        total_size += len(content)
+        if len(uploads) > config.BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many files. Maximum: {config.BATCH_MAX_FILES}"
+            )
+        if total_size > config.BATCH_MAX_TOTAL_BYTES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Upload too large. Maximum: {config.BATCH_MAX_TOTAL_BYTES // 1024 // 1024}MB in total"
+            )
+    
+    # Episodes in natural filename order ("Folge 2" before "Folge 10")
+    uploads.sort(key=lambda upload: episode_sort_key(upload[0]))
+    parsed_files = await asyncio.gather(*(parse_batch_file(filename, content) for filename, content in uploads))
+    
+    batch_id = str(uuid.uuid4())
+    accepted: List[FileUploadResponse] = []
+    for (filename, content), (parsed, error) in zip(uploads, parsed_files):
+        if error:
+            rejected.append((filename, error))
+            continue
+        accepted.append(create_uploaded_job(
+            str(uuid.uuid4()),
+            filename,
+            os.path.splitext(filename)[1].lower(),
+            len(content),
+            parsed["scenes"],
+            {key: parsed[key] for key in PROFILE_FIELDS},
+            characters=parsed["characters"],
+            batch_id=batch_id
+        ))
+    
+    if not accepted:
+        details = "; ".join(f"{filename}: {error}" for filename, error in rejected)
+        raise HTTPException(status_code=400, detail=f"No usable files in the upload. {details}".strip())
+    
+    rejected_files = [RejectedFile(filename=filename, error=error) for filename, error in rejected]
+    job_store.create(batch_id, {
+        "kind": BATCH_KIND,
+        "filename": f"{len(accepted)} files",
+        "status": BATCH_UPLOADED,
+        "episodes": [file.file_id for file in accepted],
+        "rejected": [file.model_dump() for file in rejected_files],
+        "total_scenes": sum(len(parsed["scenes"]) for parsed, error in parsed_files if not error),
+        "progress": 0
+    })
+    
+    return BatchUploadResponse(batch_id=batch_id, files=accepted, rejected=rejected_files)
+
+
+async def parse_batch_file(filename: str, content: bytes) -> Tuple[Optional[Dict], Optional[str]]:
+    """Parse one file of a batch in the parser processes; returns (parsed, error)"""
+    file_ext = os.path.splitext(filename)[1].lower()
+    try:
+        cache_key = parse_cache.key(content, file_ext)
+        parsed = await asyncio.to_thread(parse_cache.get, cache_key)
+        if parsed is None:
+            loop = asyncio.get_running_loop()
+            parsed = await loop.run_in_executor(get_parse_pool(), parse_document, content, file_ext)
+            if parsed["scenes"]:
+                await asyncio.to_thread(parse_cache.put, cache_key, parsed)
+    except ValueError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, f"Error parsing file: {str(e)}"
+    
+    if not parsed["scenes"]:
+        return None, "No scenes could be extracted from the file. Please check the format."
+    return parsed, None
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Parser processes for batch uploads, started with the first batch"""
+    global parse_pool
+    if parse_pool is None:
+        parse_pool = ProcessPoolExecutor(
+            max_workers=config.BATCH_PARSE_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return parse_pool
+
+
+@app.on_event("shutdown")
+async def stop_parse_pool():
+    if parse_pool is not None:
+        parse_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.post("/api/v1/batch/analyze")
+async def start_batch_analysis(request: BatchAnalysisRequest, background_tasks: BackgroundTasks):
+    """
+    Start AI analysis of all files of a batch
+    
+    Episodes run under a shared concurrency budget: BATCH_CONCURRENCY at a
+    time per worker (background executor), or spread over the worker
+    processes (queue executor).
+    """
+    
+    batch = job_store.get(request.batch_id)
+    if batch is None or not is_batch(batch):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    settings = {
+        "output_language": request.output_language,
+        "model": request.model,
+        "mode": request.mode,
+        "protagonist_count": request.protagonist_count
+    }
+    if not job_store.transition(request.batch_id, (BATCH_UPLOADED,), BATCH_ANALYZING, **settings):
+        raise HTTPException(status_code=400, detail="Batch analysis already started")
+    
+    # Episodes started on their own in the meantime keep running as they are
+    job_ids = [
+        job_id for job_id in batch["episodes"]
+        if job_store.transition(job_id, ("uploaded",), "queued", **settings)
+    ]
+    
+    total_scenes = 0
+    estimated_cost = 0.0
+    for job_id in job_ids:
+        scene_count = job_store.get(job_id)["total_scenes"]
+        cost = estimate_analysis_cost(request.mode, request.output_language, request.model, scene_count)
+        job_store.update(job_id, estimated_cost=cost)
+        total_scenes += scene_count
+        estimated_cost += cost
+    
+    if job_queue is not None:
+        for job_id in job_ids:
+            await asyncio.to_thread(job_queue.enqueue, job_id)
+    else:
+        background_tasks.add_task(runner.process_batch, job_ids)
+    
+    return {
+        "batch_id": request.batch_id,
+        "status": "queued",
+        "total_files": len(job_ids),
+        "total_scenes": total_scenes,
+        "estimated_cost": estimated_cost
+    }
+
+
+@app.get("/api/v1/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Get per-file and aggregate analysis status of a batch"""
+    
+    batch = job_store.get(batch_id)
+    if batch is None or not is_batch(batch):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return batch_status(job_store, batch_id, batch)
+
+
+@app.get("/api/v1/batch/{batch_id}/download")
+async def download_batch(batch_id: str, if_none_match: Optional[str] = Header(default=None)):
+    """Download one workbook for a batch: a summary sheet plus one sheet per episode"""
+    
+    batch = job_store.get(batch_id)
+    if batch is None or not is_batch(batch):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    status = batch_status(job_store, batch_id, batch)
+    if status["status"] != "completed":
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch analysis not completed. Current status: {status['status']}"
+        )
+    if status["completed_files"] + status["paused_files"] == 0:
+        raise HTTPException(status_code=400, detail="No file of the batch was analyzed successfully")
+    
+    path, etag = await asyncio.to_thread(batch_artifact, job_store, artifacts, batch_id, job_store.get(batch_id))
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return FileResponse(
+        path,
+        media_type=EXPORT_FORMATS["xlsx"][0],
+        filename=f"batch_analysis_{timestamp}.xlsx",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
     )
@@ -0,0 +1,38 @@
+from typing import Dict, List, Optional, Tuple
+
+
+# Upper bound for a single page of scenes or results
+MAX_PAGE_SIZE = 1000
+
+_MISSING = object()
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a `fields=a,b,c` projection (None = all fields)"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def project(row, fields: Optional[List[str]]) -> Dict:
+    """
+    Keep only the requested fields of a result dict or SceneRecord.
+
+    Scene records only decode their text when "text" is requested.
+    """
+    if fields is None:
+        return row.to_dict() if hasattr(row, "to_dict") else row
+    projected = {}
+    for field in fields:
+        value = row.get(field, _MISSING)
+        if value is not _MISSING:
+            projected[field] = value
+    return projected
+
+
+def page_bounds(total: int, offset: int, limit: Optional[int]) -> Tuple[int, int, Optional[int]]:
+    """Return (start, end, next_offset) for a page; next_offset is None on the last page"""
+    start = min(offset, total)
+    end = total if limit is None else min(start + limit, total)
+    return start, end, end if end < total else None
+
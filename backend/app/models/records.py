@@ -0,0 +1,139 @@
+import sys
+from typing import Dict, Iterator, List, Optional
+
+
+# Result fields with a small set of repeating values (interned once per process)
+CATEGORICAL_FIELDS = (
+    "int_ext", "location", "time_of_day", "turning_point_type", "protagonist_mood",
+    "information_flow", "knowledge_gap", "redundancy",
+    "hero_journey", "act", "plot_point_actual",
+)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class SceneRecord:
+    """
+    A single extracted scene.
+
+    The scene text is not copied into the record; it is a slice of the
+    UTF-8 buffer shared by all scenes of a SceneTable (byte offsets).
+    """
+
+    __slots__ = ("table", "number", "int_ext", "location", "time_of_day",
+                 "start", "end", "start_line", "end_line", "confidence", "speakers")
+
+    def __init__(self, table: "SceneTable", number: int, int_ext: Optional[str],
+                 location: Optional[str], time_of_day: Optional[str], start: int, end: int,
+                 start_line: Optional[int] = None, end_line: Optional[int] = None,
+                 confidence: Optional[Dict[str, float]] = None,
+                 speakers: Optional[List[str]] = None):
+        self.table = table
+        self.number = number
+        self.int_ext = _intern(int_ext)
+        self.location = _intern(location)
+        self.time_of_day = _intern(time_of_day)
+        self.start = start
+        self.end = end
+        self.start_line = start_line
+        self.end_line = end_line
+        # Parser confidence per heading field (None for treatment scenes)
+        self.confidence = confidence
+        # Characters with a cue in the scene (None for treatment scenes)
+        self.speakers = [_intern(name) for name in speakers] if speakers is not None else None
+
+    @property
+    def text(self) -> str:
+        return self.table.buffer[self.start:self.end].decode("utf-8")
+
+    # Mapping-style access so records can be used wherever scene dicts were
+    def __getitem__(self, key: str):
+        if key == "text":
+            return self.text
+        if key in self.__slots__ and key != "table":
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict:
+        """Serialize to the scene dict shape returned by the parsers"""
+        return {
+            "number": self.number,
+            "int_ext": self.int_ext,
+            "location": self.location,
+            "time_of_day": self.time_of_day,
+            "text": self.text,
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "confidence": self.confidence,
+            "speakers": self.speakers,
+        }
+
+
+class SceneTable:
+    """List-like collection of SceneRecords backed by one text buffer"""
+
+    __slots__ = ("buffer", "records")
+
+    def __init__(self):
+        # UTF-8 keeps the buffer compact even when a single character
+        # would force a str into a 2- or 4-byte-per-character layout
+        self.buffer = b""
+        self.records: List[SceneRecord] = []
+
+    @classmethod
+    def from_dicts(cls, scenes: List[Dict]) -> "SceneTable":
+        """Build a table from parser scene dicts (copies each text once into the buffer)"""
+        table = cls()
+        parts = []
+        offset = 0
+        for scene in scenes:
+            text = scene.get("text", "").encode("utf-8")
+            table.records.append(SceneRecord(
+                table,
+                scene.get("number", len(table.records) + 1),
+                scene.get("int_ext"),
+                scene.get("location"),
+                scene.get("time_of_day"),
+                offset,
+                offset + len(text),
+                scene.get("start_line"),
+                scene.get("end_line"),
+                scene.get("confidence"),
+                scene.get("speakers"),
+            ))
+            parts.append(text)
+            offset += len(text)
+        table.buffer = b"".join(parts)
+        return table
+
+    def to_dicts(self) -> List[Dict]:
+        return [record.to_dict() for record in self.records]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[SceneRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+
+def compact_result(result: Dict) -> Dict:
+    """Intern keys and categorical values of an analysis result dict"""
+    compact = {}
+    for key, value in result.items():
+        if key in CATEGORICAL_FIELDS:
+            value = _intern(value)
+        elif isinstance(value, list):
+            value = [_intern(item) for item in value]
+        compact[sys.intern(key)] = value
+    return compact
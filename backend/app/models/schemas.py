@@ -10,6 +10,11 @@ class FileUploadResponse(BaseModel):
     size: int
     file_type: str
     status: str = "uploaded"
+    # Pre-classification from a document sample
+    detected_format: Optional[str] = None  # screenplay, treatment
+    format_confidence: Optional[float] = None
+    detected_language: Optional[str] = None
+    language_confidence: Optional[float] = None
 
 
 class AnalysisRequest(BaseModel):
@@ -19,17 +24,44 @@ class AnalysisRequest(BaseModel):
     model: str
     mode: str = Field(..., pattern="^(standard|tatort|story|combined)$")
     protagonist_count: Optional[int] = Field(default=1, ge=1, le=5)
+    # Pause the job once the cost reported by OpenRouter reaches this (USD)
+    max_cost: Optional[float] = Field(default=None, gt=0)
+
+
+class RejectedFile(BaseModel):
+    """A file of a batch upload that could not be used"""
+    filename: str
+    error: str
+
+
+class BatchUploadResponse(BaseModel):
+    """Response model for batch upload"""
+    batch_id: str
+    status: str = "uploaded"
+    files: List[FileUploadResponse]
+    rejected: List[RejectedFile] = []
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request model for analyzing all files of a batch"""
+    batch_id: str
+    output_language: str = Field(..., pattern="^(DE|EN)$")
+    model: str
+    mode: str = Field(..., pattern="^(standard|tatort|story|combined)$")
+    protagonist_count: Optional[int] = Field(default=1, ge=1, le=5)
 
 
 class AnalysisStatus(BaseModel):
     """Response model for analysis status"""
     job_id: str
-    status: str  # uploaded, processing, analyzing, completed, error
+    status: str  # uploaded, processing, analyzing, completed, paused, error
     progress: int = Field(default=0, ge=0, le=100)
     current_scene: Optional[int] = None
     total_scenes: Optional[int] = None
     error: Optional[str] = None
     estimated_time_remaining: Optional[int] = None  # seconds
+    usage: Optional[Dict] = None  # tokens and cost reported by OpenRouter
+    max_cost: Optional[float] = None
 
 
 class SceneData(BaseModel):
@@ -1,21 +1,74 @@
-from .pdf_parser import PDFParser
-from .docx_parser import DOCXParser
-from .txt_parser import TXTParser
+from .base_parser import DocumentProfile
+from .cache import ParseCache
+from typing import Dict
+import importlib
+
+# Bump whenever parser output changes so cached parse results are invalidated
+PARSER_VERSION = "6"
+
+# Job/response fields describing the detected document profile
+PROFILE_FIELDS = ("detected_language", "language_confidence", "detected_format", "format_confidence")
+
+# File type -> (module, parser class). Parser modules are imported on first
+# use, so PDF support (PyPDF2) isn't loaded by processes that never parse
+PARSERS = {
+    ".pdf": ("pdf_parser", "PDFParser"),
+    ".docx": ("docx_parser", "DOCXParser"),
+    ".txt": ("txt_parser", "TXTParser"),
+    ".fountain": ("fountain_parser", "FountainParser"),
+    ".fdx": ("fdx_parser", "FDXParser")
+}
+
+SUPPORTED_EXTENSIONS = list(PARSERS)
+
+
+def _load_parser(module: str, name: str):
+    return getattr(importlib.import_module(f".{module}", __name__), name)
 
 
 def get_parser(file_type: str):
     """Factory function to get appropriate parser based on file type"""
-    parsers = {
-        ".pdf": PDFParser,
-        ".docx": DOCXParser,
-        ".txt": TXTParser
-    }
-    
-    parser_class = parsers.get(file_type.lower())
-    if not parser_class:
+    entry = PARSERS.get(file_type.lower())
+    if not entry:
         raise ValueError(f"Unsupported file type: {file_type}")
     
-    return parser_class
+    return _load_parser(*entry)
+
+
+def __getattr__(name: str):
+    # Parser classes are still importable from the package (`from parsers
+    # import PDFParser`), loaded when first accessed
+    for module, parser_name in PARSERS.values():
+        if parser_name == name:
+            return _load_parser(module, parser_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parse_document(content: bytes, file_type: str) -> Dict:
+    """Extract text, scenes and language from an uploaded document"""
+    parser = get_parser(file_type)(content)
+    scenes = parser.extract_scenes()
+    
+    return {
+        "text": parser.text,
+        "scenes": scenes,
+        "characters": parser.roster.to_list(),
+        **profile_fields(parser.detect_profile())
+    }
+
+
+def profile_fields(profile: DocumentProfile) -> Dict:
+    """Flatten a document profile into the job/response fields"""
+    return {
+        "detected_language": profile.language,
+        "language_confidence": profile.language_confidence,
+        "detected_format": profile.format,
+        "format_confidence": profile.format_confidence
+    }
 
 
-__all__ = ['PDFParser', 'DOCXParser', 'TXTParser', 'get_parser']
+__all__ = [
+    'PDFParser', 'DOCXParser', 'TXTParser', 'FountainParser', 'FDXParser',
+    'DocumentProfile', 'ParseCache', 'PARSER_VERSION', 'PARSERS', 'SUPPORTED_EXTENSIONS',
+    'get_parser', 'parse_document', 'profile_fields', 'PROFILE_FIELDS'
+]
@@ -0,0 +1,77 @@
+import io
+import os
+import zipfile
+from typing import Iterable, List, Tuple
+
+
+class ArchiveLimitError(ValueError):
+    """The archive holds more files or data than the upload may contain"""
+
+
+def extract_archive(
+    content: bytes,
+    allowed_extensions: Iterable[str],
+    max_file_size: int,
+    max_files: int,
+    max_total_size: int
+) -> Tuple[List[Tuple[str, bytes]], List[Tuple[str, str]]]:
+    """
+    Read the scripts contained in a ZIP upload
+
+    Folders, hidden files and macOS metadata are skipped silently; members
+    with an unsupported extension or over `max_file_size` are rejected.
+    The number of members and their declared total size are checked
+    against `max_files` and `max_total_size` before anything is unpacked;
+    since headers can lie, sizes are checked again while reading.
+
+    Raises:
+        ValueError: the file is not a ZIP archive
+        ArchiveLimitError: more than `max_files` scripts or
+            `max_total_size` bytes
+
+    Returns:
+        (files, rejected) as lists of (name, content) and (name, reason)
+    """
+    allowed = {extension.lower() for extension in allowed_extensions}
+    files = []
+    rejected = []
+
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        raise ValueError("Invalid ZIP archive")
+
+    with archive:
+        members = []
+        for member in archive.infolist():
+            name = os.path.basename(member.filename)
+            if member.is_dir() or not name or name.startswith(".") or member.filename.startswith("__MACOSX/"):
+                continue
+
+            if os.path.splitext(name)[1].lower() not in allowed:
+                rejected.append((name, "Unsupported file type"))
+            elif member.file_size > max_file_size:
+                rejected.append((name, "File too large"))
+            else:
+                members.append((name, member))
+
+        if len(members) > max_files:
+            raise ArchiveLimitError(f"Too many files. Maximum: {max_files}")
+        if sum(member.file_size for _, member in members) > max_total_size:
+            raise ArchiveLimitError(f"Upload too large. Maximum: {max_total_size // 1024 // 1024}MB in total")
+
+        remaining = max_total_size
+        for name, member in members:
+            with archive.open(member) as f:
+                data = f.read(min(max_file_size, remaining) + 1)
+            if len(data) > remaining:
+                raise ArchiveLimitError(f"Upload too large. Maximum: {max_total_size // 1024 // 1024}MB in total")
+            remaining -= len(data)
+            if len(data) > max_file_size:
+                rejected.append((name, "File too large"))
+            elif not data:
+                rejected.append((name, "File is empty"))
+            else:
+                files.append((name, data))
+
+    return files, rejected
@@ -1,6 +1,83 @@
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, NamedTuple, Iterable, Iterator
 from abc import ABC, abstractmethod
+from .fields import heading_confidence
+from .characters import CharacterRoster, split_cue, is_inferred_cue, is_dialogue_line
+
+
+# Screenplay element types for structured script lines
+SCENE_HEADING = "scene_heading"
+ACTION = "action"
+CHARACTER = "character"
+PARENTHETICAL = "parenthetical"
+DIALOGUE = "dialogue"
+TRANSITION = "transition"
+BLANK = "blank"
+
+# Document formats
+SCREENPLAY = "screenplay"
+TREATMENT = "treatment"
+
+# Slugline pattern: INT./EXT. + location + optional time of day
+SLUGLINE_PATTERN = re.compile(
+    r'^\s*(INT\.|EXT\.|INT/EXT\.)\s+(.+?)(?:\s*[-–—]\s*(.+?))?$',
+    re.IGNORECASE
+)
+
+# Common function words used to tell German from English text
+GERMAN_INDICATORS = frozenset(['der', 'die', 'das', 'und', 'ist', 'ich', 'sie', 'nicht', 'von', 'mit'])
+ENGLISH_INDICATORS = frozenset(['the', 'and', 'is', 'are', 'was', 'were', 'have', 'has', 'will', 'would'])
+
+# Lines per sample window (start, middle and end of the document)
+SAMPLE_WINDOW_LINES = 300
+
+# Words per screenplay page, used to judge scene heading density
+WORDS_PER_PAGE = 250
+
+
+# Paragraph style names used for screenplay elements by Final Draft and
+# Word screenplay templates (normalized: lowercase, no spaces)
+ELEMENT_STYLES = {
+    'sceneheading': SCENE_HEADING,
+    'slugline': SCENE_HEADING,
+    'szenenüberschrift': SCENE_HEADING,
+    'szenenkopf': SCENE_HEADING,
+    'action': ACTION,
+    'handlung': ACTION,
+    'general': ACTION,
+    'shot': ACTION,
+    'character': CHARACTER,
+    'figur': CHARACTER,
+    'rolle': CHARACTER,
+    'parenthetical': PARENTHETICAL,
+    'klammer': PARENTHETICAL,
+    'dialogue': DIALOGUE,
+    'dialog': DIALOGUE,
+    'transition': TRANSITION,
+    'übergang': TRANSITION,
+}
+
+
+def element_kind(style_name: Optional[str]) -> Optional[str]:
+    """Map a paragraph style name to a screenplay element type"""
+    if not style_name:
+        return None
+    key = re.sub(r'[\s_-]+', '', style_name).lower()
+    return ELEMENT_STYLES.get(key)
+
+
+class ScriptLine(NamedTuple):
+    """A single script line tagged with its screenplay element type"""
+    kind: str
+    text: str
+
+
+class DocumentProfile(NamedTuple):
+    """Format and language of a document, estimated from a sample"""
+    format: str
+    format_confidence: float
+    language: str
+    language_confidence: float
 
 
 class BaseParser(ABC):
@@ -9,6 +86,16 @@ class BaseParser(ABC):
     def __init__(self, content: bytes):
         self.content = content
         self.text = ""
+        # Structured lines, set by parsers that can classify screenplay
+        # elements from the document layout (None = plain text only)
+        self.lines: Optional[List[ScriptLine]] = None
+        self.profile: Optional[DocumentProfile] = None
+        # Characters from the cues of all scenes, and the cue keys per scene
+        self.roster = CharacterRoster()
+        self.scene_cues: List[List[str]] = []
+    
+    # Set by parsers whose markup names scene headings explicitly
+    NATIVE_ELEMENTS = False
     
     @abstractmethod
     def extract_text(self) -> str:
@@ -17,62 +104,221 @@ class BaseParser(ABC):
     
     def extract_scenes(self) -> List[Dict]:
         """Extract and parse scenes from text"""
-        self.text = self.extract_text()
+        profile = self.detect_profile()
+        self._ensure_text()
         
-        # Try screenplay format first (with sluglines)
-        scenes = self._extract_screenplay_scenes()
+        # Only run the segmenter for the detected format
+        scenes = []
+        if profile.format == SCREENPLAY:
+            scenes = self._extract_screenplay_scenes()
         
-        # If no scenes found, try treatment format
+        # Screenplays without usable sluglines are segmented as treatments
         if len(scenes) == 0:
             scenes = self._extract_treatment_scenes()
         
+        self.resolve_speakers(scenes)
         return scenes
     
+    def resolve_speakers(self, scenes: List[Dict]):
+        """
+        Set the speakers of each scene from the complete roster.
+        
+        Scenes get their speakers when they close, from the roster known
+        up to then; aliases seen later in the script are applied here.
+        """
+        for scene, cues in zip(scenes, self.scene_cues):
+            scene['speakers'] = self.roster.speakers(cues)
+    
+    def detect_profile(self) -> DocumentProfile:
+        """
+        Classify format and language from a sample of the document.
+        
+        Looks at a few windows (start, middle, end) instead of the whole
+        text, so the decision is cheap and made before full extraction.
+        """
+        if self.profile is None:
+            sample = self._sample_lines()
+            self.profile = DocumentProfile(
+                *self._classify_format(sample),
+                *self._classify_language(sample)
+            )
+        return self.profile
+    
+    def _ensure_text(self):
+        """Extract the full text unless sampling has already done so"""
+        if not self.text:
+            self.text = self.extract_text()
+    
+    def _sample_lines(self) -> List[ScriptLine]:
+        """
+        Return sample windows of script lines.
+        
+        Text formats are cheap to decode, so the default extracts the full
+        text once and samples its lines; PDFs override this to sample pages.
+        """
+        self._ensure_text()
+        if self.lines is not None:
+            lines = self.lines
+        else:
+            lines = list(self._classify_text_lines(self.text))
+        
+        window = SAMPLE_WINDOW_LINES
+        if len(lines) <= window * 3:
+            return lines
+        middle = len(lines) // 2
+        return lines[:window] + lines[middle:middle + window] + lines[-window:]
+    
+    def _classify_format(self, sample: List[ScriptLine]):
+        """Return (format, confidence) judged by scene heading density"""
+        headings = sum(1 for line in sample if line.kind == SCENE_HEADING)
+        words = sum(len(line.text.split()) for line in sample)
+        
+        # Screenplays have a scene heading every page or two; a single
+        # slugline-like line in a long text is more likely prose
+        density = headings * WORDS_PER_PAGE / max(words, 1)
+        if headings >= 2 or density >= 0.2:
+            if self.NATIVE_ELEMENTS:
+                return SCREENPLAY, 1.0
+            return SCREENPLAY, round(min(0.99, 0.5 + 0.1 * headings), 2)
+        
+        confidence = 0.6 if headings else min(0.95, 0.5 + words / 2000)
+        return TREATMENT, round(confidence, 2)
+    
+    def _classify_language(self, sample: List[ScriptLine]):
+        """Return (language, confidence) from common function words"""
+        german_count = 0
+        english_count = 0
+        for line in sample:
+            for word in line.text.lower().split():
+                if word in GERMAN_INDICATORS:
+                    german_count += 1
+                elif word in ENGLISH_INDICATORS:
+                    english_count += 1
+        
+        total = german_count + english_count
+        confidence = abs(german_count - english_count) / total if total else 0.0
+        language = 'DE' if german_count > english_count else 'EN'
+        return language, round(confidence, 2)
+    
+    def iter_scenes(self) -> Iterator[Dict]:
+        """
+        Yield scenes as soon as they are complete.
+        
+        A screenplay scene is closed by the next scene heading, so consumers
+        can start working on it while the rest of the document is still being
+        processed. Documents without headings are segmented as treatments
+        once the whole text is known.
+        """
+        found = False
+        if self.detect_profile().format == SCREENPLAY:
+            for scene in self._iter_scenes_from_lines(self.iter_lines()):
+                found = True
+                yield scene
+        else:
+            self._ensure_text()
+        
+        if not found:
+            yield from self._extract_treatment_scenes()
+    
+    def iter_lines(self) -> Iterator[ScriptLine]:
+        """
+        Yield script lines while the document is processed.
+        
+        Parsers that can produce lines incrementally (e.g. page by page)
+        override this; the default extracts the full text first.
+        """
+        self._ensure_text()
+        if self.lines is not None:
+            yield from self.lines
+        else:
+            yield from self._classify_text_lines(self.text)
+    
     def _extract_screenplay_scenes(self) -> List[Dict]:
         """Extract scenes using slugline detection (INT./EXT.)"""
-        scenes = []
-        lines = self.text.split('\n')
-        
-        # Slugline patterns
-        slugline_pattern = re.compile(
-            r'^\s*(INT\.|EXT\.|INT/EXT\.)\s+(.+?)(?:\s*[-–—]\s*(.+?))?$',
-            re.IGNORECASE
-        )
+        # Parsers with layout information already know the scene headings
+        if self.lines is not None:
+            return list(self._iter_scenes_from_lines(self.lines))
         
+        return list(self._iter_scenes_from_lines(self._classify_text_lines(self.text)))
+    
+    def _classify_text_lines(self, text: str) -> Iterator[ScriptLine]:
+        """Tag plain text lines: sluglines become scene headings, the rest is action"""
+        for line in text.split('\n'):
+            kind = SCENE_HEADING if SLUGLINE_PATTERN.match(line.strip()) else ACTION
+            yield ScriptLine(kind, line)
+    
+    def _iter_scenes_from_lines(self, lines: Iterable[ScriptLine]) -> Iterator[Dict]:
+        """Build scenes from structured script lines (no regex over the full text)"""
         current_scene = None
+        scene_lines = []
+        cues: List[str] = []
+        # Plain text: an all caps line is a cue if dialogue follows it
+        candidate = None
         scene_number = 0
+        i = -1
         
         for i, line in enumerate(lines):
-            match = slugline_pattern.match(line.strip())
-            
-            if match:
-                # Save previous scene
+            if line.kind == SCENE_HEADING:
+                # Close previous scene
                 if current_scene:
-                    current_scene['text'] = current_scene['text'].strip()
+                    current_scene['text'] = '\n'.join(scene_lines).strip()
                     current_scene['end_line'] = i - 1
-                    scenes.append(current_scene)
+                    yield self._close_scene(current_scene, cues)
                 
-                # Start new scene
                 scene_number += 1
-                current_scene = {
-                    'number': scene_number,
-                    'int_ext': match.group(1).upper(),
-                    'location': match.group(2).strip() if match.group(2) else "UNKNOWN",
-                    'time_of_day': match.group(3).strip().upper() if match.group(3) else "UNKNOWN",
-                    'text': '',
-                    'start_line': i
-                }
+                current_scene = self._scene_from_heading(scene_number, line.text)
+                current_scene['start_line'] = i
+                scene_lines = []
+                cues = []
+                candidate = None
             elif current_scene:
-                # Add line to current scene
-                current_scene['text'] += line + '\n'
+                scene_lines.append(line.text)
+                if line.kind == CHARACTER:
+                    cues.extend(self.roster.add(name) for name in split_cue(line.text))
+                elif line.kind == ACTION and candidate and is_dialogue_line(line.text):
+                    cues.extend(self.roster.add(name, inferred=True) for name in split_cue(candidate))
+                candidate = line.text if line.kind == ACTION and is_inferred_cue(line.text) else None
         
-        # Add last scene
+        # Close last scene
         if current_scene:
-            current_scene['text'] = current_scene['text'].strip()
-            current_scene['end_line'] = len(lines)
-            scenes.append(current_scene)
+            current_scene['text'] = '\n'.join(scene_lines).strip()
+            current_scene['end_line'] = i + 1
+            yield self._close_scene(current_scene, cues)
+    
+    def _close_scene(self, scene: Dict, cues: List[Optional[str]]) -> Dict:
+        """Attach the speakers of a finished scene"""
+        cues = [key for key in cues if key]
+        self.scene_cues.append(cues)
+        scene['speakers'] = self.roster.speakers(cues)
+        return scene
+    
+    def _scene_from_heading(self, number: int, heading: str) -> Dict:
+        """Create a scene dict from a scene heading line"""
+        match = SLUGLINE_PATTERN.match(heading.strip())
+        if match:
+            int_ext = match.group(1).upper()
+            location = match.group(2).strip() if match.group(2) else "UNKNOWN"
+            time_of_day = match.group(3).strip().upper() if match.group(3) else "UNKNOWN"
+        else:
+            # Heading without INT./EXT. prefix (e.g. styled headings in DOCX)
+            location, _, time_of_day = heading.strip().partition(' - ')
+            int_ext = "UNKNOWN"
+            location = location.strip() or "UNKNOWN"
+            time_of_day = time_of_day.strip().upper() or "UNKNOWN"
         
-        return scenes
+        return {
+            'number': number,
+            'int_ext': int_ext,
+            'location': location,
+            'time_of_day': time_of_day,
+            'text': '',
+            'start_line': None,
+            'confidence': heading_confidence(
+                int_ext, location, time_of_day,
+                slugline=match is not None,
+                native=self.NATIVE_ELEMENTS
+            )
+        }
     
     def _extract_treatment_scenes(self) -> List[Dict]:
         """Extract scenes from treatment (without clear sluglines)"""
@@ -254,14 +500,4 @@ class BaseParser(ABC):
     
     def detect_language(self) -> str:
         """Detect if text is German or English"""
-        # Simple heuristic: count common German words
-        german_indicators = ['der', 'die', 'das', 'und', 'ist', 'ich', 'Sie', 'nicht', 'von', 'mit']
-        english_indicators = ['the', 'and', 'is', 'are', 'was', 'were', 'have', 'has', 'will', 'would']
-        
-        text_lower = self.text.lower()
-        words = text_lower.split()
-        
-        german_count = sum(1 for word in words if word in german_indicators)
-        english_count = sum(1 for word in words if word in english_indicators)
-        
-        return 'DE' if german_count > english_count else 'EN'
+        return self.detect_profile().language
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from typing import Dict, Optional
+
+
+class ParseCache:
+    """
+    LRU cache of parse results keyed by upload content hash.
+
+    Backed by a SQLite file so all worker processes share the same entries.
+    Entries are stored zlib-compressed; the least recently used entries are
+    evicted once the total payload size exceeds max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, version: str):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS parse_cache (
+                    key TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_access ON parse_cache(last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def key(self, content: bytes, file_type: str) -> str:
+        """Cache key: SHA-256 of the upload bytes, file type and parser version"""
+        digest = hashlib.sha256(content).hexdigest()
+        return f"{digest}:{file_type.lower()}:{self.version}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached parse result or None"""
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute("SELECT payload FROM parse_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE parse_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            return json.loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError):
+            # A broken cache must never break uploads
+            return None
+
+    def put(self, key: str, value: Dict):
+        """Store a parse result and evict least recently used entries over budget"""
+        payload = zlib.compress(json.dumps(value).encode("utf-8"))
+        if len(payload) > self.max_bytes:
+            return
+
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO parse_cache (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time())
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn, total - self.max_bytes)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, excess: int):
+        """Delete least recently used entries until `excess` bytes are freed"""
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM parse_cache ORDER BY last_access"):
+            if freed >= excess:
+                break
+            stale.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM parse_cache WHERE key = ?", stale)
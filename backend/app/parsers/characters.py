@@ -0,0 +1,228 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+
+# Cue extensions: "EVA (V.O.)", "ARON (CONT'D)", "MAX (8)", "FOREMAN (OFF)"
+EXTENSION_PATTERN = re.compile(r"\s*\([^)]*\)")
+TRAILING_CONTD_PATTERN = re.compile(r"\s+(CONT'D|CONT\.|FORTS\.?)$")
+
+# Several speakers in one cue: "ELIAS, MAX, MANAL", "EVA & ARON", "EVA/ARON"
+CUE_SEPARATOR_PATTERN = re.compile(r"\s*(?:,|&|/|\bAND\b|\bUND\b)\s*")
+
+# Characters a name may consist of (letters, spaces, apostrophes, dots,
+# hyphens and digits for "WORKER 2")
+NAME_PATTERN = re.compile(r"^[^\W_][\w .'-]*$")
+
+# Honorifics ignored when matching a short cue to a longer one
+HONORIFICS = frozenset(["MR.", "MRS.", "MS.", "DR.", "PROF.", "HERR", "FRAU", "MR", "MRS", "MS", "DR"])
+
+# Uppercase lines that look like cues but are not characters
+NON_CHARACTER_CUES = frozenset([
+    "ALL", "BOTH", "EVERYONE", "ALLE", "BEIDE",
+    "THE END", "FADE IN", "FADE OUT", "CUT TO", "CONTINUED", "LATER", "MONTAGE", "FLASHBACK",
+    "ENDE", "SPÄTER", "SCHWARZBLENDE", "RÜCKBLENDE", "ABBLENDE", "AUFBLENDE",
+])
+
+# Inferred cues (plain text) are short; structured cues are trusted as they are
+MAX_INFERRED_CUE_WORDS = 3
+MAX_CUE_LENGTH = 40
+
+# Inferred names must be seen this often before they count as characters
+MIN_INFERRED_CUES = 2
+
+# Abbreviated honorifics are keyed with a dot ("MR RENOLT" -> "MR. RENOLT")
+ABBREVIATION_PATTERN = re.compile(r"\b(MR|MRS|MS|DR|PROF)\b\.?")
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+ROMAN_NUMERAL_PATTERN = re.compile(r"^[IVX]{2,}$")
+
+
+def cue_key(name: str) -> Optional[str]:
+    """
+    Normalized form of a character name: uppercase, extensions and
+    typographic apostrophes removed ("Eva’s Boss (CONT’D)" -> "EVA'S BOSS").
+    None if the text cannot be a name.
+    """
+    name = name.replace("’", "'").replace("‘", "'").replace("`", "'")
+    name = EXTENSION_PATTERN.sub("", name).strip().lstrip("@").rstrip("^:").strip()
+    name = TRAILING_CONTD_PATTERN.sub("", " ".join(name.upper().split()))
+    name = ABBREVIATION_PATTERN.sub(r"\1.", name)
+    if not name or len(name) > MAX_CUE_LENGTH or not NAME_PATTERN.match(name):
+        return None
+    if not any(char.isalpha() for char in name) or name in NON_CHARACTER_CUES:
+        return None
+    if all(word in HONORIFICS for word in name.split()):
+        return None
+    return name
+
+
+def split_cue(text: str) -> List[str]:
+    """Character names of a cue line (group cues name several speakers)"""
+    text = EXTENSION_PATTERN.sub("", text.replace("’", "'"))
+    return [part for part in CUE_SEPARATOR_PATTERN.split(text) if part.strip()]
+
+
+def is_inferred_cue(line: str) -> bool:
+    """Whether a plain text line looks like a character cue (short, all caps)"""
+    stripped = line.strip()
+    if not stripped or stripped != stripped.upper() or stripped.endswith(":"):
+        return False
+    name = cue_key(stripped)
+    return name is not None and len(name.split()) <= MAX_INFERRED_CUE_WORDS
+
+
+def is_dialogue_line(line: str) -> bool:
+    """Plain text line that can follow a cue: text in mixed case or a parenthetical"""
+    stripped = line.strip()
+    return bool(stripped) and (stripped.startswith("(") or stripped != stripped.upper())
+
+
+def display_name(key: str, forms: Optional[Counter] = None) -> str:
+    """
+    Name as shown in results: the most common spelling from the script if
+    it is mixed case (Fountain "@McClane"), otherwise capitalized
+    """
+    if forms:
+        form = forms.most_common(1)[0][0]
+        if form != form.upper():
+            return form
+    return WORD_PATTERN.sub(
+        lambda m: m.group(0) if ROMAN_NUMERAL_PATTERN.match(m.group(0)) else m.group(0).capitalize(),
+        key
+    )
+
+
+class CharacterRoster:
+    """
+    Characters of one script, collected from the character cues.
+
+    Spellings of a name are merged by `cue_key`; a one-word cue that
+    matches the first or last word of exactly one longer name ("RENOLT"
+    and "MR. RENOLT") is an alias of it. Every name resolves to the most
+    frequent spelling of its group.
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.forms: Dict[str, Counter] = {}
+        # Names only seen as inferred plain text cues
+        self.inferred: Counter = Counter()
+        self._aliases: Optional[Dict[str, str]] = None
+
+    def add(self, name: str, inferred: bool = False) -> Optional[str]:
+        """Count a cue; returns its key (None if it is not a name)"""
+        key = cue_key(name)
+        if key is None:
+            return None
+        if inferred:
+            self.inferred[key] += 1
+        else:
+            self.counts[key] += 1
+            form = " ".join(EXTENSION_PATTERN.sub("", name).strip().lstrip("@").rstrip("^:").split())
+            self.forms.setdefault(key, Counter())[form.replace("’", "'")] += 1
+        self._aliases = None
+        return key
+
+    def _alias_map(self) -> Dict[str, str]:
+        """Key -> canonical key of every name in the roster"""
+        if self._aliases is not None:
+            return self._aliases
+
+        cues = self.counts + self.inferred
+        groups: Dict[str, str] = {key: key for key in cues}
+        longer: Dict[str, List[str]] = {}
+        for key in cues:
+            words = [word for word in key.split() if word not in HONORIFICS]
+            if len(key.split()) > 1 and words:
+                for word in {words[0], words[-1]}:
+                    longer.setdefault(word, []).append(key)
+        for key in cues:
+            if len(key.split()) == 1 and len(longer.get(key, [])) == 1:
+                groups[key] = longer[key][0]
+
+        members: Dict[str, List[str]] = {}
+        for key, group in groups.items():
+            members.setdefault(group, []).append(key)
+
+        self._aliases = {}
+        for group_members in members.values():
+            # Names only inferred from plain text need a few cues to count
+            if not any(key in self.counts for key in group_members) and \
+                    sum(cues[key] for key in group_members) < MIN_INFERRED_CUES:
+                continue
+            # Each group resolves to its most frequent member
+            canonical = max(group_members, key=lambda key: (cues[key], len(key)))
+            for key in group_members:
+                self._aliases[key] = canonical
+        return self._aliases
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Key of the character a name refers to (None if not in the roster)"""
+        key = cue_key(name)
+        if key is None:
+            return None
+        return self._alias_map().get(key)
+
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """
+        Map names (cues or names returned by the model) to roster names,
+        in order and without duplicates; names not in the roster are kept
+        """
+        resolved = []
+        seen = set()
+        for name in names:
+            if not isinstance(name, str) or not name.strip():
+                continue
+            key = self.canonical(name)
+            if key is not None:
+                value = display_name(key, self.forms.get(key))
+            else:
+                value = name.strip()
+                key = value.upper()
+            if key not in seen:
+                seen.add(key)
+                resolved.append(value)
+        return resolved
+
+    def speakers(self, keys: Iterable[str]) -> List[str]:
+        """Roster names for the cue keys of one scene (unknown inferred cues dropped)"""
+        aliases = self._alias_map()
+        return self.resolve(key for key in keys if key in aliases)
+
+    def to_list(self) -> List[Dict]:
+        """Characters by number of cues, with the spellings merged into each"""
+        aliases = self._alias_map()
+        characters: Dict[str, Dict] = {}
+        for key, count in (self.counts + self.inferred).most_common():
+            if key not in aliases:
+                continue
+            canonical = aliases[key]
+            entry = characters.setdefault(canonical, {
+                "name": display_name(canonical, self.forms.get(canonical)),
+                "aliases": [],
+                "cues": 0
+            })
+            entry["cues"] += count
+            if key != canonical:
+                entry["aliases"].append(key)
+        return sorted(characters.values(), key=lambda entry: -entry["cues"])
+
+    @classmethod
+    def from_list(cls, characters: Iterable[Dict]) -> "CharacterRoster":
+        """Rebuild a roster from `to_list()` output (e.g. stored with a job)"""
+        roster = cls()
+        characters = list(characters or [])
+        for entry in characters:
+            key = roster.add(entry["name"])
+            if key is not None:
+                roster.counts[key] = entry.get("cues", 1)
+
+        aliases = roster._alias_map()
+        for entry in characters:
+            key = cue_key(entry["name"])
+            for alias in entry.get("aliases", []):
+                alias_key = cue_key(alias)
+                if key in aliases and alias_key is not None:
+                    aliases[alias_key] = aliases[key]
+        return roster
@@ -1,23 +1,96 @@
-import docx
 import io
-from .base_parser import BaseParser
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional, Tuple
+from .base_parser import BaseParser, ScriptLine, element_kind, ACTION, SCENE_HEADING
+
+
+# WordprocessingML namespace
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
 
 
 class DOCXParser(BaseParser):
     """Parser for DOCX files"""
-    
+
     def extract_text(self) -> str:
-        """Extract text from DOCX using python-docx"""
+        """Extract text from DOCX by stream-parsing word/document.xml"""
         try:
-            docx_file = io.BytesIO(self.content)
-            doc = docx.Document(docx_file)
-            
-            text = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text.append(paragraph.text)
-            
-            return '\n'.join(text)
-        
+            with zipfile.ZipFile(io.BytesIO(self.content)) as archive:
+                style_names = self._read_style_names(archive)
+
+                lines = []
+                has_headings = False
+                for style_id, text in self._iter_paragraphs(archive):
+                    if not text.strip():
+                        continue
+                    kind = element_kind(style_names.get(style_id, style_id)) or ACTION
+                    has_headings = has_headings or kind == SCENE_HEADING
+                    lines.append(ScriptLine(kind, text))
+
+            # Only trust styles if the document actually marks scene headings,
+            # otherwise fall back to slugline detection on the plain text
+            if has_headings:
+                self.lines = lines
+
+            return '\n'.join(line.text for line in lines)
+
         except Exception as e:
             raise ValueError(f"Failed to parse DOCX: {str(e)}")
+
+    def _read_style_names(self, archive: zipfile.ZipFile) -> Dict[str, str]:
+        """Map paragraph style ids to their display names from word/styles.xml"""
+        style_names = {}
+        try:
+            with archive.open('word/styles.xml') as styles_xml:
+                for _, elem in ET.iterparse(styles_xml):
+                    if elem.tag == f'{W}style':
+                        name = elem.find(f'{W}name')
+                        if name is not None:
+                            style_names[elem.get(f'{W}styleId')] = name.get(f'{W}val')
+                        elem.clear()
+        except KeyError:
+            # Documents without styles.xml only reference style ids
+            pass
+        return style_names
+
+    def _iter_paragraphs(self, archive: zipfile.ZipFile) -> Iterator[Tuple[Optional[str], str]]:
+        """Yield (style id, text) per paragraph without building the document tree"""
+        # Stack of open paragraphs (text boxes nest paragraphs inside paragraphs)
+        paragraphs = []
+        body = None
+        depth = 0
+        run_depth = 0
+
+        with archive.open('word/document.xml') as document_xml:
+            for event, elem in ET.iterparse(document_xml, events=('start', 'end')):
+                tag = elem.tag
+
+                if event == 'start':
+                    depth += 1
+                    if tag == f'{W}body':
+                        body = elem
+                    elif tag == f'{W}p':
+                        paragraphs.append([None, []])
+                    elif tag == f'{W}r':
+                        run_depth += 1
+                    continue
+
+                depth -= 1
+                if tag == f'{W}r':
+                    run_depth -= 1
+                elif tag == f'{W}t' and paragraphs:
+                    paragraphs[-1][1].append(elem.text or '')
+                elif tag == f'{W}tab' and run_depth and paragraphs:
+                    paragraphs[-1][1].append('\t')
+                elif tag in (f'{W}br', f'{W}cr') and run_depth and paragraphs:
+                    paragraphs[-1][1].append('\n')
+                elif tag == f'{W}pStyle' and paragraphs:
+                    paragraphs[-1][0] = elem.get(f'{W}val')
+                elif tag == f'{W}p':
+                    style_id, parts = paragraphs.pop()
+                    yield style_id, ''.join(parts)
+
+                # Drop finished top-level blocks (document > body > block)
+                # so memory stays constant regardless of document size
+                if depth == 2 and body is not None:
+                    body.clear()
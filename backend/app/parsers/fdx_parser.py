@@ -0,0 +1,59 @@
+import io
+import xml.etree.ElementTree as ET
+from typing import Iterator, Optional, Tuple
+from .base_parser import BaseParser, ScriptLine, element_kind, ACTION
+
+
+# Containers whose paragraphs are not part of the script body
+SKIPPED_CONTAINERS = ('TitlePage', 'ScriptNotes', 'ScriptNote')
+
+
+class FDXParser(BaseParser):
+    """Parser for Final Draft (.fdx) files"""
+
+    NATIVE_ELEMENTS = True
+
+    def extract_text(self) -> str:
+        """Extract text from the script paragraphs of a Final Draft XML file"""
+        try:
+            lines = []
+            for paragraph_type, text in self._iter_paragraphs():
+                if text.strip():
+                    lines.append(ScriptLine(element_kind(paragraph_type) or ACTION, text.strip()))
+
+            self.lines = lines
+            return '\n'.join(line.text for line in lines)
+
+        except Exception as e:
+            raise ValueError(f"Failed to parse FDX: {str(e)}")
+
+    def _iter_paragraphs(self) -> Iterator[Tuple[Optional[str], str]]:
+        """Yield (paragraph type, text) for script paragraphs, skipping title page and notes"""
+        # Stack of open paragraphs (dual dialogue nests paragraphs)
+        paragraphs = []
+        skip_depth = 0
+        content = None
+
+        for event, elem in ET.iterparse(io.BytesIO(self.content), events=('start', 'end')):
+            tag = elem.tag
+
+            if event == 'start':
+                if tag in SKIPPED_CONTAINERS:
+                    skip_depth += 1
+                elif tag == 'Content' and not skip_depth and content is None:
+                    content = elem
+                elif tag == 'Paragraph':
+                    paragraphs.append([elem.get('Type'), []])
+                continue
+
+            if tag in SKIPPED_CONTAINERS:
+                skip_depth -= 1
+            elif tag == 'Text' and paragraphs:
+                paragraphs[-1][1].append(elem.text or '')
+            elif tag == 'Paragraph':
+                paragraph_type, parts = paragraphs.pop()
+                if not skip_depth:
+                    yield paragraph_type, ''.join(parts)
+                # Drop finished top-level paragraphs so memory stays constant
+                if not paragraphs and content is not None:
+                    content.clear()
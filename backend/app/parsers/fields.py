@@ -0,0 +1,109 @@
+import re
+from typing import Dict, Optional
+
+
+# Scene fields the parsers can read from a scene heading
+HEADING_FIELDS = ("int_ext", "location", "time_of_day")
+
+# Confidence of heading fields by how the heading was recognized
+NATIVE_HEADING_CONFIDENCE = 1.0    # scene heading element (Fountain, FDX, styles)
+SLUGLINE_CONFIDENCE = 0.95         # INT./EXT. slugline matched in plain text
+SLUGLINE_LOCATION_CONFIDENCE = 0.9
+STYLED_HEADING_CONFIDENCE = 0.8    # heading without INT./EXT. prefix
+UNRECOGNIZED_CONFIDENCE = 0.0
+
+# Heading words -> canonical time of day
+TIME_OF_DAY_TERMS = {
+    "day": "day", "daytime": "day", "tag": "day", "tags": "day", "tagsüber": "day",
+    "morning": "morning", "morgen": "morning", "morgens": "morning", "früh": "morning",
+    "forenoon": "forenoon", "vormittag": "forenoon", "vormittags": "forenoon",
+    "noon": "noon", "midday": "noon", "mittag": "noon", "mittags": "noon",
+    "afternoon": "afternoon", "nachmittag": "afternoon", "nachmittags": "afternoon",
+    "evening": "evening", "abend": "evening", "abends": "evening",
+    "night": "night", "nighttime": "night", "nacht": "night", "nachts": "night", "midnight": "night",
+    "dawn": "dawn", "sunrise": "dawn", "morgendämmerung": "dawn", "sonnenaufgang": "dawn",
+    "dusk": "dusk", "sunset": "dusk", "twilight": "dusk", "abenddämmerung": "dusk",
+    "sonnenuntergang": "dusk", "dämmerung": "dusk",
+}
+
+# Canonical time of day -> label in the analysis output language, taken
+# from the time_of_day options of the scene prompt (SCENE_FIELDS), so
+# parser-resolved and model-analyzed scenes share one vocabulary
+TIME_OF_DAY_LABELS = {
+    "EN": {
+        "day": "Day", "morning": "Morning", "forenoon": "Morning", "noon": "Noon",
+        "afternoon": "Afternoon", "evening": "Evening", "night": "Night",
+        "dawn": "Dawn", "dusk": "Dusk",
+    },
+    "DE": {
+        "day": "Tag", "morning": "Morgen", "forenoon": "Vormittag", "noon": "Mittag",
+        "afternoon": "Nachmittag", "evening": "Abend", "night": "Nacht",
+        "dawn": "Dämmerung", "dusk": "Dämmerung",
+    },
+}
+
+
+def normalize_int_ext(value: Optional[str]) -> Optional[str]:
+    """'INT.', 'ext', 'I/E.' -> INT, EXT, INT/EXT (None if not recognized)"""
+    if not value:
+        return None
+    value = value.upper().replace(".", "").replace(" ", "")
+    if value in ("INT/EXT", "EXT/INT", "I/E"):
+        return "INT/EXT"
+    if value in ("INT", "EXT"):
+        return value
+    return None
+
+
+def normalize_time_of_day(value: Optional[str]) -> Optional[str]:
+    """
+    Canonical time of day of a heading's time part ('NIGHT', 'LATE
+    AFTERNOON', 'ABENDS (RÜCKBLENDE)'), or None for values like
+    'CONTINUOUS' or 'LATER' that don't name a time of day
+    """
+    if not value:
+        return None
+    for word in re.findall(r"\w+", value.lower()):
+        if word in TIME_OF_DAY_TERMS:
+            return TIME_OF_DAY_TERMS[word]
+    return None
+
+
+def time_of_day_label(value: Optional[str], language: str) -> Optional[str]:
+    """Time of day from a scene heading, in the output language's vocabulary"""
+    canonical = normalize_time_of_day(value)
+    if canonical is None:
+        return None
+    return TIME_OF_DAY_LABELS.get(language, TIME_OF_DAY_LABELS["EN"])[canonical]
+
+
+def heading_confidence(
+    int_ext: Optional[str],
+    location: Optional[str],
+    time_of_day: Optional[str],
+    slugline: bool,
+    native: bool
+) -> Dict[str, float]:
+    """
+    Per-field confidence for the fields read from a scene heading.
+
+    A field is only trusted when the heading was recognized as such and
+    the value is in the known vocabulary; everything else is left to the
+    model.
+    """
+    if native:
+        base = NATIVE_HEADING_CONFIDENCE
+    elif slugline:
+        base = SLUGLINE_CONFIDENCE
+    else:
+        base = STYLED_HEADING_CONFIDENCE
+
+    known_location = location and location != "UNKNOWN"
+    return {
+        "int_ext": base if normalize_int_ext(int_ext) else UNRECOGNIZED_CONFIDENCE,
+        "location": (
+            min(base, SLUGLINE_LOCATION_CONFIDENCE if slugline else STYLED_HEADING_CONFIDENCE)
+            if known_location else UNRECOGNIZED_CONFIDENCE
+        ),
+        "time_of_day": base if normalize_time_of_day(time_of_day) else UNRECOGNIZED_CONFIDENCE,
+    }
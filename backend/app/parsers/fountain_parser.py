@@ -0,0 +1,141 @@
+import io
+import re
+from typing import Iterator, Optional
+from .base_parser import (
+    BaseParser, ScriptLine,
+    SCENE_HEADING, ACTION, CHARACTER, PARENTHETICAL, DIALOGUE, TRANSITION, BLANK
+)
+
+
+# Scene heading prefixes accepted by the Fountain spec
+FOUNTAIN_HEADING_PATTERN = re.compile(
+    r'^(INT\.?/EXT|INT/EXT|I/E|INT|EXT|EST)[.\s]\s*(.*)$',
+    re.IGNORECASE
+)
+
+# Trailing scene numbers: "INT. HOUSE - DAY #12A#"
+SCENE_NUMBER_PATTERN = re.compile(r'\s*#[\w.-]+#\s*$')
+
+# Title page entries: "Title: ...", "Author: ..."
+TITLE_PAGE_PATTERN = re.compile(r'^[A-Za-z][\w ]*:')
+
+# Notes [[...]] and boneyard /* ... */ on a single line
+INLINE_NOTE_PATTERN = re.compile(r'\[\[.*?\]\]|/\*.*?\*/')
+
+
+class FountainParser(BaseParser):
+    """Parser for Fountain screenplay files (https://fountain.io)"""
+
+    NATIVE_ELEMENTS = True
+
+    def extract_text(self) -> str:
+        """Extract text from Fountain markup, classifying screenplay elements"""
+        try:
+            try:
+                source = self.content.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                source = self.content.decode('latin-1')
+
+            self.lines = list(self._iter_elements(io.StringIO(source)))
+            return '\n'.join(line.text for line in self.lines)
+
+        except Exception as e:
+            raise ValueError(f"Failed to parse Fountain: {str(e)}")
+
+    def _iter_elements(self, source: io.StringIO) -> Iterator[ScriptLine]:
+        """Classify Fountain lines in a single pass with one line of lookahead"""
+        lines = self._iter_clean_lines(source)
+        line = next(lines, None)
+        previous_blank = True
+        in_dialogue = False
+
+        while line is not None:
+            next_line = next(lines, None)
+            stripped = line.strip()
+            next_blank = next_line is None or not next_line.strip()
+            heading = self._heading(stripped) if previous_blank and stripped else None
+
+            if not stripped:
+                in_dialogue = False
+                previous_blank = True
+                yield ScriptLine(BLANK, '')
+                line = next_line
+                continue
+
+            if in_dialogue:
+                kind = PARENTHETICAL if stripped.startswith('(') else DIALOGUE
+                yield ScriptLine(kind, stripped)
+            elif stripped.startswith(('#', '=')):
+                # Sections, synopses and page breaks are not part of the script text
+                pass
+            elif stripped.startswith('!'):
+                yield ScriptLine(ACTION, stripped[1:])
+            elif heading:
+                yield ScriptLine(SCENE_HEADING, heading)
+            elif stripped.startswith('>') and stripped.endswith('<'):
+                # Centered text
+                yield ScriptLine(ACTION, stripped[1:-1].strip())
+            elif stripped.startswith('>'):
+                yield ScriptLine(TRANSITION, stripped[1:].strip())
+            elif previous_blank and next_blank and stripped.isupper() and stripped.endswith('TO:'):
+                yield ScriptLine(TRANSITION, stripped)
+            elif previous_blank and not next_blank and self._is_character(stripped):
+                in_dialogue = True
+                yield ScriptLine(CHARACTER, stripped.lstrip('@').rstrip('^').strip())
+            else:
+                yield ScriptLine(ACTION, line.rstrip())
+
+            previous_blank = False
+            line = next_line
+
+    def _iter_clean_lines(self, source: io.StringIO) -> Iterator[str]:
+        """Yield script lines without the title page, notes and boneyard"""
+        in_title_page = True
+        in_boneyard = False
+
+        for raw in source:
+            line = raw.rstrip('\r\n')
+
+            # Title page: key/value block at the very top, ended by a blank line
+            if in_title_page:
+                if line.strip() and (TITLE_PAGE_PATTERN.match(line) or line[:1].isspace()):
+                    continue
+                in_title_page = False
+                if not line.strip():
+                    continue
+
+            if in_boneyard:
+                if '*/' not in line:
+                    continue
+                line = line.split('*/', 1)[1]
+                in_boneyard = False
+
+            line = INLINE_NOTE_PATTERN.sub('', line)
+            if '/*' in line:
+                line = line.split('/*', 1)[0]
+                in_boneyard = True
+
+            yield line
+
+    def _heading(self, line: str) -> Optional[str]:
+        """Return the normalized scene heading, or None if the line is not one"""
+        if line.startswith('.') and not line.startswith('..'):
+            return SCENE_NUMBER_PATTERN.sub('', line[1:]).strip()
+
+        match = FOUNTAIN_HEADING_PATTERN.match(line)
+        if not match:
+            return None
+
+        prefix = match.group(1).upper().rstrip('.')
+        if prefix in ('INT/EXT', 'INT./EXT', 'I/E'):
+            prefix = 'INT/EXT'
+        elif prefix == 'EST':
+            prefix = 'EXT'
+        return f"{prefix}. {SCENE_NUMBER_PATTERN.sub('', match.group(2)).strip()}"
+
+    def _is_character(self, line: str) -> bool:
+        """Character cues are uppercase (extensions may be lowercase) or forced with @"""
+        if line.startswith('@'):
+            return True
+        name = line.split('(', 1)[0].rstrip('^').strip()
+        return bool(name) and name.isupper() and not name.endswith(':')
@@ -1,46 +1,253 @@
 import PyPDF2
 import io
 import re
-from .base_parser import BaseParser
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+from .base_parser import (
+    BaseParser, ScriptLine, SLUGLINE_PATTERN,
+    SCENE_HEADING, ACTION, CHARACTER, PARENTHETICAL, DIALOGUE, TRANSITION, BLANK
+)
+
+
+# Indentation bands in points, measured from the action margin.
+# Standard screenplay layout: action/headings at 1.5", dialogue at 2.5",
+# parentheticals at ~3.1", character cues at 3.7", transitions at ~6".
+DIALOGUE_INDENT = 36
+PARENTHETICAL_INDENT = 100
+CHARACTER_INDENT = 140
+TRANSITION_INDENT = 250
+
+# Lines that only carry page or scene numbers
+PAGE_NUMBER_PATTERN = re.compile(r'^\(?\d+[A-Z]?\)?\.?$')
+
+# Pages sampled for format/language detection: the first pages (title page
+# and opening scenes), two from the middle and the last one
+SAMPLE_HEAD_PAGES = 4
+
+# A text fragment positioned on the page: (x, y, font size, text)
+Fragment = Tuple[float, float, float, str]
 
 
 class PDFParser(BaseParser):
     """Parser for PDF files"""
-    
+
+    # Use glyph positions to rebuild lines and classify screenplay elements
+    LAYOUT_MODE = True
+
+    def __init__(self, content: bytes):
+        super().__init__(content)
+        self._reader = None
+        # Layout lines of pages already rebuilt while sampling
+        self._page_lines: Dict[int, List[ScriptLine]] = {}
+
+    def _get_reader(self) -> PyPDF2.PdfReader:
+        if self._reader is None:
+            self._reader = PyPDF2.PdfReader(io.BytesIO(self.content))
+        return self._reader
+
     def extract_text(self) -> str:
         """Extract text from PDF using PyPDF2"""
         try:
-            pdf_file = io.BytesIO(self.content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = []
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text.append(page_text)
-            
-            raw_text = '\n'.join(text)
-            
-            # Fix screenplay PDFs: Add line breaks before sluglines that are in the middle of lines
-            # Step 1: Handle sluglines after sentence endings
-            slugline_pattern = r'([.!?])\s+(INT\.|EXT\.|INT/EXT\.)\s+'
-            raw_text = re.sub(slugline_pattern, r'\1\n\n\2 ', raw_text, flags=re.IGNORECASE)
-            
-            # Step 2: Handle "DAY" or "NIGHT" followed immediately by next slugline
-            day_night_pattern = r'(DAY|NIGHT|MORNING|AFTERNOON|EVENING)\s+(INT\.|EXT\.|INT/EXT\.)\s+'
-            raw_text = re.sub(day_night_pattern, r'\1\n\n\2 ', raw_text, flags=re.IGNORECASE)
-            
-            # Step 3: Handle uppercase text that appears right after DAY/NIGHT in sluglines
-            # e.g. "- DAYEarly morning" -> "- DAY\nEarly morning"
-            # e.g. "- DAYTHE sound" -> "- DAY\nThe sound"
-            day_text_pattern = r'(-\s*(?:DAY|NIGHT|MORNING|AFTERNOON|EVENING))([A-Z][a-z])'
-            raw_text = re.sub(day_text_pattern, r'\1\n\2', raw_text, flags=re.IGNORECASE)
-            
-            # Step 4: Handle sluglines that appear after uppercase words (common in PDFs)
-            uppercase_slugline_pattern = r'([A-Z]{3,})(INT\.|EXT\.|INT/EXT\.)\s+'
-            raw_text = re.sub(uppercase_slugline_pattern, r'\1\n\n\2 ', raw_text, flags=re.IGNORECASE)
-            
-            return raw_text
-        
+            pdf_reader = self._get_reader()
+
+            if self.LAYOUT_MODE:
+                lines = list(self._iter_layout_lines(pdf_reader))
+
+                # PDFs without usable text positions fall back to flat text
+                if lines:
+                    self.lines = lines
+                    return '\n'.join(line.text for line in lines)
+
+            return self._extract_flat_text(pdf_reader.pages)
+
+        except Exception as e:
+            raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+    def iter_lines(self) -> Iterator[ScriptLine]:
+        """Yield classified lines page by page while the PDF is processed"""
+        if not self.LAYOUT_MODE:
+            yield from super().iter_lines()
+            return
+
+        try:
+            pdf_reader = self._get_reader()
+            lines = []
+            for line in self._iter_layout_lines(pdf_reader):
+                lines.append(line)
+                yield line
+
+            if lines:
+                self.lines = lines
+                self.text = '\n'.join(line.text for line in lines)
+                return
+
+            self.text = self._extract_flat_text(pdf_reader.pages)
+
+        except Exception as e:
+            raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+        yield from self._classify_text_lines(self.text)
+
+    def _sample_lines(self) -> List[ScriptLine]:
+        """Rebuild only a few pages instead of extracting the whole PDF"""
+        if not self.LAYOUT_MODE:
+            return super()._sample_lines()
+
+        try:
+            pages = self._get_reader().pages
+            count = len(pages)
+            middle = count // 2
+            indices = sorted({
+                *range(min(SAMPLE_HEAD_PAGES, count)), middle, middle + 1, count - 1
+            } & set(range(count)))
+
+            lines = []
+            for index in indices:
+                if index not in self._page_lines:
+                    self._page_lines[index] = self._extract_page_lines(pages[index])
+                lines.extend(self._page_lines[index])
+
+            if lines:
+                return lines
+            text = self._extract_flat_text([pages[index] for index in indices])
+
         except Exception as e:
             raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+        return list(self._classify_text_lines(text))
+
+    def _iter_layout_lines(self, pdf_reader) -> Iterator[ScriptLine]:
+        for index, page in enumerate(pdf_reader.pages):
+            lines = self._page_lines.pop(index, None)
+            if lines is None:
+                lines = self._extract_page_lines(page)
+            yield from lines
+
+    def _extract_page_lines(self, page) -> List[ScriptLine]:
+        """Rebuild the lines of one page from glyph positions and classify them"""
+        fragments: List[Fragment] = []
+
+        def visitor(text, cm, tm, font_dict, font_size):
+            text = text.replace('\n', '')
+            if not text:
+                return
+            # Text rendering matrix = text matrix x current transformation matrix
+            x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+            y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+            scale = abs(tm[0] * cm[0] + tm[1] * cm[2]) or 1.0
+            fragments.append((x, y, font_size * scale, text))
+
+        page.extract_text(visitor_text=visitor)
+
+        # Group fragments into lines: top to bottom, left to right
+        fragments.sort(key=lambda f: (-round(f[1], 1), f[0]))
+        rows = []
+        for fragment in fragments:
+            if rows and abs(rows[-1][0][1] - fragment[1]) <= fragment[2] * 0.3:
+                rows[-1].append(fragment)
+            else:
+                rows.append([fragment])
+
+        positioned = []
+        for row in rows:
+            row.sort(key=lambda f: f[0])
+            text = self._join_fragments(row).strip()
+            if text:
+                # Indentation is measured at the first visible glyph
+                x, y, size, first = next(f for f in row if f[3].strip())
+                x += (len(first) - len(first.lstrip())) * size * 0.5
+                positioned.append((x, y, size, text))
+
+        if not positioned:
+            return []
+
+        margin = self._action_margin([p[0] for p in positioned])
+
+        lines = []
+        previous_y = None
+        line_height = min(p[2] for p in positioned) * 1.2
+        for x, y, size, text in positioned:
+            if PAGE_NUMBER_PATTERN.match(text) or text == "(MORE)":
+                continue
+
+            # Paragraph gap
+            if previous_y is not None and previous_y - y > line_height * 1.5:
+                lines.append(ScriptLine(BLANK, ''))
+            previous_y = y
+
+            lines.append(ScriptLine(self._classify_line(text, x - margin), text))
+
+        return lines
+
+    def _join_fragments(self, row: List[Fragment]) -> str:
+        """Join fragments of one line, inserting spaces at horizontal gaps"""
+        parts = []
+        end_x = None
+        seen = set()
+        for x, _, size, text in row:
+            # Skip glyphs drawn twice at the same spot (fake bold)
+            key = (round(x), text)
+            if key in seen:
+                continue
+            seen.add(key)
+            if end_x is not None and x - end_x > size * 0.2:
+                if parts and not parts[-1].endswith(' ') and not text.startswith(' '):
+                    parts.append(' ')
+            parts.append(text)
+            # Approximate advance width of an average glyph: half the font size
+            end_x = x + len(text) * size * 0.5
+        return ''.join(parts)
+
+    def _action_margin(self, line_starts: List[float]) -> float:
+        """Find the action margin: the leftmost indentation used by many lines"""
+        counts = Counter(round(x) for x in line_starts)
+        threshold = max(1, len(line_starts) // 10)
+        frequent = [x for x, count in counts.items() if count >= threshold]
+        return min(frequent) if frequent else min(counts)
+
+    def _classify_line(self, text: str, indent: float) -> str:
+        """Classify a line by its indentation relative to the action margin"""
+        is_upper = text == text.upper()
+
+        if indent < CHARACTER_INDENT and is_upper and SLUGLINE_PATTERN.match(text):
+            return SCENE_HEADING
+        if indent < DIALOGUE_INDENT:
+            return ACTION
+        if indent >= TRANSITION_INDENT:
+            return TRANSITION if is_upper else ACTION
+        if indent >= CHARACTER_INDENT and is_upper:
+            return CHARACTER
+        if text.startswith('(') or indent >= PARENTHETICAL_INDENT:
+            return PARENTHETICAL
+        return DIALOGUE
+
+    def _extract_flat_text(self, pages) -> str:
+        """Extract flat text and repair sluglines with regex (PDFs without layout)"""
+        text = []
+        for page in pages:
+            page_text = page.extract_text()
+            if page_text:
+                text.append(page_text)
+
+        raw_text = '\n'.join(text)
+
+        # Fix screenplay PDFs: Add line breaks before sluglines that are in the middle of lines
+        # Step 1: Handle sluglines after sentence endings
+        slugline_pattern = r'([.!?])\s+(INT\.|EXT\.|INT/EXT\.)\s+'
+        raw_text = re.sub(slugline_pattern, r'\1\n\n\2 ', raw_text, flags=re.IGNORECASE)
+
+        # Step 2: Handle "DAY" or "NIGHT" followed immediately by next slugline
+        day_night_pattern = r'(DAY|NIGHT|MORNING|AFTERNOON|EVENING)\s+(INT\.|EXT\.|INT/EXT\.)\s+'
+        raw_text = re.sub(day_night_pattern, r'\1\n\n\2 ', raw_text, flags=re.IGNORECASE)
+
+        # Step 3: Handle uppercase text that appears right after DAY/NIGHT in sluglines
+        # e.g. "- DAYEarly morning" -> "- DAY\nEarly morning"
+        # e.g. "- DAYTHE sound" -> "- DAY\nThe sound"
+        day_text_pattern = r'(-\s*(?:DAY|NIGHT|MORNING|AFTERNOON|EVENING))([A-Z][a-z])'
+        raw_text = re.sub(day_text_pattern, r'\1\n\2', raw_text, flags=re.IGNORECASE)
+
+        # Step 4: Handle sluglines that appear after uppercase words (common in PDFs)
+        uppercase_slugline_pattern = r'([A-Z]{3,})(INT\.|EXT\.|INT/EXT\.)\s+'
+        raw_text = re.sub(uppercase_slugline_pattern, r'\1\n\n\2 ', raw_text, flags=re.IGNORECASE)
+
+        return raw_text
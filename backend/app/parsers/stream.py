@@ -0,0 +1,85 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from .base_parser import BaseParser
+
+
+class SceneFeed:
+    """
+    Runs a parser in a worker thread and publishes scenes as they close.
+
+    Any number of async consumers can iterate the feed; each one receives
+    every scene in order, waiting for new scenes until parsing has finished.
+    """
+
+    def __init__(self, parser: BaseParser):
+        self.parser = parser
+        self.scenes: List[Dict] = []
+        self.text = ""
+        self.detected_language: Optional[str] = None
+        self.done = False
+        self.error: Optional[Exception] = None
+        self._callbacks: List[Callable[["SceneFeed"], None]] = []
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start parsing in a worker thread (must be called from the event loop)"""
+        self._loop = asyncio.get_running_loop()
+        self._condition = asyncio.Condition()
+        self._task = asyncio.create_task(asyncio.to_thread(self._run))
+
+    def add_done_callback(self, callback: Callable[["SceneFeed"], None]):
+        """Call `callback(feed)` on the event loop once parsing has finished"""
+        if self.done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    @property
+    def total(self) -> Optional[int]:
+        """Final scene count, known once parsing has finished"""
+        return len(self.scenes) if self.done else None
+
+    def _run(self):
+        """Worker thread: iterate the parser and hand scenes to the event loop"""
+        error = None
+        try:
+            for scene in self.parser.iter_scenes():
+                self._loop.call_soon_threadsafe(self._publish, scene)
+            self.text = self.parser.text
+            self.detected_language = self.parser.detect_language()
+        except Exception as e:
+            error = e
+        self._loop.call_soon_threadsafe(self._finish, error)
+
+    def _publish(self, scene: Dict):
+        self.scenes.append(scene)
+        self._loop.create_task(self._notify())
+
+    def _finish(self, error: Optional[Exception]):
+        self.error = error
+        self.done = True
+        for callback in self._callbacks:
+            callback(self)
+        self._callbacks = []
+        self._loop.create_task(self._notify())
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    async def __aiter__(self) -> AsyncIterator[Dict]:
+        index = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: index < len(self.scenes) or self.done)
+
+            while index < len(self.scenes):
+                yield self.scenes[index]
+                index += 1
+
+            if self.done and index >= len(self.scenes):
+                if self.error:
+                    raise self.error
+                return
@@ -0,0 +1,3 @@
+from .index import SearchIndex, sync_index
+
+__all__ = ['SearchIndex', 'sync_index']
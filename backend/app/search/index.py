@@ -0,0 +1,304 @@
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Tuple
+from jobs.store import JobStore
+
+
+# Single-valued facets stored as indexed columns
+FACETS = ("int_ext", "time_of_day", "turning_point_type", "act")
+
+# Multi-valued facet stored in its own table (and as FTS column for filtering)
+CHARACTER_FACET = "on_stage"
+
+# Values returned per facet
+FACET_LIMIT = 20
+
+
+def fts_phrase(text: str) -> str:
+    """Quote text as an FTS5 string so user input is never parsed as query syntax"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def fts_terms(query: str) -> str:
+    """All words of a free-text query (AND); a trailing * keeps prefix matching"""
+    terms = []
+    for word in re.findall(r"[\w*]+", query):
+        prefix = word.endswith("*")
+        word = word.strip("*")
+        if word:
+            terms.append(fts_phrase(word) + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def character_names(value) -> List[str]:
+    if isinstance(value, list):
+        names = value
+    elif isinstance(value, str):
+        names = value.split(",")
+    else:
+        names = []
+    return [str(name).strip() for name in names if str(name).strip()]
+
+
+class SearchIndex:
+    """
+    Full-text and facet index over the results of completed jobs.
+
+    Lives in a SQLite file shared by all workers. `story_event`, `subtext`
+    and the character names are indexed with FTS5; the facets are plain
+    indexed columns, compared case-insensitively. Jobs are (re)indexed one
+    at a time as they complete, so the index never has to be rebuilt.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS indexed_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    version REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS scenes (
+                    id INTEGER PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    filename TEXT,
+                    mode TEXT,
+                    number INTEGER,
+                    int_ext TEXT COLLATE NOCASE,
+                    time_of_day TEXT COLLATE NOCASE,
+                    turning_point_type TEXT COLLATE NOCASE,
+                    act TEXT COLLATE NOCASE,
+                    location TEXT,
+                    story_event TEXT,
+                    subtext TEXT,
+                    on_stage TEXT
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scenes_job ON scenes(job_id, idx)")
+            for facet in FACETS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_scenes_{facet} ON scenes({facet})")
+            # Character names are interned, so facet counts group by integer
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS characters (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS scene_characters (
+                    scene_id INTEGER NOT NULL,
+                    character_id INTEGER NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_scene_characters ON scene_characters(scene_id, character_id)"
+            )
+            conn.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS scene_text USING fts5(
+                    story_event, subtext, characters,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def index_job(self, job_id: str, job: Dict, results: Iterable[Dict]):
+        """Add (or replace) the scenes of a completed job"""
+        character_ids: Dict[str, int] = {}
+        with closing(self._connect()) as conn, conn:
+            self._delete(conn, job_id)
+            for idx, scene in enumerate(results):
+                names = character_names(scene.get("on_stage"))
+                cursor = conn.execute(
+                    """INSERT INTO scenes (job_id, idx, filename, mode, number, int_ext, time_of_day,
+                                           turning_point_type, act, location, story_event, subtext, on_stage)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (job_id, idx, job.get("filename"), job.get("mode"), scene.get("number"),
+                     scene.get("int_ext"), scene.get("time_of_day"),
+                     scene.get("turning_point_type", scene.get("turning_point")), scene.get("act"),
+                     scene.get("location"), scene.get("story_event"), scene.get("subtext"),
+                     json.dumps(names))
+                )
+                scene_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO scene_characters (scene_id, character_id) VALUES (?, ?)",
+                    [(scene_id, self._character_id(conn, name, character_ids)) for name in names]
+                )
+                conn.execute(
+                    "INSERT INTO scene_text (rowid, story_event, subtext, characters) VALUES (?, ?, ?, ?)",
+                    (scene_id, scene.get("story_event") or "", scene.get("subtext") or "", "\n".join(names))
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_jobs (job_id, version) VALUES (?, ?)",
+                (job_id, job.get("completed_at", 0))
+            )
+
+    def _character_id(self, conn: sqlite3.Connection, name: str, known: Dict[str, int]) -> int:
+        key = name.lower()
+        if key not in known:
+            conn.execute("INSERT OR IGNORE INTO characters (name) VALUES (?)", (name,))
+            known[key] = conn.execute("SELECT id FROM characters WHERE name = ?", (name,)).fetchone()[0]
+        return known[key]
+
+    def remove_job(self, job_id: str):
+        with closing(self._connect()) as conn, conn:
+            self._delete(conn, job_id)
+
+    def _delete(self, conn: sqlite3.Connection, job_id: str):
+        scene_ids = "SELECT id FROM scenes WHERE job_id = ?"
+        conn.execute(f"DELETE FROM scene_text WHERE rowid IN ({scene_ids})", (job_id,))
+        conn.execute(f"DELETE FROM scene_characters WHERE scene_id IN ({scene_ids})", (job_id,))
+        conn.execute("DELETE FROM scenes WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM indexed_jobs WHERE job_id = ?", (job_id,))
+
+    def indexed_jobs(self) -> Dict[str, float]:
+        """Indexed job ids with the completion time of the indexed results"""
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT job_id, version FROM indexed_jobs").fetchall())
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+        offset: int = 0,
+        limit: int = 50,
+        with_facets: bool = True
+    ) -> Tuple[int, List[Dict], Dict[str, List[Dict]]]:
+        """
+        Find scenes matching a free-text query and facet filters.
+
+        Values of one facet are alternatives (OR), different facets must
+        all match (AND). `on_stage` names must all be on stage. Results are
+        ranked by relevance when there is a text query, otherwise in
+        script order.
+
+        Returns:
+            (total, page of scenes, facet counts over all matches, or {}
+            without `with_facets`)
+        """
+        filters = filters or {}
+        match_parts = []
+        if query and fts_terms(query):
+            match_parts.append("{story_event subtext} : (" + fts_terms(query) + ")")
+        for name in filters.get(CHARACTER_FACET, []):
+            match_parts.append("characters : " + fts_phrase(name))
+
+        conditions = []
+        params: List = []
+        for column in FACETS + ("job_id", "mode"):
+            values = filters.get(column)
+            if values:
+                conditions.append(f"s.{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+
+        if match_parts:
+            source = "scene_text JOIN scenes s ON s.id = scene_text.rowid"
+            conditions.insert(0, "scene_text MATCH ?")
+            params.insert(0, " AND ".join(match_parts))
+            order = "bm25(scene_text), s.id"
+        else:
+            source = "scenes s"
+            # Scenes are indexed job by job in script order
+            order = "s.id"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        facet_columns = ", ".join(f"{facet} TEXT COLLATE NOCASE" for facet in FACETS)
+
+        with closing(self._connect()) as conn:
+            # Matches are collected once, in result order (rowid), together
+            # with their facet values; the page and all counts read from them
+            conn.execute(f"CREATE TEMP TABLE matched (id INTEGER, {facet_columns})")
+            conn.execute(
+                f"""INSERT INTO temp.matched
+                    SELECT s.id, {', '.join(f's.{facet}' for facet in FACETS)}
+                    FROM {source} {where} ORDER BY {order}""",
+                params
+            )
+            total = conn.execute("SELECT COUNT(*) FROM temp.matched").fetchone()[0]
+
+            rows = conn.execute(
+                """SELECT s.job_id, s.idx, s.filename, s.mode, s.number, s.int_ext, s.time_of_day,
+                          s.turning_point_type, s.act, s.location, s.story_event, s.subtext, s.on_stage
+                   FROM (SELECT rowid AS rank, id FROM temp.matched ORDER BY rowid LIMIT ? OFFSET ?) m
+                   JOIN scenes s ON s.id = m.id
+                   ORDER BY m.rank""",
+                (limit, offset)
+            ).fetchall()
+
+            facets = self._facets(conn) if with_facets else {}
+        columns = ("job_id", "index", "filename", "mode", "number", "int_ext", "time_of_day",
+                   "turning_point_type", "act", "location", "story_event", "subtext", "on_stage")
+        results = []
+        for row in rows:
+            result = dict(zip(columns, row))
+            result["on_stage"] = json.loads(result["on_stage"] or "[]")
+            results.append(result)
+
+        return total, results, facets
+
+    def _facets(self, conn: sqlite3.Connection) -> Dict[str, List[Dict]]:
+        """Value counts per facet over temp.matched (top FACET_LIMIT values)"""
+        facets = {}
+        for facet in FACETS:
+            facets[facet] = self._facet_counts(
+                conn,
+                f"""SELECT {facet}, COUNT(*) AS n FROM temp.matched
+                    WHERE {facet} IS NOT NULL AND {facet} != '' GROUP BY {facet}"""
+            )
+        facets[CHARACTER_FACET] = [
+            {"value": name, "count": count}
+            for name, count in conn.execute(
+                f"""SELECT c.name, top.n FROM (
+                        SELECT sc.character_id, COUNT(*) AS n
+                        FROM temp.matched m JOIN scene_characters sc ON sc.scene_id = m.id
+                        GROUP BY sc.character_id ORDER BY n DESC LIMIT {FACET_LIMIT}
+                    ) top JOIN characters c ON c.id = top.character_id
+                    ORDER BY top.n DESC"""
+            )
+        ]
+        return facets
+
+    def _facet_counts(self, conn: sqlite3.Connection, sql: str) -> List[Dict]:
+        rows = conn.execute(f"{sql} ORDER BY n DESC LIMIT {FACET_LIMIT}").fetchall()
+        return [{"value": value, "count": count} for value, count in rows]
+
+    def stats(self) -> Dict:
+        with closing(self._connect()) as conn:
+            jobs = conn.execute("SELECT COUNT(*) FROM indexed_jobs").fetchone()[0]
+            scenes = conn.execute("SELECT COUNT(*) FROM scenes").fetchone()[0]
+        return {"jobs": jobs, "scenes": scenes}
+
+
+def sync_index(search_index: SearchIndex, job_store: JobStore) -> int:
+    """
+    Index completed jobs the index has missed (or that were analyzed again)
+    and drop jobs that have expired; returns how many jobs changed
+    """
+    indexed = search_index.indexed_jobs()
+    completed = set()
+    changed = 0
+
+    for job_id in job_store.job_ids("completed"):
+        completed.add(job_id)
+        job = job_store.get(job_id)
+        if job is None or indexed.get(job_id) == job.get("completed_at", 0):
+            continue
+        search_index.index_job(job_id, job, job_store.get_results(job_id) or [])
+        changed += 1
+
+    for job_id in indexed.keys() - completed:
+        search_index.remove_job(job_id)
+        changed += 1
+
+    return changed
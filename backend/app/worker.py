@@ -0,0 +1,98 @@
+"""
+Analysis worker: runs queued analysis jobs outside the web process.
+
+Used with ANALYSIS_EXECUTOR=queue, where the API only enqueues jobs.
+
+    python worker.py [--processes N]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+from excel.artifacts import ArtifactCache
+from jobs import create_job_store
+from jobs.queue import JobQueue
+from jobs.runner import JobRunner, RUNNING_STATUSES
+from search import SearchIndex
+import config
+
+
+async def run_worker(owner: str):
+    """Claim and run jobs one at a time until the process is stopped"""
+    job_store = create_job_store()
+    queue = JobQueue(config.JOB_QUEUE_PATH)
+    # Scene feeds only exist in the API process; the runner reads the scenes
+    # it publishes to the job store while parsing
+    runner = JobRunner(job_store, {}, ArtifactCache(config.ARTIFACT_DIR), SearchIndex(config.SEARCH_INDEX_PATH))
+
+    while True:
+        claimed = await asyncio.to_thread(queue.claim, owner, config.JOB_STALE_SECONDS)
+        if claimed is None:
+            await asyncio.sleep(config.WORKER_POLL_INTERVAL)
+            continue
+
+        job_id, attempt = claimed
+        job = job_store.get(job_id)
+
+        if job is None or job["status"] not in RUNNING_STATUSES:
+            # Deleted, or finished right before the previous worker died
+            pass
+        elif attempt > config.JOB_MAX_ATTEMPTS:
+            job_store.update(job_id, status="error", error=f"Analysis failed after {attempt - 1} attempts", progress=0)
+        else:
+            await run_leased(runner, queue, job_id, owner)
+
+        await asyncio.to_thread(queue.complete, job_id, owner)
+
+
+async def run_leased(runner: JobRunner, queue: JobQueue, job_id: str, owner: str):
+    """Run a job while renewing its lease; stop if the lease is lost"""
+    task = asyncio.create_task(runner.process(job_id))
+
+    while not task.done():
+        await asyncio.wait({task}, timeout=config.JOB_HEARTBEAT_INTERVAL)
+        if task.done():
+            break
+        renewed = await asyncio.to_thread(queue.renew, job_id, owner, config.JOB_STALE_SECONDS)
+        if not renewed:
+            # Another worker owns the job now
+            task.cancel()
+            break
+
+
+def worker_main(index: int):
+    owner = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    try:
+        asyncio.run(run_worker(owner))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run analysis worker processes")
+    parser.add_argument(
+        "--processes", type=int, default=config.WORKER_PROCESSES,
+        help="number of worker processes (default: WORKER_PROCESSES)"
+    )
+    args = parser.parse_args()
+
+    if config.JOB_STORE != "sqlite":
+        raise SystemExit("Workers need a shared job store: set JOB_STORE=sqlite")
+
+    processes = [
+        multiprocessing.Process(target=worker_main, args=(index,), name=f"worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Startup import-time budget for the backend
+
+Imports `main` (what every uvicorn worker does on a cold start) under
+`python -X importtime` a few times and checks:
+
+- the app's own modules (parsers, analyzer, excel, jobs, ...) together
+  with everything they import stay within the budget; FastAPI itself is
+  reported but not budgeted
+- heavy format libraries are not imported at startup (parsers and the
+  workbook writer load them on first use)
+
+Exit code 1 if a check fails, so it can run in CI:
+
+    python check_import_time.py --budget-ms 100
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "app")
+
+# Top-level packages and modules of the app (besides main)
+APP_PACKAGES = {"analyzer", "config", "excel", "jobs", "models", "parsers", "search"}
+
+# Libraries that must only be imported when a file of their format is used
+DEFERRED_MODULES = {"PyPDF2", "openpyxl", "docx", "requests", "pyarrow"}
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def run_importtime() -> List[Tuple[int, int, str]]:
+    """(cumulative microseconds, depth, module) of one `import main`, in output order"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {
+            **os.environ,
+            "DATA_DIR": data_dir,
+            "OPENROUTER_API_KEY": os.environ.get("OPENROUTER_API_KEY", "import-time-check"),
+        }
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=APP_DIR, env=env, capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        sys.exit(f"import main failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            entries.append((int(match.group(2)), (len(match.group(3)) - 1) // 2, match.group(4)))
+    return entries
+
+
+def parents(entries: List[Tuple[int, int, str]]) -> Dict[str, str]:
+    """Module -> module that imported it (importtime lists children first)"""
+    result = {}
+    stack: List[str] = []
+    for _, depth, module in reversed(entries):
+        del stack[depth:]
+        if stack:
+            result.setdefault(module, stack[-1])
+        stack.append(module)
+    return result
+
+
+def app_import_time(entries: List[Tuple[int, int, str]]) -> Dict[str, int]:
+    """Cumulative time of the outermost app modules (nested ones are included in them)"""
+    imported_by = parents(entries)
+    times = {}
+    for cumulative, _, module in entries:
+        if module.split(".")[0] not in APP_PACKAGES:
+            continue
+        parent = imported_by.get(module)
+        while parent is not None and parent.split(".")[0] not in APP_PACKAGES:
+            parent = imported_by.get(parent)
+        if parent is None:
+            times[module] = cumulative
+    return times
+
+
+def import_chain(module: str, imported_by: Dict[str, str]) -> str:
+    chain = [module]
+    while chain[-1] in imported_by:
+        chain.append(imported_by[chain[-1]])
+    return " <- ".join(chain)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=100, help="budget for the app's own imports")
+    parser.add_argument("--runs", type=int, default=5, help="imports measured (the median is checked)")
+    args = parser.parse_args()
+
+    totals, app_totals = [], []
+    per_module: Dict[str, List[int]] = {}
+    failures = []
+    for run in range(args.runs):
+        entries = run_importtime()
+        main_time = next(cumulative for cumulative, depth, module in entries if module == "main" and depth == 0)
+        app_times = app_import_time(entries)
+        totals.append(main_time)
+        app_totals.append(sum(app_times.values()))
+        for module, cumulative in app_times.items():
+            per_module.setdefault(module, []).append(cumulative)
+
+        if run == 0:
+            imported_by = parents(entries)
+            for _, _, module in entries:
+                if module in DEFERRED_MODULES:
+                    failures.append(f"{module} is imported at startup: {import_chain(module, imported_by)}")
+
+    total_ms = statistics.median(totals) / 1000
+    app_ms = statistics.median(app_totals) / 1000
+    print(f"import main: {total_ms:.1f} ms (median of {args.runs})")
+    print(f"app modules: {app_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for module, times in sorted(per_module.items(), key=lambda item: -statistics.median(item[1]))[:10]:
+        print(f"  {statistics.median(times) / 1000:8.1f} ms  {module}")
+
+    if app_ms > args.budget_ms:
+        failures.append(f"app imports take {app_ms:.1f} ms, over the budget of {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
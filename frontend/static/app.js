@@ -79,28 +79,63 @@ async function startAnalysis() {
     
     document.getElementById('progressModal').classList.remove('hidden');
     document.getElementById('progressModal').classList.add('flex');
-    pollStatus();
+    followEvents();
+}
+
+// Push updates: status changes and each scene as soon as it is analyzed.
+// EventSource reconnects on its own and resumes after the last scene (Last-Event-ID).
+function followEvents() {
+    if (!window.EventSource) return pollStatus();
+    
+    const source = new EventSource(`${API}/events/${jobId}`);
+    source.addEventListener('scene', (e) => appendLiveRow(JSON.parse(e.data)));
+    source.addEventListener('scene_error', (e) => {
+        const failed = JSON.parse(e.data);
+        appendLiveRow({ ...failed, story_event: `Error: ${failed.error}` });
+    });
+    source.addEventListener('status', (e) => {
+        if (handleStatus(JSON.parse(e.data))) source.close();
+    });
+    source.onerror = () => {
+        // Closed for good (e.g. proxy without streaming support): fall back to polling
+        if (source.readyState === EventSource.CLOSED) pollStatus();
+    };
 }
 
 async function pollStatus() {
     const interval = setInterval(async () => {
         const res = await fetch(`${API}/status/${jobId}`);
         const data = await res.json();
-        
-        document.getElementById('progressBar').style.width = `${data.progress}%`;
-        document.getElementById('curScene').textContent = data.current_scene || 0;
-        document.getElementById('totScenes').textContent = data.total_scenes || 0;
-        
-        if (data.status === 'completed') {
-            clearInterval(interval);
-            showSuccess();
-        } else if (data.status === 'error') {
-            clearInterval(interval);
-            alert('Error: ' + data.error);
-        }
+        if (handleStatus(data)) clearInterval(interval);
     }, 2000);
 }
 
+// Update the progress modal; returns true once the job has finished
+function handleStatus(data) {
+    document.getElementById('progressBar').style.width = `${data.progress}%`;
+    document.getElementById('curScene').textContent = data.current_scene || 0;
+    document.getElementById('totScenes').textContent = data.total_scenes || 0;
+    
+    if (data.status === 'completed') {
+        showSuccess();
+        return true;
+    } else if (data.status === 'error') {
+        alert('Error: ' + data.error);
+        return true;
+    } else if (data.status === 'paused') {
+        alert('Paused: ' + data.error);
+        return true;
+    }
+    return false;
+}
+
+function appendLiveRow(result) {
+    const tbody = document.getElementById('liveBody');
+    tbody.insertAdjacentHTML('beforeend', `<tr><td class="pr-2 text-gray-500">${result.number}</td><td class="pr-2">${result.location || '-'}</td><td>${result.story_event || '-'}</td></tr>`);
+    document.getElementById('liveResults').classList.remove('hidden');
+    tbody.lastElementChild.scrollIntoView({ block: 'nearest' });
+}
+
 async function showSuccess() {
     document.getElementById('progressModal').classList.add('hidden');
     